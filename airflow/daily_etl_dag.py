@@ -3,6 +3,12 @@ from datetime import datetime
 from airflow import DAG
 from airflow.operators.bash import BashOperator
 
+# Each task runs one pipeline stage, so a failed task is retried alone:
+# the later stages read what the earlier ones persisted under data/. The
+# db task loads every load the database missed, so a failed load_database
+# is made up by the next day's run.
+PIPELINE = "python -m src.pipeline run --incremental --stages"
+
 
 with DAG(
     dag_id="daily_restaurant_etl",
@@ -10,8 +16,10 @@ with DAG(
     schedule_interval="@daily",
     catchup=False,
 ) as dag:
-    run_pipeline = BashOperator(
-        task_id="run_pipeline",
-        bash_command="python -m src.pipeline",
-    )
+    load = BashOperator(task_id="load", bash_command=f"{PIPELINE} load")
+    load_database = BashOperator(task_id="load_database", bash_command=f"{PIPELINE} db")
+    compute_kpis = BashOperator(task_id="compute_kpis", bash_command=f"{PIPELINE} kpi")
+    export = BashOperator(task_id="export", bash_command=f"{PIPELINE} export")
 
+    load >> [load_database, compute_kpis]
+    compute_kpis >> export
@@ -1,4 +1,5 @@
 CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders(order_timestamp);
+CREATE INDEX IF NOT EXISTS idx_order_facts_timestamp ON order_facts(order_timestamp);
 CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
 CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items(menu_item_id);
 CREATE INDEX IF NOT EXISTS idx_menu_items_category_id ON menu_items(category_id);
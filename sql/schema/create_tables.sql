@@ -84,6 +84,15 @@ CREATE TABLE IF NOT EXISTS payments (
   payment_timestamp TIMESTAMP NOT NULL
 );
 
+-- One row per order, rebuilt by the pipeline from the line items
+CREATE TABLE IF NOT EXISTS order_facts (
+  order_id INTEGER PRIMARY KEY REFERENCES orders(order_id) ON DELETE CASCADE,
+  order_timestamp TIMESTAMP NOT NULL,
+  location VARCHAR(100),
+  item_count INTEGER NOT NULL,
+  order_total NUMERIC(12, 2) NOT NULL
+);
+
 -- Optional inventory usage tracking per menu item
 CREATE TABLE IF NOT EXISTS inventory_usage (
   inventory_usage_id SERIAL PRIMARY KEY,
@@ -55,6 +55,15 @@ CREATE TABLE IF NOT EXISTS payments (
   payment_timestamp TEXT NOT NULL
 );
 
+-- One row per order, rebuilt by the pipeline from the line items
+CREATE TABLE IF NOT EXISTS order_facts (
+  order_id INTEGER PRIMARY KEY REFERENCES orders(order_id) ON DELETE CASCADE,
+  order_timestamp TEXT NOT NULL,
+  location TEXT,
+  item_count INTEGER NOT NULL,
+  order_total REAL NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS inventory_usage (
   inventory_usage_id INTEGER PRIMARY KEY,
   menu_item_id INTEGER NOT NULL REFERENCES menu_items(menu_item_id),
@@ -0,0 +1,4 @@
+-- Refresh the PostgreSQL KPI summaries after a load
+REFRESH MATERIALIZED VIEW CONCURRENTLY summary_hourly;
+REFRESH MATERIALIZED VIEW CONCURRENTLY summary_daily;
+REFRESH MATERIALIZED VIEW CONCURRENTLY summary_menu_items;
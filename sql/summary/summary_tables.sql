@@ -0,0 +1,41 @@
+-- Materialized KPI summary tables for PostgreSQL
+--
+-- Refreshed after each load with sql/summary/refresh_summary.sql; the
+-- unique indexes allow REFRESH ... CONCURRENTLY so dashboards keep reading
+-- the previous contents while a refresh runs. Order counts and revenue
+-- come from the order-grain order_facts table, so no distinct count over
+-- the line items is needed.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS summary_hourly AS
+SELECT
+  DATE(order_timestamp) AS sales_date,
+  EXTRACT(HOUR FROM order_timestamp) AS sales_hour,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+GROUP BY DATE(order_timestamp), EXTRACT(HOUR FROM order_timestamp);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_summary_hourly
+  ON summary_hourly (sales_date, sales_hour);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS summary_daily AS
+SELECT
+  DATE(order_timestamp) AS sales_date,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+GROUP BY DATE(order_timestamp);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_summary_daily
+  ON summary_daily (sales_date);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS summary_menu_items AS
+SELECT
+  oi.menu_item_id,
+  SUM(oi.quantity) AS total_quantity,
+  SUM(oi.quantity * oi.item_price) AS total_revenue
+FROM order_items oi
+GROUP BY oi.menu_item_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_summary_menu_items
+  ON summary_menu_items (menu_item_id);
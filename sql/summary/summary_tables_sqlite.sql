@@ -0,0 +1,254 @@
+-- Materialized KPI summary tables for SQLite
+--
+-- Triggers on orders/order_items apply each row change as a delta, so the
+-- KPI views read these small tables instead of re-joining all history.
+-- summary_hourly rolls up into summary_daily through its own triggers.
+-- Safe to re-run: empty summaries are seeded from the base tables.
+
+CREATE TABLE IF NOT EXISTS summary_hourly (
+  sales_date TEXT NOT NULL,
+  sales_hour INTEGER NOT NULL,
+  orders_count INTEGER NOT NULL DEFAULT 0,
+  total_revenue REAL NOT NULL DEFAULT 0,
+  PRIMARY KEY (sales_date, sales_hour)
+);
+
+CREATE TABLE IF NOT EXISTS summary_daily (
+  sales_date TEXT PRIMARY KEY,
+  orders_count INTEGER NOT NULL DEFAULT 0,
+  total_revenue REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS summary_menu_items (
+  menu_item_id INTEGER PRIMARY KEY,
+  total_quantity INTEGER NOT NULL DEFAULT 0,
+  total_revenue REAL NOT NULL DEFAULT 0
+);
+
+-- Hourly -> daily rollup
+CREATE TRIGGER IF NOT EXISTS trg_summary_hourly_insert
+AFTER INSERT ON summary_hourly
+BEGIN
+  INSERT INTO summary_daily (sales_date, orders_count, total_revenue)
+  VALUES (NEW.sales_date, NEW.orders_count, NEW.total_revenue)
+  ON CONFLICT (sales_date) DO UPDATE SET
+    orders_count = orders_count + excluded.orders_count,
+    total_revenue = total_revenue + excluded.total_revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_hourly_update
+AFTER UPDATE ON summary_hourly
+BEGIN
+  UPDATE summary_daily SET
+    orders_count = orders_count + NEW.orders_count - OLD.orders_count,
+    total_revenue = total_revenue + NEW.total_revenue - OLD.total_revenue
+  WHERE sales_date = NEW.sales_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_hourly_delete
+AFTER DELETE ON summary_hourly
+BEGIN
+  UPDATE summary_daily SET
+    orders_count = orders_count - OLD.orders_count,
+    total_revenue = total_revenue - OLD.total_revenue
+  WHERE sales_date = OLD.sales_date;
+END;
+
+-- Buckets left without orders are removed
+CREATE TRIGGER IF NOT EXISTS trg_summary_hourly_prune
+AFTER UPDATE OF orders_count ON summary_hourly
+WHEN NEW.orders_count = 0
+BEGIN
+  DELETE FROM summary_hourly
+  WHERE sales_date = NEW.sales_date AND sales_hour = NEW.sales_hour;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_daily_prune
+AFTER UPDATE OF orders_count ON summary_daily
+WHEN NEW.orders_count = 0
+BEGIN
+  DELETE FROM summary_daily WHERE sales_date = NEW.sales_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_menu_items_prune
+AFTER UPDATE OF total_quantity ON summary_menu_items
+WHEN NEW.total_quantity = 0
+BEGIN
+  DELETE FROM summary_menu_items WHERE menu_item_id = NEW.menu_item_id;
+END;
+
+-- order_items changes. An order is counted in its bucket while it has at
+-- least one item, so only the first item added / last item removed moves
+-- orders_count.
+CREATE TRIGGER IF NOT EXISTS trg_order_items_summary_insert
+AFTER INSERT ON order_items
+BEGIN
+  INSERT INTO summary_hourly (sales_date, sales_hour, orders_count, total_revenue)
+  SELECT
+    DATE(o.order_timestamp),
+    CAST(strftime('%H', o.order_timestamp) AS INTEGER),
+    NOT EXISTS (
+      SELECT 1 FROM order_items oi
+      WHERE oi.order_id = NEW.order_id AND oi.order_item_id <> NEW.order_item_id
+    ),
+    NEW.quantity * NEW.item_price
+  FROM orders o
+  WHERE o.order_id = NEW.order_id
+  ON CONFLICT (sales_date, sales_hour) DO UPDATE SET
+    orders_count = orders_count + excluded.orders_count,
+    total_revenue = total_revenue + excluded.total_revenue;
+
+  INSERT INTO summary_menu_items (menu_item_id, total_quantity, total_revenue)
+  VALUES (NEW.menu_item_id, NEW.quantity, NEW.quantity * NEW.item_price)
+  ON CONFLICT (menu_item_id) DO UPDATE SET
+    total_quantity = total_quantity + excluded.total_quantity,
+    total_revenue = total_revenue + excluded.total_revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_order_items_summary_delete
+AFTER DELETE ON order_items
+BEGIN
+  UPDATE summary_hourly SET
+    orders_count = orders_count - (
+      NOT EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = OLD.order_id)
+    ),
+    total_revenue = total_revenue - OLD.quantity * OLD.item_price
+  WHERE (sales_date, sales_hour) = (
+    SELECT DATE(o.order_timestamp), CAST(strftime('%H', o.order_timestamp) AS INTEGER)
+    FROM orders o WHERE o.order_id = OLD.order_id
+  );
+
+  UPDATE summary_menu_items SET
+    total_quantity = total_quantity - OLD.quantity,
+    total_revenue = total_revenue - OLD.quantity * OLD.item_price
+  WHERE menu_item_id = OLD.menu_item_id;
+END;
+
+-- Upserts rewrite every column, so unchanged rows are skipped.
+CREATE TRIGGER IF NOT EXISTS trg_order_items_summary_update
+AFTER UPDATE ON order_items
+WHEN OLD.order_id IS NOT NEW.order_id
+  OR OLD.menu_item_id IS NOT NEW.menu_item_id
+  OR OLD.quantity IS NOT NEW.quantity
+  OR OLD.item_price IS NOT NEW.item_price
+BEGIN
+  UPDATE summary_hourly SET
+    orders_count = orders_count - (
+      OLD.order_id IS NOT NEW.order_id
+      AND NOT EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = OLD.order_id)
+    ),
+    total_revenue = total_revenue - OLD.quantity * OLD.item_price
+  WHERE (sales_date, sales_hour) = (
+    SELECT DATE(o.order_timestamp), CAST(strftime('%H', o.order_timestamp) AS INTEGER)
+    FROM orders o WHERE o.order_id = OLD.order_id
+  );
+
+  INSERT INTO summary_hourly (sales_date, sales_hour, orders_count, total_revenue)
+  SELECT
+    DATE(o.order_timestamp),
+    CAST(strftime('%H', o.order_timestamp) AS INTEGER),
+    OLD.order_id IS NOT NEW.order_id AND NOT EXISTS (
+      SELECT 1 FROM order_items oi
+      WHERE oi.order_id = NEW.order_id AND oi.order_item_id <> NEW.order_item_id
+    ),
+    NEW.quantity * NEW.item_price
+  FROM orders o
+  WHERE o.order_id = NEW.order_id
+  ON CONFLICT (sales_date, sales_hour) DO UPDATE SET
+    orders_count = orders_count + excluded.orders_count,
+    total_revenue = total_revenue + excluded.total_revenue;
+
+  UPDATE summary_menu_items SET
+    total_quantity = total_quantity - OLD.quantity,
+    total_revenue = total_revenue - OLD.quantity * OLD.item_price
+  WHERE menu_item_id = OLD.menu_item_id;
+
+  INSERT INTO summary_menu_items (menu_item_id, total_quantity, total_revenue)
+  VALUES (NEW.menu_item_id, NEW.quantity, NEW.quantity * NEW.item_price)
+  ON CONFLICT (menu_item_id) DO UPDATE SET
+    total_quantity = total_quantity + excluded.total_quantity,
+    total_revenue = total_revenue + excluded.total_revenue;
+END;
+
+-- orders changes. Items may arrive before their order, and a timestamp
+-- edit moves the whole order to another bucket.
+CREATE TRIGGER IF NOT EXISTS trg_orders_summary_insert
+AFTER INSERT ON orders
+BEGIN
+  INSERT INTO summary_hourly (sales_date, sales_hour, orders_count, total_revenue)
+  SELECT
+    DATE(NEW.order_timestamp),
+    CAST(strftime('%H', NEW.order_timestamp) AS INTEGER),
+    1,
+    SUM(oi.quantity * oi.item_price)
+  FROM order_items oi
+  WHERE oi.order_id = NEW.order_id
+  GROUP BY oi.order_id
+  ON CONFLICT (sales_date, sales_hour) DO UPDATE SET
+    orders_count = orders_count + excluded.orders_count,
+    total_revenue = total_revenue + excluded.total_revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_summary_update
+AFTER UPDATE OF order_timestamp ON orders
+WHEN DATE(OLD.order_timestamp) IS NOT DATE(NEW.order_timestamp)
+  OR strftime('%H', OLD.order_timestamp) IS NOT strftime('%H', NEW.order_timestamp)
+BEGIN
+  UPDATE summary_hourly SET
+    orders_count = orders_count - 1,
+    total_revenue = total_revenue - (
+      SELECT SUM(oi.quantity * oi.item_price) FROM order_items oi
+      WHERE oi.order_id = OLD.order_id
+    )
+  WHERE sales_date = DATE(OLD.order_timestamp)
+    AND sales_hour = CAST(strftime('%H', OLD.order_timestamp) AS INTEGER)
+    AND EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = OLD.order_id);
+
+  INSERT INTO summary_hourly (sales_date, sales_hour, orders_count, total_revenue)
+  SELECT
+    DATE(NEW.order_timestamp),
+    CAST(strftime('%H', NEW.order_timestamp) AS INTEGER),
+    1,
+    SUM(oi.quantity * oi.item_price)
+  FROM order_items oi
+  WHERE oi.order_id = NEW.order_id
+  GROUP BY oi.order_id
+  ON CONFLICT (sales_date, sales_hour) DO UPDATE SET
+    orders_count = orders_count + excluded.orders_count,
+    total_revenue = total_revenue + excluded.total_revenue;
+END;
+
+-- BEFORE DELETE still sees the order's items; items removed afterwards by
+-- ON DELETE CASCADE no longer find their order and change nothing.
+CREATE TRIGGER IF NOT EXISTS trg_orders_summary_delete
+BEFORE DELETE ON orders
+BEGIN
+  UPDATE summary_hourly SET
+    orders_count = orders_count - 1,
+    total_revenue = total_revenue - (
+      SELECT SUM(oi.quantity * oi.item_price) FROM order_items oi
+      WHERE oi.order_id = OLD.order_id
+    )
+  WHERE sales_date = DATE(OLD.order_timestamp)
+    AND sales_hour = CAST(strftime('%H', OLD.order_timestamp) AS INTEGER)
+    AND EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = OLD.order_id);
+END;
+
+-- Seed empty summaries from existing rows (first run on an existing
+-- database, or after a bulk load with the triggers deferred).
+INSERT INTO summary_hourly (sales_date, sales_hour, orders_count, total_revenue)
+SELECT
+  DATE(o.order_timestamp),
+  CAST(strftime('%H', o.order_timestamp) AS INTEGER),
+  COUNT(DISTINCT o.order_id),
+  SUM(oi.quantity * oi.item_price)
+FROM orders o
+JOIN order_items oi ON o.order_id = oi.order_id
+WHERE NOT EXISTS (SELECT 1 FROM summary_hourly)
+GROUP BY DATE(o.order_timestamp), CAST(strftime('%H', o.order_timestamp) AS INTEGER);
+
+INSERT INTO summary_menu_items (menu_item_id, total_quantity, total_revenue)
+SELECT menu_item_id, SUM(quantity), SUM(quantity * item_price)
+FROM order_items
+WHERE NOT EXISTS (SELECT 1 FROM summary_menu_items)
+GROUP BY menu_item_id;
@@ -0,0 +1,87 @@
+-- KPI and sales trend views for DuckDB
+-- Order-level views read order_facts (one row per order), menu views read
+-- the staged order detail (one row per order item, already joined to
+-- orders, menu items and categories), so each view is a single columnar
+-- scan with no distinct counting. Items without an order or menu entry
+-- are excluded, as the joins in the SQLite/PostgreSQL views exclude them.
+
+-- Daily revenue and orders
+CREATE OR REPLACE VIEW kpi_daily_revenue AS
+SELECT
+  CAST(order_timestamp AS DATE) AS sales_date,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+WHERE order_timestamp IS NOT NULL
+GROUP BY CAST(order_timestamp AS DATE);
+
+-- Average order value
+CREATE OR REPLACE VIEW kpi_average_order_value AS
+SELECT
+  CAST(order_timestamp AS DATE) AS sales_date,
+  SUM(order_total) / NULLIF(COUNT(*), 0) AS average_order_value
+FROM order_facts
+WHERE order_timestamp IS NOT NULL
+GROUP BY CAST(order_timestamp AS DATE);
+
+-- Revenue by category
+CREATE OR REPLACE VIEW kpi_revenue_by_category AS
+SELECT
+  category_name,
+  SUM(quantity * item_price) AS total_revenue
+FROM order_detail
+WHERE category_name IS NOT NULL
+GROUP BY category_name;
+
+-- Revenue per hour
+CREATE OR REPLACE VIEW kpi_revenue_per_hour AS
+SELECT
+  hour(order_timestamp) AS sales_hour,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+WHERE order_timestamp IS NOT NULL
+GROUP BY hour(order_timestamp);
+
+-- Top menu items
+CREATE OR REPLACE VIEW kpi_top_menu_items AS
+SELECT
+  item_name,
+  SUM(quantity) AS total_quantity,
+  SUM(quantity * item_price) AS total_revenue
+FROM order_detail
+WHERE item_name IS NOT NULL
+GROUP BY item_name
+ORDER BY total_revenue DESC;
+
+-- Weekday vs weekend
+CREATE OR REPLACE VIEW kpi_weekday_vs_weekend AS
+SELECT
+  CASE
+    WHEN dayofweek(order_timestamp) IN (0, 6) THEN 'weekend'
+    ELSE 'weekday'
+  END AS day_type,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+WHERE order_timestamp IS NOT NULL
+GROUP BY CASE
+  WHEN dayofweek(order_timestamp) IN (0, 6) THEN 'weekend'
+  ELSE 'weekday'
+END;
+
+-- Hourly breakdown
+CREATE OR REPLACE VIEW sales_trends_hourly AS
+SELECT
+  CAST(order_timestamp AS DATE) AS sales_date,
+  hour(order_timestamp) AS sales_hour,
+  COUNT(*) AS orders_count,
+  SUM(order_total) AS total_revenue
+FROM order_facts
+WHERE order_timestamp IS NOT NULL
+GROUP BY CAST(order_timestamp AS DATE), hour(order_timestamp)
+ORDER BY sales_date, sales_hour;
+
+-- Weekday vs weekend (sales trends)
+CREATE OR REPLACE VIEW sales_weekday_vs_weekend AS
+SELECT * FROM kpi_weekday_vs_weekend;
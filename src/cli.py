@@ -0,0 +1,192 @@
+"""Command line of the ETL pipeline::
+
+    python -m src.pipeline run --incremental --stages load,db
+    python -m src.pipeline run --stages kpi --kpis daily_revenue,peak_hours --since 2024-01-01
+    python -m src.pipeline stages
+    python -m src.pipeline kpis
+
+Arguments are parsed before anything heavy is imported, so ``--help`` and
+usage errors return at once; :func:`src.pipeline.run_pipeline` then
+imports only the services of the selected stages. Without a subcommand
+``run`` is assumed, so the flags of earlier releases keep working.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+from typing import Callable, Sequence
+
+from src.config.options import (
+    CSV_COMPRESSIONS, DIMENSIONS, EXCEL_MODES, KPI_BACKENDS, POOL_MODES, STAGES,
+)
+
+STAGE_HELP = {
+    "load": "ingest the raw CSVs, stage the detail table and update the KPI state",
+    "db": "load the last load's rows into the database and apply the views",
+    "kpi": "compute the KPIs and stage them for the export",
+    "export": "write the staged KPIs as CSVs and the Excel workbook",
+}
+COMMANDS = ("run", "stages", "kpis")
+
+
+def _names(value: str) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+
+
+def _stages(value: str) -> tuple[str, ...]:
+    stages = _names(value)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(
+            f"expected a comma-separated list of {', '.join(STAGES)}; got {value!r}"
+        )
+    return stages
+
+
+def _date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}") from None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.pipeline", description="Restaurant analytics ETL pipeline"
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    run = commands.add_parser("run", help="run the pipeline, or some of its stages (default)")
+    run.set_defaults(handler=_run)
+    run.add_argument(
+        "--stages", type=_stages, default=STAGES, metavar="LIST",
+        help=f"comma-separated stages to run, of {','.join(STAGES)} (default: all)",
+    )
+    run.add_argument(
+        "--kpis", type=_names, default=(), metavar="LIST",
+        help="comma-separated KPI names to compute (default: all; see the kpis command)",
+    )
+    run.add_argument(
+        "--since", type=_date, default=None, metavar="DATE",
+        help="compute the KPIs over orders from this date on, from the staged detail",
+    )
+    run.add_argument(
+        "--incremental", action="store_true",
+        help="only ingest orders beyond the stored watermark",
+    )
+    run.add_argument(
+        "--chunk-size", type=int, default=None, metavar="ROWS",
+        help="stream order_items in chunks of this many rows",
+    )
+    run.add_argument(
+        "--kpi-backend", choices=KPI_BACKENDS, default="pandas",
+        help="compute KPIs in pandas or inside the database",
+    )
+    run.add_argument(
+        "--kpi-pool", choices=POOL_MODES, default="thread",
+        help="run the KPIs on a thread (default) or process pool, or one by one",
+    )
+    run.add_argument(
+        "--kpi-workers", type=int, default=None, metavar="N",
+        help="pool size for --kpi-pool (default: CPU count)",
+    )
+    run.add_argument(
+        "--dimensions", nargs="+", choices=DIMENSIONS, default=[],
+        help="also slice every KPI by these dimensions, with an overall rollup",
+    )
+    run.add_argument(
+        "--top-k", type=int, default=None, metavar="K",
+        help="keep only the K best-selling items in top_menu_items",
+    )
+    run.add_argument(
+        "--no-cache", action="store_true",
+        help="run every stage, ignoring and not updating data/cache",
+    )
+    run.add_argument(
+        "--csv-compression", choices=CSV_COMPRESSIONS, default=None,
+        help="compress the per-KPI CSV exports",
+    )
+    run.add_argument(
+        "--excel-mode", choices=EXCEL_MODES, default="streaming",
+        help="streaming workbook writer, or the in-memory openpyxl export",
+    )
+    run.add_argument(
+        "--trace-memory", action="store_true",
+        help="record traced memory per stage (slows Python-heavy stages)",
+    )
+    run.add_argument(
+        "--profile", action="store_true",
+        help="write a cProfile dump per stage to data/metrics/profiles",
+    )
+    commands.add_parser("stages", help="list the pipeline stages").set_defaults(handler=_list_stages)
+    commands.add_parser("kpis", help="list the KPI names").set_defaults(handler=_list_kpis)
+    return parser
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if args.dimensions and args.kpi_backend == "sql":
+            parser.error("--dimensions needs the pandas KPI backend")
+        if args.since is not None and args.kpi_backend == "sql":
+            parser.error("--since needs the pandas KPI backend")
+        if (args.kpis or args.since) and "kpi" not in args.stages:
+            parser.error("--kpis and --since need the kpi stage")
+    return args
+
+
+def _run(args: argparse.Namespace) -> None:
+    from src.pipeline import RunOptions, run_pipeline
+
+    run_pipeline(RunOptions(
+        incremental=args.incremental,
+        chunk_size=args.chunk_size,
+        kpi_backend=args.kpi_backend,
+        kpi_pool=args.kpi_pool,
+        kpi_workers=args.kpi_workers,
+        dimensions=tuple(args.dimensions),
+        top_k=args.top_k,
+        use_cache=not args.no_cache,
+        trace_memory=args.trace_memory,
+        profile=args.profile,
+        csv_compression=args.csv_compression,
+        excel_mode=args.excel_mode,
+        stages=args.stages,
+        kpi_names=args.kpis,
+        since=args.since,
+    ))
+
+
+def _list_stages(args: argparse.Namespace) -> None:
+    for stage in STAGES:
+        print(f"{stage:<8} {STAGE_HELP[stage]}")
+
+
+def kpi_names() -> list[str]:
+    """Every KPI the pipeline can compute, in export order."""
+    from src.services.customer_reach import default_reach_kpis
+    from src.services.kpi_calculator import default_kpis
+    from src.services.order_value import default_order_value_kpis
+
+    kpis = [
+        *default_kpis(("item_name", "category_name")), *default_reach_kpis(), *default_order_value_kpis(),
+    ]
+    return [kpi.name for kpi in kpis]
+
+
+def _list_kpis(args: argparse.Namespace) -> None:
+    print("\n".join(kpi_names()))
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    handler: Callable[[argparse.Namespace], None] = args.handler
+    handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Option values shared by the command line and the services.
+
+Kept free of heavy imports, so the CLI parses its arguments (and prints
+``--help``) without loading pandas, SQLAlchemy or any service.
+"""
+# Pipeline stages, in the order they run.
+STAGES = ("load", "db", "kpi", "export")
+DIMENSIONS = ("location", "staff_id", "payment_method")
+KPI_BACKENDS = ("pandas", "sql")
+POOL_MODES = ("serial", "thread", "process")
+# Compression method -> file extension of the compressed CSVs; all are
+# in the standard library.
+CSV_COMPRESSIONS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+EXCEL_MODES = ("streaming", "openpyxl")
@@ -0,0 +1,142 @@
+"""Column dtypes for the raw CSV tables.
+
+Mirrors ``sql/schema/create_tables_sqlite.sql``: NOT NULL integer keys
+become compact ``int32`` (``Int32`` where the column is nullable),
+low-cardinality text becomes ``category`` and the order timestamp is
+parsed at read time with a fixed format instead of being inferred later.
+Prices are left to inference so integral prices keep integer KPI output.
+Integers are parsed as 64-bit and narrowed only when they fit, since
+pandas would wrap an out-of-range value (a quantity of 40000 would read
+as int16 -25536).
+
+Run ``python -m src.models.schema data/raw`` for a memory report.
+"""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    dtypes: dict[str, str]
+    parse_dates: tuple[str, ...] = ()
+    date_format: str = TIMESTAMP_FORMAT
+
+    def read_csv(self, path: Path, **kwargs) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        # Only columns present in the file are typed, so older extracts
+        # with fewer columns still load.
+        header = pd.read_csv(path, nrows=0).columns
+        typed = {
+            "dtype": {c: _parse_dtype(t) for c, t in self.dtypes.items() if c in header},
+            "parse_dates": [c for c in self.parse_dates if c in header] or False,
+            "date_format": self.date_format,
+        }
+        if kwargs.get("chunksize"):
+            return self._read_chunks(path, typed, **kwargs)
+        try:
+            return self._narrow(pd.read_csv(path, **typed, **kwargs))
+        except (ValueError, OverflowError):
+            # A missing key, text in a number column or an integer beyond
+            # int64: read untyped and leave coercion to validation, which
+            # quarantines such rows.
+            return pd.read_csv(path, **kwargs)
+
+    def _read_chunks(self, path: Path, typed: dict, **kwargs) -> Iterator[pd.DataFrame]:
+        rows = 0
+        try:
+            with pd.read_csv(path, **typed, **kwargs) as reader:
+                for chunk in reader:
+                    rows += len(chunk)
+                    yield self._narrow(chunk)
+        except (ValueError, OverflowError):
+            # As above, from the chunk that failed to parse on.
+            with pd.read_csv(path, skiprows=range(1, rows + 1), **kwargs) as reader:
+                yield from reader
+
+    def _narrow(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cast integer columns to their compact dtype where every value fits."""
+        for column, dtype in self.dtypes.items():
+            if column not in df.columns or _parse_dtype(dtype) == dtype:
+                continue
+            info = np.iinfo(dtype.lower())
+            values = df[column]
+            if values.isna().all() or info.min <= values.min() and values.max() <= info.max:
+                df[column] = values.astype(dtype)
+        return df
+
+
+def _parse_dtype(dtype: str) -> str:
+    """The dtype a column is parsed as: 64-bit for integers."""
+    if dtype.lower() in ("int8", "int16", "int32"):
+        return "Int64" if dtype[0] == "I" else "int64"
+    return dtype
+
+
+TABLE_SCHEMAS: dict[str, TableSchema] = {
+    "categories": TableSchema({"category_id": "int32", "category_name": "category"}),
+    "menu_items": TableSchema({
+        "menu_item_id": "int32",
+        "category_id": "int32",
+        "item_name": "category",
+    }),
+    "customers": TableSchema({"customer_id": "int32"}),
+    "staff": TableSchema({"staff_id": "int32", "role": "category"}),
+    "orders": TableSchema(
+        {
+            "order_id": "int32",
+            "customer_id": "Int32",
+            "staff_id": "Int32",
+            "order_status": "category",
+            "location": "category",
+        },
+        parse_dates=("order_timestamp",),
+    ),
+    "order_items": TableSchema({
+        "order_item_id": "int32",
+        "order_id": "int32",
+        "menu_item_id": "int32",
+        "quantity": "int16",
+    }),
+    "payments": TableSchema({
+        "payment_id": "int32",
+        "order_id": "int32",
+        "payment_method": "category",
+    }),
+}
+
+
+def read_table(path: Path, table: str, **kwargs) -> pd.DataFrame:
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return pd.read_csv(path, **kwargs)
+    return schema.read_csv(path, **kwargs)
+
+
+def memory_report(raw_dir: Path) -> pd.DataFrame:
+    """Deep memory use of each raw table read untyped vs. with its schema."""
+    rows = []
+    for table in TABLE_SCHEMAS:
+        path = raw_dir / f"{table}.csv"
+        if not path.exists():
+            continue
+        untyped = pd.read_csv(path).memory_usage(deep=True).sum()
+        typed = read_table(path, table).memory_usage(deep=True).sum()
+        rows.append({
+            "table": table,
+            "untyped_mb": round(untyped / 2**20, 2),
+            "typed_mb": round(typed / 2**20, 2),
+            "reduction": round(untyped / typed, 2) if typed else None,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(memory_report(Path(sys.argv[1] if len(sys.argv) > 1 else "data/raw")).to_string(index=False))
@@ -1,73 +1,85 @@
 """Main ETL pipeline.
 
-Reads raw CSVs, validates, transforms, computes all KPIs, exports
-results to data/warehouse/ as Excel/CSV, and loads into a SQLite database.
+Reads the raw CSVs, validates and transforms them, loads them into the
+database (SQLite by default), computes the KPIs and exports them to
+data/warehouse/ as CSV and Excel. The run is split into the ``load``,
+``db``, ``kpi`` and ``export`` stages; a stage run without the ones
+before it reads what they persisted under data/. :class:`RunOptions`
+holds the options, which :mod:`src.cli` and the README document.
 """
 from __future__ import annotations
 
+import itertools
+import shutil
+from dataclasses import dataclass, field
+from datetime import date
+from functools import cached_property
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-
-from src.config.db_config import get_database_url
-from src.services.data_loader import SqlAlchemyRepository
-from src.services.transformer import TimestampNormalizer, Deduplicator
-from src.services.validator import OrderValidator
-from src.services.kpi_calculator import (
-    DailyRevenueKPI,
-    WeeklyRevenueKPI,
-    MonthlyRevenueKPI,
-    AverageOrderValueKPI,
-    OrdersPerDayKPI,
-    RevenuePerHourKPI,
-    PeakHoursKPI,
-    WeekdayVsWeekendKPI,
-    TopMenuItemsKPI,
-    RevenueByCategoryKPI,
-)
-from src.views.export_excel import export_to_excel
+from src.config.options import DIMENSIONS, STAGES
+from src.services.instrumentation import Instrumentation, observe
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.services.customer_reach import ReachSketches
+    from src.services.data_loader import SqlAlchemyRepository
+    from src.services.heavy_hitters import TopItemSketches
+    from src.services.incremental import IncrementalState, Watermark
+    from src.services.kpi_calculator import DetailAggregates
+    from src.services.order_value import OrderValueSketches
+    from src.services.stage_cache import StageCache
+    from src.services.validator import ValidationEngine
+
+RAW = Path("data/raw")
+WAREHOUSE = Path("data/warehouse")
+STAGING = Path("data/staging")
+METRICS = Path("data/metrics")
+QUARANTINE = Path("data/quarantine")
 
 
 def _csv(base: Path, name: str) -> pd.DataFrame | None:
+    from src.models.schema import read_table
+
     path = base / name
     if path.exists():
-        return pd.read_csv(path)
+        return read_table(path, path.stem)
     return None
 
 
-def run_pipeline() -> None:
-    raw = Path("data/raw")
-    warehouse = Path("data/warehouse")
-    staging = Path("data/staging")
-    warehouse.mkdir(parents=True, exist_ok=True)
-    staging.mkdir(parents=True, exist_ok=True)
-
-    # ── 1. Load raw CSVs ─────────────────────────────────────────────
-    orders = _csv(raw, "orders.csv")
-    order_items = _csv(raw, "order_items.csv")
-    menu_items = _csv(raw, "menu_items.csv")
-    categories = _csv(raw, "categories.csv")
-    customers = _csv(raw, "customers.csv")
-    payments = _csv(raw, "payments.csv")
-    staff = _csv(raw, "staff.csv")
-
-    if orders is None or order_items is None:
-        print("ERROR: orders.csv and order_items.csv are required in data/raw/")
-        return
-
-    # ── 2. Validate ──────────────────────────────────────────────────
-    orders = OrderValidator().validate(orders)
-    order_items = Deduplicator(subset=("order_item_id",)).transform(order_items)
-
-    # ── 3. Transform ─────────────────────────────────────────────────
-    orders = TimestampNormalizer(["order_timestamp"]).transform(orders)
-
-    # ── 4. Build enriched detail table ───────────────────────────────
-    detail = order_items.merge(
-        orders[["order_id", "order_timestamp", "location"]],
-        on="order_id",
-        how="left",
-    )
+VERIFIED_VIEWS = (
+    "kpi_daily_revenue", "kpi_average_order_value", "kpi_revenue_by_category",
+    "kpi_revenue_per_hour", "kpi_top_menu_items", "kpi_weekday_vs_weekend",
+    "sales_trends_hourly", "sales_weekday_vs_weekend",
+)
+
+
+def _order_attributes(
+    orders: pd.DataFrame, payments: pd.DataFrame | None, dimensions: tuple[str, ...]
+) -> pd.DataFrame:
+    """Order columns carried into the detail table, plus requested dimensions."""
+    columns = ["order_id", "order_timestamp", "location"]
+    columns += [d for d in dimensions if d in orders.columns and d not in columns]
+    attributes = orders[columns]
+    if "payment_method" in dimensions and payments is not None:
+        # An order split across payments is attributed to its largest one.
+        primary = payments.sort_values("payment_amount", ascending=False, kind="stable")
+        attributes = attributes.merge(
+            primary.drop_duplicates("order_id")[["order_id", "payment_method"]],
+            on="order_id",
+            how="left",
+        )
+    return attributes
+
+
+def _build_detail(
+    order_items: pd.DataFrame,
+    orders: pd.DataFrame,
+    menu_items: pd.DataFrame | None,
+    categories: pd.DataFrame | None,
+) -> pd.DataFrame:
+    detail = order_items.merge(orders, on="order_id", how="left")
     detail["line_total"] = detail["quantity"] * detail["item_price"]
 
     if menu_items is not None:
@@ -82,94 +94,720 @@ def run_pipeline() -> None:
             on="category_id",
             how="left",
         )
+    return detail
+
+
+RAW_TABLES = ("orders", "order_items", "menu_items", "categories", "customers", "payments", "staff")
+
+
+def _ingest(raw: Path, stream_items: bool, validation: ValidationEngine) -> dict[str, pd.DataFrame | None]:
+    """Read, deduplicate and validate the raw tables (steps 1-3); rows
+    failing validation are quarantined."""
+    from src.services.transformer import Deduplicator
+
+    tables = {
+        name: None if name == "order_items" and stream_items else _csv(raw, f"{name}.csv")
+        for name in RAW_TABLES
+    }
+    if tables["order_items"] is not None:
+        tables["order_items"] = Deduplicator(subset=("order_item_id",)).transform(tables["order_items"])
+    tables = validation.validate_all(tables)
+    reports = validation.reports.values()
+    print(
+        f"[validate] {len(reports)} tables, {sum(r.quarantined for r in reports):,} rows quarantined "
+        f"in {sum(r.seconds for r in reports):.3f} s"
+    )
+    for report in reports:
+        if report.quarantined:
+            print(f"[validate] {report}")
+        for parsed in report.timestamps:
+            if parsed.failed or parsed.inferred:
+                print(f"[validate] {report.table}.{parsed}")
+    return tables
+
+
+def _delta_part(previous: Watermark | None) -> str | None:
+    """Name of the staged files of a load from ``previous``; ``None`` for a
+    full load, which replaces the whole dataset."""
+    return None if previous is None else f"delta-{previous.tag}"
+
+
+def _tables_dir(previous: Watermark | None) -> Path:
+    """Where a load from ``previous`` stages its ingested tables."""
+    return STAGING / "tables" / (_delta_part(previous) or "full")
+
+
+def _combine(
+    first: tuple[dict, pd.DataFrame | None], then: tuple[dict, pd.DataFrame | None]
+) -> tuple[dict, pd.DataFrame | None]:
+    """The rows of two loads, the later one's dimension tables winning."""
+    import pandas as pd
+
+    def chunks(data):
+        return [data] if isinstance(data, pd.DataFrame) else data
+
+    (first_tables, first_facts), (tables, facts) = first, then
+    tables = dict(tables)
+    for name in ("orders", "order_items", "payments"):
+        earlier, later = first_tables.get(name), tables.get(name)
+        if earlier is None or later is None:
+            tables[name] = later if earlier is None else earlier
+        elif isinstance(earlier, pd.DataFrame) and isinstance(later, pd.DataFrame):
+            tables[name] = pd.concat([earlier, later], ignore_index=True)
+        else:
+            tables[name] = itertools.chain(chunks(earlier), chunks(later))
+    known = [f for f in (first_facts, facts) if f is not None]
+    return tables, pd.concat(known, ignore_index=True) if len(known) > 1 else (known or [None])[0]
+
+
+def _report_late(table: str, rows: int) -> None:
+    if rows:
+        print(
+            f"[incremental] {rows:,} {table} rows for already-ingested orders skipped; "
+            "run without --incremental to include them"
+        )
+
+
+def _top_items(detail: pd.DataFrame) -> TopItemSketches:
+    from src.services.heavy_hitters import TopItemSketches
+
+    if "item_name" not in detail.columns:
+        return TopItemSketches()
+    return TopItemSketches.from_detail(detail)
+
+
+@dataclass
+class RunOptions:
+    """Options of one pipeline run; the defaults run every stage in full."""
+    incremental: bool = False
+    chunk_size: int | None = None
+    kpi_backend: str = "pandas"
+    kpi_pool: str = "thread"
+    kpi_workers: int | None = None
+    dimensions: tuple[str, ...] = ()
+    top_k: int | None = None
+    use_cache: bool = True
+    trace_memory: bool = False
+    profile: bool = False
+    csv_compression: str | None = None
+    excel_mode: str = "streaming"
+    stages: tuple[str, ...] = STAGES
+    kpi_names: tuple[str, ...] = ()
+    since: date | None = None
+
+    def __post_init__(self) -> None:
+        unknown = sorted(set(self.stages) - set(STAGES))
+        if unknown:
+            raise ValueError(f"Unknown stage(s) {unknown}; expected some of {STAGES}")
+        if self.since is not None and self.kpi_backend == "sql":
+            raise ValueError("since needs the pandas KPI backend")
+        self.stages = tuple(s for s in STAGES if s in self.stages)
+        self.dimensions = tuple(self.dimensions)
+        self.kpi_names = tuple(self.kpi_names)
+
+
+def run_pipeline(options: RunOptions | None = None) -> None:
+    options = options or RunOptions()
+    stages = options.stages
+    # A partial run reports under its own names and labels, so the runs
+    # of one schedule's stage tasks do not overwrite each other.
+    suffix = "" if stages == STAGES else "-" + "-".join(stages)
+    instrumentation = Instrumentation(
+        trace_memory=options.trace_memory,
+        profile_dir=METRICS / f"profiles{suffix}" if options.profile else None,
+        labels={"stages": ",".join(stages)} if suffix else {},
+    )
+    report = METRICS / f"run_report{suffix}.json"
+    with instrumentation.run(report, METRICS / f"pipeline{suffix}.prom"):
+        _Run(instrumentation, options).run(stages)
+    print(f"[metrics] Run report: {report}")
+
+
+@dataclass
+class _Loaded:
+    """What the load stage hands to the later stages of the same run.
+
+    ``tables`` hold the ingested rows: the delta of an incremental run,
+    with ``order_items`` as chunks when streaming. The aggregates and
+    sketches are merged with the stored state and cover every load.
+    """
+    tables: dict
+    order_facts: pd.DataFrame | None
+    aggregates: DetailAggregates
+    reach: ReachSketches
+    top_items: TopItemSketches
+    order_values: OrderValueSketches
+    detail: pd.DataFrame | None
+    customers: int | None
+    previous: Watermark | None
+    watermark: Watermark
+
+
+@dataclass
+class _Run:
+    """Options and intermediate results of one pipeline run."""
+    instrumentation: Instrumentation
+    options: RunOptions = field(default_factory=RunOptions)
+    loaded: _Loaded | None = field(default=None, init=False)
+    kpis: dict[str, pd.DataFrame] | None = field(default=None, init=False)
+    _repo: SqlAlchemyRepository | None = field(default=None, init=False, repr=False)
+
+    @cached_property
+    def cache(self) -> StageCache:
+        from src.services.stage_cache import StageCache
+
+        return StageCache(Path("data/cache"), enabled=self.options.use_cache)
+
+    @cached_property
+    def state(self) -> IncrementalState:
+        from src.services.incremental import IncrementalState
 
-    detail.to_csv(staging / "order_detail.csv", index=False)
-    print(f"[staging] {len(detail):,} order detail rows")
-
-    # ── 5. Compute KPIs ──────────────────────────────────────────────
-    kpis: dict[str, pd.DataFrame] = {}
-
-    kpis["daily_revenue"] = DailyRevenueKPI().calculate(detail)
-    kpis["weekly_revenue"] = WeeklyRevenueKPI().calculate(detail)
-    kpis["monthly_revenue"] = MonthlyRevenueKPI().calculate(detail)
-    kpis["average_order_value"] = AverageOrderValueKPI().calculate(detail)
-    kpis["orders_per_day"] = OrdersPerDayKPI().calculate(detail)
-    kpis["revenue_per_hour"] = RevenuePerHourKPI().calculate(detail)
-    kpis["peak_hours"] = PeakHoursKPI().calculate(detail)
-    kpis["weekday_vs_weekend"] = WeekdayVsWeekendKPI().calculate(detail)
-
-    if "item_name" in detail.columns:
-        kpis["top_menu_items"] = TopMenuItemsKPI().calculate(detail)
-    if "category_name" in detail.columns:
-        kpis["revenue_by_category"] = RevenueByCategoryKPI().calculate(detail)
-
-    # ── 6. Export to CSV + Excel ─────────────────────────────────────
-    for name, df in kpis.items():
-        df.to_csv(warehouse / f"{name}.csv", index=False)
-    export_to_excel(warehouse / "kpi_report.xlsx", kpis)
-
-    print(f"[warehouse] {len(kpis)} KPI tables exported")
-    for name, df in kpis.items():
-        print(f"  {name}: {len(df)} rows")
-
-    # ── 7. Load into database (SQLite by default) ────────────────────
-    db_url = get_database_url()
-    repo = SqlAlchemyRepository(db_url)
-
-    # Determine which SQL dialect to use
-    is_sqlite = "sqlite" in db_url
-    schema_dir = Path("sql/schema")
-    views_dir = Path("sql/views")
-
-    if is_sqlite:
-        schema_file = schema_dir / "create_tables_sqlite.sql"
-        view_files = sorted(views_dir.glob("*_sqlite.sql"))
-    else:
-        schema_file = schema_dir / "create_tables.sql"
-        view_files = [f for f in sorted(views_dir.glob("*.sql")) if "_sqlite" not in f.name]
-
-    # Create tables
-    if schema_file.exists():
-        repo.execute_sql(schema_file.read_text(encoding="utf-8"))
-        print(f"[db] Schema applied: {schema_file.name}")
-
-    # Load data into tables (order matters for FK constraints)
-    load_order = [
-        ("categories", categories),
-        ("menu_items", menu_items),
-        ("customers", customers),
-        ("staff", staff),
-        ("orders", orders),
-        ("order_items", order_items),
-        ("payments", payments),
-    ]
-    for table_name, df in load_order:
-        if df is not None and not df.empty:
-            repo.load_dataframe(table_name, df)
-            print(f"  [db] {table_name}: {len(df):,} rows loaded")
-
-    # Create views
-    for vf in view_files:
-        repo.execute_sql(vf.read_text(encoding="utf-8"))
-        print(f"  [db] View applied: {vf.name}")
-
-    # Verify views
-    print("\n[db] View verification:")
-    for view_name in [
-        "kpi_daily_revenue", "kpi_average_order_value", "kpi_revenue_by_category",
-        "kpi_revenue_per_hour", "kpi_top_menu_items", "kpi_weekday_vs_weekend",
-        "sales_trends_hourly", "sales_weekday_vs_weekend",
-    ]:
+        return IncrementalState(WAREHOUSE / "state")
+
+    @cached_property
+    def validation(self) -> ValidationEngine:
+        from src.services.validator import ValidationEngine
+
+        return ValidationEngine(quarantine_dir=QUARANTINE)
+
+    @cached_property
+    def db_url(self) -> str:
+        from src.config.db_config import get_database_url
+
+        return get_database_url()
+
+    @property
+    def repo(self) -> SqlAlchemyRepository:
+        if self._repo is None:
+            from src.services.data_loader import SqlAlchemyRepository
+
+            self._repo = SqlAlchemyRepository(self.db_url)
+        return self._repo
+
+    # ── Cache keys ───────────────────────────────────────────────────
+
+    @cached_property
+    def ingest_key(self) -> str:
+        from src.services.stage_cache import code_version
+
+        return self.cache.key(
+            code_version(), bool(self.options.chunk_size), files=sorted(RAW.glob("*.csv"))
+        )
+
+    @cached_property
+    def detail_key(self) -> str:
+        return self.cache.key(self.ingest_key, self.options.dimensions)
+
+    @cached_property
+    def database_key(self) -> str:
+        schema_file, summary_file, refresh_file, _ = self._sql_files()
+        return self.cache.key(
+            self.detail_key, self.db_url,
+            files=[f for f in (schema_file, summary_file, refresh_file) if f],
+        )
+
+    def _sql_files(self) -> tuple[Path, Path, Path | None, list[Path]]:
+        """Schema, summary, summary refresh and view files for the database's dialect."""
+        schema_dir = Path("sql/schema")
+        views_dir = Path("sql/views")
+        summary_dir = Path("sql/summary")
+        if "sqlite" in self.db_url:
+            # Summaries are kept current by triggers.
+            return (
+                schema_dir / "create_tables_sqlite.sql",
+                summary_dir / "summary_tables_sqlite.sql",
+                None,
+                sorted(views_dir.glob("*_sqlite.sql")),
+            )
+        return (
+            schema_dir / "create_tables.sql",
+            summary_dir / "summary_tables.sql",
+            summary_dir / "refresh_summary.sql",
+            [
+                f for f in sorted(views_dir.glob("*.sql"))
+                if not f.stem.endswith(("_sqlite", "_duckdb"))
+            ],
+        )
+
+    # ── Stages ───────────────────────────────────────────────────────
+
+    def run(self, stages: tuple[str, ...]) -> None:
+        WAREHOUSE.mkdir(parents=True, exist_ok=True)
+        STAGING.mkdir(parents=True, exist_ok=True)
+        if {"load", "db"} & set(stages) and not (
+            (RAW / "orders.csv").exists() and (RAW / "order_items.csv").exists()
+        ):
+            print("ERROR: orders.csv and order_items.csv are required in data/raw/")
+            return
+
+        if "load" in stages:
+            self.loaded = self._load()
+            if self.loaded is None:
+                print("[done] Nothing new to ingest")
+                return
+        elif "db" not in stages and self.state.load_previous_watermark() is not None:
+            # After an incremental load, like in the rest of its run.
+            self.cache.enabled = False
         try:
-            result = repo.fetch_dataframe(f"SELECT COUNT(*) AS cnt FROM {view_name}")
-            print(f"  {view_name}: {result['cnt'].iloc[0]} rows")
-        except Exception:
-            pass
+            if "db" in stages:
+                self._load_database()
+            if "kpi" in stages:
+                self._compute_kpis()
+        finally:
+            if self._repo is not None:
+                self._repo.close()
+        if "export" in stages:
+            self._export()
+        if self.loaded is not None:
+            self._save_state()
+        if "db" in stages:
+            print(f"\n[done] Database: {self.db_url}")
+        if "export" in stages:
+            print(f"[done] Excel: {WAREHOUSE / 'kpi_report.xlsx'}")
+        print("[done] Pipeline complete!")
+
+    def _ingest(self) -> dict[str, pd.DataFrame | None]:
+        """Load, validate and transform the raw CSVs (steps 1-3)."""
+        with self.instrumentation.stage("ingest") as span:
+            cached = self.cache.load("ingest", self.ingest_key)
+            if cached is not None:
+                tables = cached.frames
+                span.cached = True
+                print("[cache] ingest: reusing parsed raw tables")
+            else:
+                tables = _ingest(RAW, bool(self.options.chunk_size), self.validation)
+                self.cache.store("ingest", self.ingest_key, tables)
+            # Cached tables were validated when stored; their keys still
+            # check the streamed order_items.
+            for name, table in tables.items():
+                if table is not None:
+                    self.validation.reference(name, table)
+            span.rows_out = sum(len(t) for t in tables.values() if t is not None)
+        return tables
+
+    def _load(self) -> _Loaded | None:
+        """Ingest, then stage the detail table, aggregates and sketches
+        (steps 1-4); ``None`` when an incremental run finds nothing new."""
+        from src.services.customer_reach import ReachSketches
+        from src.services.heavy_hitters import TopItemSketches
+        from src.services.incremental import Watermark, max_key
+        from src.services.kpi_calculator import DetailAggregates
+        from src.services.order_facts import build_order_facts
+        from src.services.order_value import OrderValueSketches
+        from src.services.staging import remove_part, write_order_detail, write_order_facts, write_tables
+        from src.services.streaming import OrderItemChunks, StreamingAggregator
+
+        stage = self.instrumentation.stage
+        cache = self.cache
+        options = self.options
+        tables = self._ingest()
+        orders, order_items, menu_items, categories, customers, payments, _ = (
+            tables[name] for name in RAW_TABLES
+        )
+
+        watermark = self.state.load_watermark() if options.incremental else None
+        # Marks of every child row seen, so late rows are reported once.
+        keys = {
+            "order_item_id": max_key(order_items, "order_item_id"),
+            "payment_id": max_key(payments, "payment_id"),
+        }
+        if watermark is not None:
+            new_orders, new_items, new_payments = watermark.select_new(orders, order_items, payments)
+            print(f"[incremental] {len(new_orders):,} new orders beyond {watermark}")
+            for name, child in (("order_items", order_items), ("payments", payments)):
+                if child is not None:
+                    _report_late(name, int(watermark.late_rows(name, child, new_orders).sum()))
+            orders, order_items, payments = new_orders, new_items, new_payments
+            if orders.empty:
+                return None
+            # A delta changes the staged data, database and exports in place,
+            # so their entries no longer hold and later stages always run.
+            cache.invalidate("detail", "database", "views", "export")
+            cache.enabled = False
 
-    print(f"\n[done] Database: {db_url}")
-    print("[done] Excel: data/warehouse/kpi_report.xlsx")
-    print("[done] Pipeline complete!")
+        # The rest of what was ingested, one directory per load, for a
+        # database load in a later run; its order_items are read back from
+        # the staged detail.
+        if watermark is None and (STAGING / "tables").exists():
+            shutil.rmtree(STAGING / "tables")
+        write_tables(
+            {
+                name: table for name, table in
+                {**tables, "orders": orders, "payments": payments}.items()
+                if name != "order_items" and table is not None
+            },
+            _tables_dir(watermark),
+        )
+
+        # ── 4. Build enriched detail table ───────────────────────────
+        if options.chunk_size:
+            # Streaming: order_items is read in chunks here and when loading.
+            order_items = OrderItemChunks(
+                RAW / "order_items.csv", options.chunk_size,
+                order_ids=orders["order_id"] if watermark is not None else None,
+                validator=self.validation,
+                late_after=watermark.order_item_id if watermark is not None else None,
+            )
+        detail_path = STAGING / "order_detail"
+        facts_path = STAGING / "order_facts"
+        with stage("detail", rows_in=len(orders)) as span:
+            cached = cache.load("detail", self.detail_key, requires=[detail_path, facts_path])
+            if cached is not None:
+                detail = None
+                order_facts = cached.frames["order_facts"]
+                aggregates = DetailAggregates(hourly=cached.frames["hourly"], menu=cached.frames["menu"])
+                top_items = TopItemSketches.from_frames(
+                    cached.frames["top_items"], cached.frames["top_floors"], cached.meta["top_capacity"]
+                )
+                detail_rows = cached.meta["detail_rows"]
+                keys["order_item_id"] = cached.meta.get("order_item_id")
+                span.cached = True
+                print("[cache] detail: reusing staged detail and aggregates")
+            else:
+                cache.invalidate("detail")
+                # A delta's files are named after the mark it starts from, so
+                # a retry after a failed run replaces what that run staged.
+                part = _delta_part(watermark) or "part"
+                if watermark is not None:
+                    remove_part(detail_path, part)
+                    remove_part(facts_path, part)
+                order_attributes = _order_attributes(orders, payments, options.dimensions)
+                if not options.chunk_size:
+                    detail = _build_detail(order_items, order_attributes, menu_items, categories)
+                    write_order_detail(detail, detail_path, append=watermark is not None, part=part)
+                    order_facts = build_order_facts(detail, options.dimensions)
+                    aggregates = DetailAggregates.from_detail(detail, options.dimensions, orders=order_facts)
+                    top_items = _top_items(detail)
+                    detail_rows = len(detail)
+                else:
+                    # Streaming: each chunk is enriched, staged and aggregated in turn.
+                    detail = None
+                    aggregator = StreamingAggregator(options.dimensions)
+                    top_item_parts = []
+                    for i, chunk in enumerate(order_items):
+                        detail_chunk = _build_detail(chunk, order_attributes, menu_items, categories)
+                        write_order_detail(
+                            detail_chunk, detail_path,
+                            append=watermark is not None or i > 0, part=f"{part}-c{i}",
+                        )
+                        aggregator.add(detail_chunk)
+                        top_item_parts.append(_top_items(detail_chunk))
+                    top_items = TopItemSketches.merge(top_item_parts)
+                    report = self.validation.reports.get("order_items")
+                    if report is not None and report.quarantined:
+                        print(f"[validate] {report}")
+                    order_facts = aggregator.order_facts()
+                    aggregates = aggregator.result()
+                    detail_rows = aggregator.rows
+                    keys["order_item_id"] = order_items.max_key
+                    _report_late("order_items", order_items.late)
+                if order_facts is not None:
+                    write_order_facts(order_facts, facts_path, append=watermark is not None, part=part)
+                cache.store(
+                    "detail", self.detail_key,
+                    {
+                        "order_facts": order_facts, "hourly": aggregates.hourly, "menu": aggregates.menu,
+                        "top_items": top_items.items, "top_floors": top_items.floors,
+                    },
+                    {
+                        "detail_rows": detail_rows, "top_capacity": top_items.capacity,
+                        "order_item_id": keys["order_item_id"],
+                    },
+                )
+            span.rows_out = detail_rows
+        if detail is not None:
+            detail_mb = detail.memory_usage(deep=True).sum() / 2**20
+            print(f"[staging] {detail_rows:,} order detail rows ({detail_mb:,.1f} MB in memory)")
+        else:
+            print(f"[staging] {detail_rows:,} order detail rows")
+
+        # Distinct customers/orders and order-value percentiles come from
+        # merged daily sketches.
+        with stage("sketches", rows_in=len(orders)):
+            reach = ReachSketches.from_orders(orders)
+            order_values = OrderValueSketches()
+            if order_facts is not None:
+                order_values = OrderValueSketches.from_orders(order_facts)
+            if watermark is not None:
+                aggregates = DetailAggregates.merge([self.state.load_aggregates(), aggregates])
+                reach = ReachSketches.merge([self.state.load_reach(), reach])
+                top_items = TopItemSketches.merge([self.state.load_top_items(), top_items])
+                order_values = OrderValueSketches.merge([self.state.load_order_values(), order_values])
+
+        return _Loaded(
+            tables={**tables, "orders": orders, "order_items": order_items, "payments": payments},
+            order_facts=order_facts,
+            aggregates=aggregates,
+            reach=reach,
+            top_items=top_items,
+            order_values=order_values,
+            detail=detail if watermark is None else None,
+            customers=len(customers) if customers is not None else None,
+            previous=watermark,
+            watermark=(
+                watermark.advance(orders, **keys) if watermark else Watermark.from_orders(orders, **keys)
+            ),
+        )
+
+    def _staged(self, loads: list[tuple[Watermark | None, Watermark]]) -> tuple[dict, pd.DataFrame | None]:
+        """The rows ``loads`` (start and end marks) ingested, read back from staging."""
+        import pandas as pd
+
+        from src.services.staging import iter_order_detail, read_order_detail, read_order_facts, read_tables
+
+        starts = [start for start, _ in loads]
+        staged = [read_tables(_tables_dir(start)) for start in starts]
+        if not all(staged):
+            raise RuntimeError("Staged tables of a pending load are missing; run a full load")
+        tables = {name: staged[-1].get(name) for name in RAW_TABLES}
+        for name in ("orders", "payments"):
+            frames = [t[name] for t in staged if t.get(name) is not None]
+            tables[name] = pd.concat(frames, ignore_index=True) if frames else None
+        # Each load's staged files are named after where it started.
+        part = [_delta_part(start) or "part" for start in starts]
+        detail_path = STAGING / "order_detail"
+        item_columns = list(pd.read_csv(RAW / "order_items.csv", nrows=0).columns)
+        if self.options.chunk_size:
+            tables["order_items"] = iter_order_detail(
+                detail_path, item_columns, part=part, batch_size=self.options.chunk_size
+            )
+        else:
+            tables["order_items"] = read_order_detail(detail_path, item_columns, part=part)
+        order_facts = None
+        facts_path = STAGING / "order_facts"
+        if facts_path.exists():
+            order_facts = read_order_facts(facts_path, part=part)
+        return tables, order_facts
+
+    def _load_database(self) -> None:
+        """Load the ingested rows into the database, then apply and check
+        the views (step 5; SQLite by default).
+
+        Earlier loads the database missed, e.g. after a failed database
+        load, are loaded from staging first.
+        """
+        stage = self.instrumentation.stage
+        cache = self.cache
+        loaded = self.loaded
+        pending = self.state.load_pending()
+        if loaded is not None:
+            rows = loaded.tables, loaded.order_facts
+            watermark = loaded.watermark
+            if loaded.previous is not None and pending:
+                print(f"[db] {len(pending)} earlier load(s) not in the database yet, up to {pending[-1][1]}")
+                rows = _combine(self._staged(pending), rows)
+        else:
+            watermark = self.state.load_watermark()
+            if watermark is None:
+                raise RuntimeError("Nothing has been loaded yet; run the load stage first")
+            # Reloading the last load, when there is nothing pending, is a no-op upsert.
+            pending = pending or self.state.load_loads()[-1:]
+            if pending[0][0] is not None:
+                self.cache.enabled = False
+            rows = self._staged(pending)
+            print(f"[db] {len(pending)} load(s) up to {watermark}")
+        tables, order_facts = rows
+        schema_file, summary_file, refresh_file, view_files = self._sql_files()
+        repo = self.repo
+
+        with stage("database") as span:
+            database_file = (
+                [Path(self.db_url.split("///", 1)[1])] if self.db_url.startswith("sqlite:///") else []
+            )
+            if cache.load("database", self.database_key, requires=database_file) is not None:
+                span.cached = True
+                print("[cache] database: already loaded")
+            else:
+                # The views are reapplied over a freshly loaded database.
+                cache.invalidate("database", "views")
+                # Create tables
+                if schema_file.exists():
+                    repo.execute_sql(schema_file.read_text(encoding="utf-8"))
+                    print(f"[db] Schema applied: {schema_file.name}")
+                if summary_file.exists():
+                    repo.execute_sql(summary_file.read_text(encoding="utf-8"))
+                    print(f"[db] Summary tables applied: {summary_file.name}")
+
+                # Load data into tables (order matters for FK constraints)
+                load_order = [
+                    ("categories", tables["categories"]),
+                    ("menu_items", tables["menu_items"]),
+                    ("customers", tables["customers"]),
+                    ("staff", tables["staff"]),
+                    ("orders", tables["orders"]),
+                    ("order_items", tables["order_items"]),
+                    ("payments", tables["payments"]),
+                    # Items whose order is unknown have no timestamp and are not facts.
+                    ("order_facts", None if order_facts is None else order_facts.dropna(subset=["order_timestamp"])),
+                ]
+                span.rows_out = 0
+                for table_name, loaded in repo.bulk_load(load_order).items():
+                    print(f"  [db] {table_name}: {loaded.inserted:,} inserted, {loaded.updated:,} updated")
+                    span.rows_out += loaded.rows
+                if refresh_file is not None and refresh_file.exists():
+                    repo.execute_sql(refresh_file.read_text(encoding="utf-8"))
+                    print(f"  [db] Summaries refreshed: {refresh_file.name}")
+                cache.store("database", self.database_key)
+        self.state.save_database_watermark(watermark)
+
+        # Create views
+        with stage("views") as span:
+            views_key = cache.key(self.database_key, files=view_files)
+            if cache.load("views", views_key, requires=database_file) is not None:
+                span.cached = True
+                print("[cache] views: already applied")
+            else:
+                cache.invalidate("views")
+                for vf in view_files:
+                    repo.execute_sql(vf.read_text(encoding="utf-8"))
+                    print(f"  [db] View applied: {vf.name}")
+                cache.store("views", views_key)
+
+        # Verify views
+        print("\n[db] View verification:")
+        with stage("verify_views") as span:
+            span.rows_out = 0
+            for view_name in VERIFIED_VIEWS:
+                try:
+                    result = repo.fetch_dataframe(f"SELECT COUNT(*) AS cnt FROM {view_name}")
+                    print(f"  {view_name}: {result['cnt'].iloc[0]} rows")
+                    span.rows_out += int(result["cnt"].iloc[0])
+                except Exception:
+                    pass
+
+    def _kpi_inputs(self) -> tuple:
+        """Aggregates, sketches, detail and customer count the KPIs run on."""
+        from src.services.customer_reach import ReachSketches
+        from src.services.kpi_calculator import DetailAggregates
+        from src.services.kpi_pushdown import SqlAggregates
+        from src.services.order_value import OrderValueSketches
+        from src.services.staging import read_order_detail, read_order_facts
+
+        loaded = self.loaded
+        customers = loaded.customers if loaded else self.state.load_customer_count()
+        options = self.options
+        if options.since is not None:
+            # Recomputed from the staged detail over the window.
+            detail = read_order_detail(STAGING / "order_detail", start=options.since)
+            facts = read_order_facts(STAGING / "order_facts", start=options.since)
+            aggregates = DetailAggregates.from_detail(detail, options.dimensions, orders=facts)
+            reach = (loaded.reach if loaded else self.state.load_reach()).between(options.since)
+            print(f"\n[kpi] {len(facts):,} orders since {options.since}")
+            return (
+                aggregates, reach, _top_items(detail),
+                OrderValueSketches.from_orders(facts), detail, customers,
+            )
+        if loaded is not None:
+            aggregates, detail = loaded.aggregates, loaded.detail
+            reach, top_items, order_values = loaded.reach, loaded.top_items, loaded.order_values
+        else:
+            aggregates, detail = self.state.load_aggregates(), None
+            reach, top_items = self.state.load_reach(), self.state.load_top_items()
+            order_values = self.state.load_order_values()
+            if aggregates.hourly is None:
+                raise RuntimeError("No KPI state yet; run the load stage first")
+        if options.kpi_backend == "sql":
+            # Aggregated next to the data, over everything in the database.
+            aggregates = SqlAggregates(self.repo).load()
+            detail = None
+        return aggregates, reach, top_items, order_values, detail, customers
+
+    def _compute_kpis(self) -> None:
+        """Compute the KPIs and stage them for the export (step 6)."""
+        from src.services.customer_reach import default_reach_kpis
+        from src.services.kpi_calculator import default_kpis
+        from src.services.kpi_scheduler import KPIScheduler
+        from src.services.order_value import default_order_value_kpis
+        from src.services.staging import read_kpis, write_kpis
+
+        stage = self.instrumentation.stage
+        options = self.options
+        with stage("kpi_inputs"):
+            aggregates, reach, top_items, order_values, detail, customers = self._kpi_inputs()
+        with stage("kpis") as span:
+            kpi_key = self.cache.key(
+                self.database_key if options.kpi_backend == "sql" else self.detail_key,
+                options.kpi_backend, options.top_k, options.kpi_names, options.since,
+            )
+            cached = self.cache.load("kpis", kpi_key)
+            if cached is not None:
+                kpis = cached.frames
+                span.cached = True
+                print("\n[cache] kpis: reusing computed KPIs")
+            else:
+                kpi_columns = aggregates.menu.columns if aggregates.menu is not None else ()
+                table_kpis = default_kpis(kpi_columns, options.dimensions, options.top_k)
+                sketch_kpis = [
+                    *((kpi, reach) for kpi in default_reach_kpis(customers)),
+                    *((kpi, order_values) for kpi in default_order_value_kpis()),
+                ]
+                if options.kpi_names:
+                    available = [kpi.name for kpi in table_kpis] + [kpi.name for kpi, _ in sketch_kpis]
+                    unknown = sorted(set(options.kpi_names) - set(available))
+                    if unknown:
+                        raise ValueError(f"Unknown KPI(s) {unknown}; available: {available}")
+                    table_kpis = [kpi for kpi in table_kpis if kpi.name in options.kpi_names]
+                    sketch_kpis = [(kpi, s) for kpi, s in sketch_kpis if kpi.name in options.kpi_names]
+                scheduler = KPIScheduler(table_kpis, mode=options.kpi_pool, max_workers=options.kpi_workers)
+                kpis = scheduler.run(aggregates, detail)
+                print(f"\n[kpi] Computed with the {options.kpi_backend} backend ({options.kpi_pool} pool)")
+                for name, seconds in scheduler.timings.items():
+                    print(f"  {name}: {seconds * 1000:,.1f} ms")
+                for kpi, sketches in sketch_kpis:
+                    with observe("kpi", kpi.name) as kpi_span:
+                        kpis[kpi.name] = kpi.from_sketches(sketches)
+                        kpi_span.rows_out = len(kpis[kpi.name])
+                self.cache.store("kpis", kpi_key, kpis)
+            span.rows_out = sum(len(df) for df in kpis.values())
+        if options.kpi_names:
+            # Only the selected KPIs change; the rest stay as staged.
+            kpis = {**read_kpis(STAGING / "kpis"), **kpis}
+        write_kpis(kpis, STAGING / "kpis")
+        self.kpis = kpis
+
+    def _export(self) -> None:
+        """Export the KPI tables to CSV and Excel (step 7)."""
+        from src.services.stage_cache import code_version, frame_digest
+        from src.services.staging import read_kpis
+        from src.views.export_csv import csv_path, export_to_csv
+        from src.views.export_excel import export_to_excel
+
+        options = self.options
+        kpis = self.kpis if self.kpis is not None else read_kpis(STAGING / "kpis")
+        if not kpis:
+            raise RuntimeError("No KPI tables staged; run the kpi stage first")
+        with self.instrumentation.stage("export") as span:
+            report = WAREHOUSE / "kpi_report.xlsx"
+            exports = [csv_path(WAREHOUSE, name, options.csv_compression) for name in kpis] + [report]
+            export_key = self.cache.key(
+                code_version(), [(name, frame_digest(df)) for name, df in kpis.items()],
+                options.csv_compression, options.excel_mode,
+            )
+            if self.cache.load("export", export_key, requires=exports) is not None:
+                span.cached = True
+                print("[cache] export: outputs are current")
+            else:
+                self.cache.invalidate("export")
+                export_to_csv(WAREHOUSE, kpis, options.csv_compression)
+                export_to_excel(report, kpis, options.excel_mode)
+                self.cache.store("export", export_key)
+            span.rows_out = sum(len(df) for df in kpis.values())
+
+        print(f"[warehouse] {len(kpis)} KPI tables exported")
+        for name, df in kpis.items():
+            print(f"  {name}: {len(df)} rows")
+
+    def _save_state(self) -> None:
+        loaded = self.loaded
+        with self.instrumentation.stage("state"):
+            self.state.save(
+                loaded.watermark, loaded.aggregates, loaded.reach, loaded.top_items,
+                loaded.order_values, previous_watermark=loaded.previous, customers=loaded.customers,
+            )
+        print(f"\n[state] Watermark: {loaded.watermark}")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    from src.cli import main
+
+    main()
@@ -0,0 +1,300 @@
+"""Scaling benchmark for the pipeline stages and every KPI.
+
+Builds sample datasets with :func:`generate` (kept under the data
+directory, so each size is generated once) and runs the stages of
+:func:`src.pipeline.run_pipeline` one by one: load, deduplicate, validate,
+enrich, staging, order facts and aggregates, each KPI, CSV and Excel
+export, database load, views and each view query. Every stage records
+its wall time and, unless disabled, its peak traced memory above the
+memory held when it started.
+
+Results are written as JSON for comparison between commits::
+
+    python -m src.services.benchmark --orders 5000 500000
+    python -m src.services.benchmark --orders 5000 --compare data/bench/results/abc1234.json
+
+With ``--compare`` the run exits non-zero when a stage got slower (or
+needs more memory) than the baseline by more than ``--threshold``.
+Each size runs ``--repeat`` times and a stage's fastest time is kept,
+which filters out most machine noise.
+Memory tracing slows Python-heavy stages, so runs are only compared
+with baselines taken with the same setting.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, TypeVar
+
+import pandas as pd
+
+from src.pipeline import (
+    RAW_TABLES, VERIFIED_VIEWS, _build_detail, _csv, _order_attributes, _top_items,
+)
+from src.services.customer_reach import ReachSketches, default_reach_kpis
+from src.services.data_loader import SqlAlchemyRepository
+from src.services.kpi_calculator import DetailAggregates, compute_kpi, default_kpis
+from src.services.order_facts import build_order_facts
+from src.services.order_value import OrderValueSketches, default_order_value_kpis
+from src.services.sample_data_generator import generate
+from src.services.staging import write_order_detail, write_order_facts
+from src.services.transformer import Deduplicator
+from src.services.validator import ValidationEngine
+from src.views.export_csv import export_to_csv
+from src.views.export_excel import export_to_excel
+
+SIZES = (5_000, 500_000, 5_000_000)
+DEFAULT_THRESHOLD = 0.25
+# Smaller changes than these are within run-to-run noise.
+MIN_SECONDS = 0.05
+MIN_PEAK_MB = 1.0
+
+_ROOT = Path(__file__).resolve().parents[2]
+_SQL = _ROOT / "sql"
+T = TypeVar("T")
+
+
+def dataset(directory: Path, orders: int) -> Path:
+    """Raw CSVs for ``orders`` orders, generated on first use."""
+    raw = directory / f"orders-{orders}" / "raw"
+    marker = raw / ".complete"
+    if not marker.exists():
+        generate(raw, num_customers=max(200, orders // 25), num_orders=orders, seed=42)
+        marker.touch()
+    return raw
+
+
+def _optional(value, cast=float):
+    return None if pd.isna(value) else cast(value)
+
+
+@dataclass
+class StageResult:
+    orders: int
+    stage: str
+    seconds: float
+    peak_mb: float | None = None
+    rows: int | None = None
+
+
+@dataclass
+class Benchmark:
+    """Runs every stage for one dataset size, recording a :class:`StageResult` each.
+
+    Over ``repeat`` runs each stage keeps its fastest time and its
+    largest peak memory.
+    """
+    orders: int
+    data_dir: Path = Path("data/bench")
+    trace_memory: bool = True
+    repeat: int = 1
+    results: list[StageResult] = field(default_factory=list, init=False)
+
+    def measure(self, stage: str, func: Callable[..., T], *args, **kwargs) -> T:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak_mb = None
+        if self.trace_memory:
+            peak_mb = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+        rows = len(result) if isinstance(result, pd.DataFrame) else None
+        self.results.append(StageResult(self.orders, stage, round(seconds, 4), peak_mb, rows))
+        return result
+
+    def run(self) -> list[StageResult]:
+        raw = dataset(self.data_dir / "datasets", self.orders)
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            for _ in range(self.repeat):
+                with tempfile.TemporaryDirectory(prefix="bench-") as scratch:
+                    self._run(raw, Path(scratch))
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+        runs = pd.DataFrame([asdict(r) for r in self.results])
+        best = runs.groupby("stage", sort=False).agg(
+            orders=("orders", "first"), seconds=("seconds", "min"),
+            peak_mb=("peak_mb", "max"), rows=("rows", "first"),
+        )
+        self.results = [
+            StageResult(int(row.orders), stage, row.seconds, _optional(row.peak_mb), _optional(row.rows, int))
+            for stage, row in best.iterrows()
+        ]
+        return self.results
+
+    def _run(self, raw: Path, scratch: Path) -> None:
+        measure = self.measure
+        tables = measure("load", lambda: {n: _csv(raw, f"{n}.csv") for n in RAW_TABLES})
+        order_items = measure(
+            "deduplicate", Deduplicator(subset=("order_item_id",)).transform, tables["order_items"]
+        )
+        # Validation includes the timestamp parsing the transform stage did.
+        tables = measure("validate", ValidationEngine().validate_all, {**tables, "order_items": order_items})
+        orders, order_items = tables["orders"], tables["order_items"]
+
+        attributes = _order_attributes(orders, tables["payments"], ())
+        detail = measure(
+            "enrich", _build_detail, order_items, attributes, tables["menu_items"], tables["categories"]
+        )
+        measure("staging", write_order_detail, detail, scratch / "order_detail")
+        facts = measure("order_facts", build_order_facts, detail)
+        measure("staging_facts", write_order_facts, facts, scratch / "order_facts")
+        aggregates = measure("aggregates", DetailAggregates.from_detail, detail, orders=facts)
+        measure("calendar", lambda: aggregates.calendar)
+
+        kpis = {}
+        for kpi in default_kpis(aggregates.menu.columns):
+            kpis[kpi.name] = measure(f"kpi:{kpi.name}", compute_kpi, kpi, aggregates)
+        reach = measure("sketch:reach", ReachSketches.from_orders, orders)
+        order_values = measure("sketch:order_value", OrderValueSketches.from_orders, facts)
+        measure("sketch:top_items", _top_items, detail)
+        for kpi in default_reach_kpis(len(tables["customers"])):
+            kpis[kpi.name] = measure(f"kpi:{kpi.name}", kpi.from_sketches, reach)
+        for kpi in default_order_value_kpis():
+            kpis[kpi.name] = measure(f"kpi:{kpi.name}", kpi.from_sketches, order_values)
+
+        exports = scratch / "warehouse"
+        exports.mkdir()
+        measure("export_csv", export_to_csv, exports, kpis)
+        measure("export_excel", export_to_excel, exports / "kpi_report.xlsx", kpis)
+
+        repo = SqlAlchemyRepository(f"sqlite:///{scratch / 'bench.db'}")
+        try:
+            measure("db_schema", lambda: [
+                repo.execute_sql((_SQL / path).read_text(encoding="utf-8"))
+                for path in ("schema/create_tables_sqlite.sql", "summary/summary_tables_sqlite.sql")
+            ])
+            measure("db_load", repo.bulk_load, [
+                ("categories", tables["categories"]),
+                ("menu_items", tables["menu_items"]),
+                ("customers", tables["customers"]),
+                ("staff", tables["staff"]),
+                ("orders", orders),
+                ("order_items", order_items),
+                ("payments", tables["payments"]),
+                ("order_facts", facts.dropna(subset=["order_timestamp"])),
+            ])
+            measure("db_views", lambda: [
+                repo.execute_sql(path.read_text(encoding="utf-8"))
+                for path in sorted((_SQL / "views").glob("*_sqlite.sql"))
+            ])
+            for view in VERIFIED_VIEWS:
+                measure(f"view:{view}", repo.fetch_dataframe, f"SELECT * FROM {view}")
+        finally:
+            repo.close()
+
+
+# ── Results and regression check ─────────────────────────────────────
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(path: Path, results: list[StageResult], trace_memory: bool) -> dict:
+    payload = {
+        "commit": _commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "memory_traced": trace_memory,
+        "results": [asdict(r) for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return payload
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD
+) -> pd.DataFrame:
+    """Stages present in both runs, with their relative change and whether
+    it is a regression: slower, or needing more memory, by more than
+    ``threshold`` and by more than the noise floor."""
+    if baseline.get("memory_traced") != current.get("memory_traced"):
+        raise ValueError("Baseline and current runs differ in memory tracing; timings are not comparable")
+    keys = ["orders", "stage"]
+    merged = pd.DataFrame(baseline["results"]).merge(
+        pd.DataFrame(current["results"]), on=keys, suffixes=("_base", "_new")
+    )
+    for column in ("seconds_base", "seconds_new", "peak_mb_base", "peak_mb_new"):
+        merged[column] = merged[column].astype(float)
+    merged["time_change"] = (merged["seconds_new"] / merged["seconds_base"] - 1).round(3)
+    merged["memory_change"] = (merged["peak_mb_new"] / merged["peak_mb_base"] - 1).round(3)
+    slower = (merged["time_change"] > threshold) & (
+        merged["seconds_new"] - merged["seconds_base"] >= MIN_SECONDS
+    )
+    larger = (merged["memory_change"] > threshold) & (
+        merged["peak_mb_new"] - merged["peak_mb_base"] >= MIN_PEAK_MB
+    )
+    merged["regression"] = slower | larger
+    return merged[[
+        *keys, "seconds_base", "seconds_new", "time_change",
+        "peak_mb_base", "peak_mb_new", "memory_change", "regression",
+    ]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages and KPIs")
+    parser.add_argument(
+        "--orders", type=int, nargs="+", default=list(SIZES), metavar="N",
+        help="dataset sizes in orders (default: 5k, 500k and 5M)",
+    )
+    parser.add_argument(
+        "--data-dir", type=Path, default=Path("data/bench"),
+        help="where generated datasets and results are kept",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="results JSON path")
+    parser.add_argument("--compare", type=Path, default=None, metavar="BASELINE", help="results JSON to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="relative slowdown counted as a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, metavar="N",
+        help="runs per size; each stage keeps its fastest (default: 3)",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip memory tracing")
+    args = parser.parse_args()
+
+    results = []
+    for orders in args.orders:
+        print(f"[bench] {orders:,} orders")
+        stages = Benchmark(
+            orders, args.data_dir, trace_memory=not args.no_memory, repeat=args.repeat
+        ).run()
+        for r in stages:
+            memory = "" if r.peak_mb is None else f"  peak {r.peak_mb:,.1f} MB"
+            print(f"  {r.stage:<40} {r.seconds:>9.3f} s{memory}")
+        results += stages
+    output = args.output or args.data_dir / "results" / f"{_commit()}.json"
+    current = write_results(output, results, not args.no_memory)
+    print(f"\n[bench] Results: {output}")
+
+    if args.compare is not None:
+        report = compare(json.loads(args.compare.read_text(encoding="utf-8")), current, args.threshold)
+        print(report.to_string(index=False))
+        regressions = report[report["regression"]]
+        if len(regressions):
+            print(f"\n[bench] {len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n[bench] No regressions")
@@ -0,0 +1,209 @@
+"""Dialect-specific fast paths for loading empty tables.
+
+PostgreSQL streams each frame through ``COPY ... FROM STDIN`` from an
+in-memory CSV buffer. SQLite relaxes durability for the duration of the
+load, defers the indexes declared in ``sql/indexes.sql`` and the summary
+triggers of ``sql/summary/summary_tables_sqlite.sql``, and inserts
+everything in one transaction with ``executemany``; the summaries are then
+rebuilt in one pass instead of row by row.
+
+Both keep only the last row of each primary key, as the upsert does: rows
+repeated within a frame are dropped before the copy, and SQLite's
+``INSERT OR REPLACE`` lets a later chunk replace an earlier one. COPY has
+no such clause, so on PostgreSQL a key repeated across chunks still fails.
+"""
+from __future__ import annotations
+
+import io
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Protocol
+
+import pandas as pd
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+
+from src.services.sql_script import split_statements
+
+_INDEX_PATTERN = re.compile(
+    r"CREATE\s+INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\(",
+    re.IGNORECASE,
+)
+_TRIGGER_PATTERN = re.compile(
+    r"CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s.*?\bON\s+(\w+)",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_PATTERN = re.compile(
+    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+
+
+def prepare_frame(df: pd.DataFrame, dialect: str) -> pd.DataFrame:
+    """Object frame with ``None`` for nulls, ready for DBAPI parameters."""
+    out = df.copy()
+    for column in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[column]) and dialect == "sqlite":
+            # Same text layout pandas.to_sql uses for SQLite.
+            out[column] = out[column].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return out.astype(object).where(out.notna(), None)
+
+
+def last_per_key(df: pd.DataFrame, table: Table) -> pd.DataFrame:
+    """``df`` with only the last row of each of ``table``'s primary keys."""
+    keys = [c.name for c in table.primary_key.columns]
+    if not keys or not set(keys).issubset(df.columns):
+        return df
+    return df.drop_duplicates(subset=keys, keep="last")
+
+
+def iter_rows(df: pd.DataFrame, dialect: str) -> Iterator[tuple]:
+    """Row tuples of native Python values, converting column by column."""
+    columns = []
+    for name in df.columns:
+        column = df[name]
+        if pd.api.types.is_datetime64_any_dtype(column) and dialect == "sqlite":
+            column = column.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        if column.hasnans:
+            column = column.astype(object).where(column.notna(), None)
+        columns.append(column.tolist())
+    return zip(*columns)
+
+
+class BulkLoader(Protocol):
+    def session(self, conn: Connection, tables: list[str]) -> Iterator[None]:
+        ...
+
+    def copy(self, conn: Connection, table: Table, df: pd.DataFrame) -> int:
+        ...
+
+
+@contextmanager
+def _transaction(conn: Connection) -> Iterator[None]:
+    try:
+        yield
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@dataclass
+class PostgresCopyLoader:
+    chunk_rows: int = 100_000
+
+    @contextmanager
+    def session(self, conn: Connection, tables: list[str]) -> Iterator[None]:
+        with _transaction(conn):
+            yield
+
+    def copy(self, conn: Connection, table: Table, df: pd.DataFrame) -> int:
+        df = last_per_key(df, table)
+        columns = [c for c in df.columns if c in table.c]
+        statement = (
+            f"COPY {table.name} ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        cursor = conn.connection.cursor()
+        try:
+            for start in range(0, len(df), self.chunk_rows):
+                buffer = io.StringIO()
+                df[columns].iloc[start:start + self.chunk_rows].to_csv(
+                    buffer, index=False, header=False, na_rep="\\N",
+                )
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+        return len(df)
+
+
+@dataclass
+class SqliteFastLoader:
+    index_sql: Path | None = Path("sql/indexes.sql")
+    summary_sql: Path | None = Path("sql/summary/summary_tables_sqlite.sql")
+    chunk_rows: int = 100_000
+    relaxed_pragmas: dict[str, str | int] = field(
+        default_factory=lambda: {"synchronous": "OFF", "cache_size": -256000}
+    )
+
+    def _indexes(self, tables: list[str]) -> list[tuple[str, str]]:
+        if self.index_sql is None or not self.index_sql.exists():
+            return []
+        indexes = []
+        for statement in self.index_sql.read_text(encoding="utf-8").split(";"):
+            match = _INDEX_PATTERN.search(statement)
+            if match and match.group(2) in tables:
+                indexes.append((match.group(1), statement.strip()))
+        return indexes
+
+    def _summary_statements(self) -> list[str]:
+        if self.summary_sql is None or not self.summary_sql.exists():
+            return []
+        return split_statements(self.summary_sql.read_text(encoding="utf-8"))
+
+    @contextmanager
+    def session(self, conn: Connection, tables: list[str]) -> Iterator[None]:
+        # Durability pragmas cannot change inside a transaction, so they are
+        # set before the load starts and restored after it commits.
+        previous = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in self.relaxed_pragmas
+        }
+        for name, value in self.relaxed_pragmas.items():
+            conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        indexes = self._indexes(tables)
+        summary = self._summary_statements()
+        installed = set(
+            conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars()
+        )
+        triggers = [
+            match.group(1) for match in map(_TRIGGER_PATTERN.search, summary)
+            if match and match.group(1) in installed and match.group(2) in tables
+        ]
+        try:
+            with _transaction(conn):
+                for name, _ in indexes:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+                for name in triggers:
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+                yield
+        finally:
+            with _transaction(conn):
+                for _, statement in indexes:
+                    conn.exec_driver_sql(statement)
+                if triggers:
+                    # Emptied summaries are re-seeded by the script itself,
+                    # which also recreates the dropped triggers.
+                    for match in map(_TABLE_PATTERN.search, summary):
+                        if match:
+                            conn.exec_driver_sql(f"DELETE FROM {match.group(1)}")
+                    for statement in summary:
+                        conn.exec_driver_sql(statement)
+            for name, value in previous.items():
+                conn.exec_driver_sql(f"PRAGMA {name}={value}")
+
+    def copy(self, conn: Connection, table: Table, df: pd.DataFrame) -> int:
+        df = last_per_key(df, table)
+        columns = [c for c in df.columns if c in table.c]
+        statement = (
+            f"INSERT OR REPLACE INTO {table.name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        cursor = conn.connection.cursor()
+        try:
+            for start in range(0, len(df), self.chunk_rows):
+                chunk = df[columns].iloc[start:start + self.chunk_rows]
+                cursor.executemany(statement, iter_rows(chunk, "sqlite"))
+        finally:
+            cursor.close()
+        return len(df)
+
+
+def bulk_loader_for(dialect: str) -> BulkLoader | None:
+    if dialect == "postgresql":
+        return PostgresCopyLoader()
+    if dialect == "sqlite":
+        return SqliteFastLoader()
+    return None
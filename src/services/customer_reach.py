@@ -0,0 +1,226 @@
+"""Customer-reach KPIs over mergeable daily sketches.
+
+:class:`ReachSketches` keeps one HyperLogLog sketch of customer ids and
+one of order ids per (day, location). Distinct counts for any window
+(week, month, location, custom date range) come from merging the daily
+sketches instead of re-reading the order history; see
+:mod:`src.services.sketches` for the error bound. The pipeline persists
+the sketches with the incremental state, so later runs only sketch their
+new orders.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.services.sketches import DEFAULT_PRECISION, HyperLogLog, estimate, register_updates
+
+SKETCH_IDS = {"customers": "customer_id", "orders": "order_id"}
+REACH_PERIODS = {
+    "day": ["order_date"],
+    "week": ["year", "week"],
+    "month": ["year_month"],
+    "total": [],
+}
+_KEYS = ["sales_date", "location"]
+
+
+def with_periods(frame: pd.DataFrame) -> pd.DataFrame:
+    """``frame`` plus the period columns of :data:`REACH_PERIODS`, from ``sales_date``.
+
+    Weeks are ISO weeks, keyed by their ISO year: 2024-12-30 is in week 1
+    of 2025, not of 2024.
+    """
+    dates = frame["sales_date"]
+    iso = dates.dt.isocalendar()
+    return frame.assign(
+        order_date=dates.dt.date,
+        year=iso.year.astype(int),
+        week=iso.week.astype(int),
+        year_month=dates.dt.to_period("M").astype(str),
+    )
+
+
+def _group_max(
+    keys: pd.DataFrame, by: list[str], registers: dict[str, np.ndarray]
+) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+    """Union the sketches of each group of ``keys`` rows."""
+    if by:
+        codes = keys.groupby(by, dropna=False, sort=True).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(keys), dtype=np.int64)
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    grouped = keys.iloc[order[starts]][by].reset_index(drop=True)
+    return grouped, {
+        metric: np.maximum.reduceat(values[order], starts, axis=0)
+        for metric, values in registers.items()
+    }
+
+
+@dataclass
+class ReachSketches:
+    """Daily customer and order sketches, keyed by ``sales_date`` and ``location``.
+
+    ``registers`` maps each metric (``customers``, ``orders``) to an array
+    with one row of HyperLogLog registers per ``keys`` row. A metric is
+    absent when its id column was missing from the orders.
+    """
+    keys: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=_KEYS))
+    registers: dict[str, np.ndarray] = field(default_factory=dict)
+    precision: int = DEFAULT_PRECISION
+
+    @classmethod
+    def from_orders(cls, orders: pd.DataFrame, precision: int = DEFAULT_PRECISION) -> ReachSketches:
+        timed = orders.loc[orders["order_timestamp"].notna()]
+        rows = pd.DataFrame({
+            "sales_date": timed["order_timestamp"].dt.normalize(),
+            "location": timed["location"].astype(object) if "location" in timed else None,
+        })
+        grouping = rows.groupby(_KEYS, dropna=False, sort=True)
+        codes = grouping.ngroup().to_numpy()
+        keys = grouping.size().reset_index()[_KEYS]
+        registers = {}
+        for metric, column in SKETCH_IDS.items():
+            if column not in timed.columns:
+                continue
+            ids = timed[column]
+            present = ids.notna().to_numpy()
+            index, rank = register_updates(ids[present].to_numpy(dtype=np.int64), precision)
+            values = np.zeros((len(keys), 2 ** precision), dtype=np.uint8)
+            np.maximum.at(values, (codes[present], index), rank)
+            registers[metric] = values
+        return cls(keys=keys, registers=registers, precision=precision)
+
+    @classmethod
+    def merge(cls, parts: Sequence[ReachSketches]) -> ReachSketches:
+        """Union sketches from several runs; matching days are combined."""
+        parts = [p for p in parts if len(p.keys)]
+        if not parts:
+            return cls()
+        if len({p.precision for p in parts}) > 1:
+            raise ValueError("cannot merge sketches of different precision")
+        metrics = [m for m in SKETCH_IDS if all(m in p.registers for p in parts)]
+        keys = pd.concat([p.keys for p in parts], ignore_index=True)
+        registers = {m: np.concatenate([p.registers[m] for p in parts]) for m in metrics}
+        keys, registers = _group_max(keys, _KEYS, registers)
+        return cls(keys=keys, registers=registers, precision=parts[0].precision)
+
+    def between(self, start: date | None = None, end: date | None = None) -> ReachSketches:
+        """The daily sketches of the inclusive date range."""
+        mask = np.ones(len(self.keys), dtype=bool)
+        if start is not None:
+            mask &= (self.keys["sales_date"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.keys["sales_date"] <= pd.Timestamp(end)).to_numpy()
+        return ReachSketches(
+            keys=self.keys.loc[mask].reset_index(drop=True),
+            registers={metric: values[mask] for metric, values in self.registers.items()},
+            precision=self.precision,
+        )
+
+    def window(
+        self,
+        metric: str,
+        start: date | None = None,
+        end: date | None = None,
+        location: str | None = None,
+    ) -> HyperLogLog:
+        """The merged sketch of ``metric`` over inclusive dates, optionally one location."""
+        if metric not in self.registers:
+            raise ValueError(f"No {metric} sketches; expected column: {SKETCH_IDS.get(metric, metric)}")
+        mask = np.ones(len(self.keys), dtype=bool)
+        if start is not None:
+            mask &= (self.keys["sales_date"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.keys["sales_date"] <= pd.Timestamp(end)).to_numpy()
+        if location is not None:
+            mask &= (self.keys["location"] == location).to_numpy()
+        merged = self.registers[metric][mask].max(axis=0, initial=0)
+        return HyperLogLog(self.precision, merged.astype(np.uint8))
+
+    def distinct(
+        self, start: date | None = None, end: date | None = None, location: str | None = None
+    ) -> dict[str, float]:
+        """Estimated distinct customers and orders for a window."""
+        return {
+            metric: self.window(metric, start, end, location).count()
+            for metric in self.registers
+        }
+
+    def rollup(self, period: str, by_location: bool = False) -> pd.DataFrame:
+        """Estimated distinct counts per ``period`` (and per location)."""
+        if period not in REACH_PERIODS:
+            raise ValueError(f"period must be one of {tuple(REACH_PERIODS)}, got {period!r}")
+        calendar = with_periods(self.keys)
+        by = (["location"] if by_location else []) + REACH_PERIODS[period]
+        if calendar.empty:
+            return pd.DataFrame(columns=by + [f"unique_{m}" for m in self.registers])
+        grouped, registers = _group_max(calendar, by, self.registers)
+        for metric, values in registers.items():
+            grouped[f"unique_{metric}"] = np.rint(estimate(values)).astype("int64")
+        return grouped
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per key, with each metric's registers as bytes."""
+        frame = self.keys.copy()
+        for metric, values in self.registers.items():
+            frame[metric] = [row.tobytes() for row in values]
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> ReachSketches:
+        metrics = [m for m in SKETCH_IDS if m in frame.columns]
+        registers = {
+            m: np.stack([np.frombuffer(b, dtype=np.uint8) for b in frame[m]])
+            for m in metrics
+        } if len(frame) else {}
+        precision = (
+            int(np.log2(next(iter(registers.values())).shape[1])) if registers
+            else DEFAULT_PRECISION
+        )
+        keys = frame[_KEYS].assign(sales_date=pd.to_datetime(frame["sales_date"]))
+        return cls(keys=keys.reset_index(drop=True), registers=registers, precision=precision)
+
+
+# ── Reach KPIs ───────────────────────────────────────────────────────
+
+@dataclass
+class CustomerReachKPI:
+    """Distinct customers and orders per ``period`` (``day``, ``week``,
+    ``month`` or ``total``), optionally per location.
+
+    With ``customer_base`` (the size of ``customers.csv``) a
+    ``reach_rate`` column gives the share of known customers reached.
+    """
+    name: str = "customer_reach_daily"
+    period: str = "day"
+    by_location: bool = False
+    customer_base: int | None = None
+    precision: int = DEFAULT_PRECISION
+
+    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not {"order_timestamp", "customer_id"}.issubset(df.columns):
+            raise ValueError("Expected columns: order_timestamp, customer_id")
+        return self.from_sketches(ReachSketches.from_orders(df, self.precision))
+
+    def from_sketches(self, sketches: ReachSketches) -> pd.DataFrame:
+        reach = sketches.rollup(self.period, self.by_location)
+        if self.customer_base and "unique_customers" in reach.columns:
+            reach["reach_rate"] = (reach["unique_customers"] / self.customer_base).round(4)
+        return reach
+
+
+def default_reach_kpis(customer_base: int | None = None) -> list[CustomerReachKPI]:
+    return [
+        CustomerReachKPI("customer_reach_daily", "day", customer_base=customer_base),
+        CustomerReachKPI("customer_reach_weekly", "week", customer_base=customer_base),
+        CustomerReachKPI("customer_reach_monthly", "month", customer_base=customer_base),
+        CustomerReachKPI(
+            "customer_reach_by_location", "total", by_location=True, customer_base=customer_base
+        ),
+    ]
@@ -1,15 +1,59 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sqlite3
+from dataclasses import dataclass, field
 from typing import Protocol, Iterable
 
 import pandas as pd
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy import MetaData, Table, create_engine, event, func, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine, make_url
+
+from src.services.bulk_loader import bulk_loader_for, prepare_frame
+from src.services.instrumentation import observe
+from src.services.sql_script import split_statements
+
+# Maximum bound parameters per statement, used to size upsert batches.
+_PARAMETER_LIMITS = {
+    "sqlite": 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999,
+    "postgresql": 65535,
+}
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# loader, NORMAL sync is durable in WAL mode, and the cache/mmap sizes keep
+# the KPI views' joins in memory.
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative = KiB, i.e. ~64 MB
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
+# A table's rows: one frame, or an iterable of chunks streamed in order.
+TableData = pd.DataFrame | Iterable[pd.DataFrame] | None
+
+
+@dataclass(frozen=True)
+class UpsertResult:
+    """Rows written to a table: ``inserted`` were new, ``updated`` replaced
+    a row with the same key."""
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated
+
+    def __add__(self, other: UpsertResult) -> UpsertResult:
+        return UpsertResult(self.inserted + other.inserted, self.updated + other.updated)
 
 
 class DataRepository(Protocol):
-    def load_dataframe(self, table_name: str, df: pd.DataFrame) -> None:
+    def load_dataframe(self, table_name: str, df: pd.DataFrame) -> UpsertResult:
+        ...
+
+    def bulk_load(self, tables: Iterable[tuple[str, TableData]]) -> dict[str, UpsertResult]:
         ...
 
     def fetch_dataframe(self, query: str) -> pd.DataFrame:
@@ -21,36 +65,199 @@ class DataRepository(Protocol):
 
 @dataclass
 class SqlAlchemyRepository(DataRepository):
+    """Repository owning one lazily created, pooled engine.
+
+    Use as a context manager, or call :meth:`close`, to release pooled
+    connections. Every data method reports its time, and the rows it
+    loaded or fetched, through :func:`observe`.
+    """
     database_url: str
+    pool_size: int = 5
+    max_overflow: int = 10
+    sqlite_pragmas: dict[str, str | int] = field(
+        default_factory=lambda: dict(DEFAULT_SQLITE_PRAGMAS)
+    )
+    _engine_instance: Engine | None = field(default=None, init=False, repr=False)
 
     def _engine(self) -> Engine:
-        return create_engine(self.database_url, future=True)
+        if self._engine_instance is None:
+            self._engine_instance = self._create_engine()
+        return self._engine_instance
+
+    def _create_engine(self) -> Engine:
+        url = make_url(self.database_url)
+        in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+        kwargs = {} if in_memory else {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+        }
+        engine = create_engine(url, future=True, **kwargs)
+        if url.get_backend_name() == "sqlite" and self.sqlite_pragmas:
+            pragmas = dict(self.sqlite_pragmas)
+
+            @event.listens_for(engine, "connect")
+            def _apply_pragmas(dbapi_connection, _record) -> None:
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
+
+        return engine
+
+    def close(self) -> None:
+        if self._engine_instance is not None:
+            self._engine_instance.dispose()
+            self._engine_instance = None
+
+    def __enter__(self) -> SqlAlchemyRepository:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load_dataframe(self, table_name: str, df: pd.DataFrame) -> UpsertResult:
+        """Insert or update ``df`` keyed on the table's primary key.
 
-    def load_dataframe(self, table_name: str, df: pd.DataFrame) -> None:
+        Safe to re-run: rows whose key already exists are updated in place
+        instead of failing or being duplicated.
+        """
         if df.empty:
-            return
+            return UpsertResult()
+        with observe("db", "load_dataframe") as span, self._engine().begin() as conn:
+            table = Table(table_name, MetaData(), autoload_with=conn)
+            result = _upsert_all(conn, table, [df])
+            span.rows_out = result.rows
+        return result
+
+    def bulk_load(self, tables: Iterable[tuple[str, TableData]]) -> dict[str, UpsertResult]:
+        """Load several tables, in order, through the dialect's bulk path.
+
+        Empty target tables are filled with COPY (PostgreSQL) or the SQLite
+        fast-load mode; tables that already hold rows fall back to the
+        upsert so re-runs stay safe. A table may be given as an iterable of
+        chunks, which is consumed one chunk at a time.
+        """
+        with observe("db", "bulk_load") as span:
+            results = self._bulk_load(tables)
+            span.rows_out = sum(r.rows for r in results.values())
+        return results
+
+    def _bulk_load(self, tables: Iterable[tuple[str, TableData]]) -> dict[str, UpsertResult]:
+        sources = [(name, _chunks(data)) for name, data in tables if _has_rows(data)]
         engine = self._engine()
-        # SQLite has a variable limit; batch inserts in chunks of 500 rows.
-        chunk = 500 if "sqlite" in self.database_url else None
-        with engine.begin() as conn:
-            df.to_sql(
-                table_name, conn, if_exists="append", index=False,
-                method="multi", chunksize=chunk,
-            )
+        loader = bulk_loader_for(engine.dialect.name)
+        results: dict[str, UpsertResult] = {}
+        if loader is None:
+            for name, chunks in sources:
+                for chunk in chunks:
+                    results[name] = results.get(name, UpsertResult()) + self.load_dataframe(name, chunk)
+            return results
+
+        with engine.connect() as conn:
+            reflected = [(Table(name, MetaData(), autoload_with=conn), chunks) for name, chunks in sources]
+            fresh = {
+                table.name for table, _ in reflected
+                if conn.execute(select(1).select_from(table).limit(1)).first() is None
+            }
+            with loader.session(conn, sorted(fresh)):
+                for table, chunks in reflected:
+                    if table.name in fresh:
+                        # A key repeated across chunks is written twice but stored once.
+                        written = sum(loader.copy(conn, table, chunk) for chunk in chunks)
+                        inserted = _count(conn, table)
+                        results[table.name] = UpsertResult(inserted=inserted, updated=written - inserted)
+                    else:
+                        results[table.name] = _upsert_all(conn, table, chunks)
+        return results
 
     def fetch_dataframe(self, query: str) -> pd.DataFrame:
-        with self._engine().begin() as conn:
-            return pd.read_sql(text(query), conn)
+        with observe("db", "fetch_dataframe") as span, self._engine().begin() as conn:
+            result = pd.read_sql(text(query), conn)
+            span.rows_out = len(result)
+        return result
 
     def execute_sql(self, statement: str) -> None:
-        statements = [s.strip() for s in statement.split(";") if s.strip()]
-        with self._engine().begin() as conn:
-            for stmt in statements:
+        with observe("db", "execute_sql"), self._engine().begin() as conn:
+            for stmt in split_statements(statement):
                 conn.execute(text(stmt))
 
 
+def _has_rows(data: TableData) -> bool:
+    if data is None:
+        return False
+    return not isinstance(data, pd.DataFrame) or not data.empty
+
+
+def _chunks(data: TableData) -> Iterable[pd.DataFrame]:
+    return [data] if isinstance(data, pd.DataFrame) else data
+
+
+def _upsert_all(conn: Connection, table: Table, chunks: Iterable[pd.DataFrame]) -> UpsertResult:
+    """Upsert ``chunks`` into ``table``, telling inserted rows from updated.
+
+    SQLite cannot say which rows an upsert inserted, so its table is
+    counted once before and once after the load: the growth was inserted
+    and every other row written was an update.
+    """
+    before = _count(conn, table) if conn.dialect.name == "sqlite" else None
+    result = UpsertResult()
+    for chunk in chunks:
+        result += _upsert(conn, table, chunk)
+    if before is None:
+        return result
+    inserted = _count(conn, table) - before
+    return UpsertResult(inserted=inserted, updated=result.rows - inserted)
+
+
+def _count(conn: Connection, table: Table) -> int:
+    return conn.execute(select(func.count()).select_from(table)).scalar_one()
+
+
+def _upsert(conn: Connection, table: Table, df: pd.DataFrame) -> UpsertResult:
+    """Rows of ``df`` written by key; SQLite's all come back as ``updated``
+    (see :func:`_upsert_all`)."""
+    dialect = conn.dialect.name
+    columns = [c for c in df.columns if c in table.c]
+    keys = [c.name for c in table.primary_key.columns]
+    if not set(keys).issubset(columns):
+        keys = []
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        # No portable ON CONFLICT clause; fall back to a plain batched insert.
+        stmt, keys = table.insert(), []
+
+    if keys:
+        updates = {c: stmt.excluded[c] for c in columns if c not in keys}
+        if updates:
+            stmt = stmt.on_conflict_do_update(index_elements=keys, set_=updates)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+
+    if keys:
+        # One statement may not touch a row twice (PostgreSQL rejects it),
+        # so only the last row per key is written, as a row-by-row load would.
+        df = df.drop_duplicates(subset=keys, keep="last")
+    limit = _PARAMETER_LIMITS.get(dialect, 999)
+    batch_size = max(1, limit // max(len(columns), 1))
+    records = prepare_frame(df[columns], dialect).to_dict("records")
+    if keys and dialect == "postgresql":
+        # A freshly inserted row has no deleting transaction (xmax = 0); an
+        # updated one does. Rows skipped by DO NOTHING return nothing.
+        stmt = stmt.returning(literal_column("(xmax = 0)"))
+        result = UpsertResult()
+        for start in range(0, len(records), batch_size):
+            new = [row[0] for row in conn.execute(stmt, records[start:start + batch_size])]
+            result += UpsertResult(inserted=sum(new), updated=len(new) - sum(new))
+        return result
+    for start in range(0, len(records), batch_size):
+        conn.execute(stmt, records[start:start + batch_size])
+    return UpsertResult(updated=len(records)) if keys else UpsertResult(inserted=len(records))
+
+
 def load_csvs(repository: DataRepository, csv_table_map: Iterable[tuple[str, str]]) -> None:
     for csv_path, table_name in csv_table_map:
         df = pd.read_csv(csv_path)
         repository.load_dataframe(table_name, df)
-
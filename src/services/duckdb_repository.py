@@ -0,0 +1,163 @@
+"""In-process DuckDB backend over the staged Parquet order detail.
+
+:class:`DuckDBRepository` exposes ``data/staging/order_detail`` as the
+``order_detail`` view, read in place with vectorized, multi-threaded scans
+and year/month partition pruning, and the staged order-grain facts as
+``order_facts`` (derived from the detail when they were not staged). The
+KPI views of ``sql/views/kpi_views_duckdb.sql`` are defined on top of
+both. No server is involved, so notebooks get the KPI SQL without a
+database load.
+
+Loaded frames are upserted into native tables, each created once with
+its primary key, so an incremental load updates and adds rows rather
+than replacing what earlier loads wrote.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+import duckdb
+import pandas as pd
+
+from src.services.data_loader import DataRepository, TableData, UpsertResult
+from src.services.sql_script import split_statements
+from src.services.validator import TABLE_RULES
+
+
+def _default_keys() -> dict[str, tuple[str, ...]]:
+    return {
+        **{table: (rules.key,) for table, rules in TABLE_RULES.items()},
+        "order_facts": ("order_id",),
+    }
+
+
+@dataclass
+class DuckDBRepository(DataRepository):
+    """Repository querying the staged detail through one DuckDB connection.
+
+    ``threads`` caps DuckDB's worker threads (default: all cores).
+    ``database`` may name a file to persist loaded tables; staged Parquet is
+    always read in place. ``keys`` gives the primary key of each table a
+    load creates (a table already there keeps its own). Use as a context
+    manager, or call :meth:`close`.
+    """
+    staging_path: Path = Path("data/staging/order_detail")
+    facts_path: Path = Path("data/staging/order_facts")
+    views_sql: Path | None = Path("sql/views/kpi_views_duckdb.sql")
+    database: str = ":memory:"
+    threads: int | None = None
+    keys: dict[str, tuple[str, ...]] = field(default_factory=_default_keys)
+    _connection: duckdb.DuckDBPyConnection | None = field(default=None, init=False, repr=False)
+
+    def _connect(self) -> duckdb.DuckDBPyConnection:
+        if self._connection is None:
+            self._connection = duckdb.connect(self.database)
+            if self.threads is not None:
+                self._connection.execute(f"SET threads = {int(self.threads)}")
+            if any(self.staging_path.rglob("*.parquet")):
+                pattern = (self.staging_path / "**" / "*.parquet").as_posix()
+                self._connection.execute(
+                    "CREATE OR REPLACE VIEW order_detail AS "
+                    f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+                )
+                self._connection.execute(f"CREATE OR REPLACE VIEW order_facts AS {self._facts_source()}")
+                if self.views_sql is not None and self.views_sql.exists():
+                    self.execute_sql(self.views_sql.read_text(encoding="utf-8"))
+        return self._connection
+
+    def _facts_source(self) -> str:
+        if any(self.facts_path.rglob("*.parquet")):
+            pattern = (self.facts_path / "**" / "*.parquet").as_posix()
+            return f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+        return (
+            "SELECT order_id, MIN(order_timestamp) AS order_timestamp, "
+            "SUM(quantity) AS item_count, SUM(quantity * item_price) AS order_total "
+            "FROM order_detail GROUP BY order_id"
+        )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> DuckDBRepository:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load_dataframe(self, table_name: str, df: pd.DataFrame) -> UpsertResult:
+        """Insert or update ``df`` keyed on the table's primary key.
+
+        A missing table is created from ``df``'s columns, with its key
+        from ``keys``. A table without a key is appended to.
+        """
+        if df.empty:
+            return UpsertResult()
+        conn = self._connect()
+        keys = self._primary_key(conn, table_name, df)
+        if keys:
+            # One statement may not update a row twice; the last row wins.
+            df = df.drop_duplicates(subset=keys, keep="last")
+        count = f"SELECT COUNT(*) FROM {table_name}"
+        before = conn.execute(count).fetchone()[0]
+        table_columns = {row[0] for row in conn.execute(f"DESCRIBE {table_name}").fetchall()}
+        columns = [c for c in df.columns if c in table_columns]
+        statement = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM _incoming"
+        )
+        if keys:
+            updates = [f"{c} = excluded.{c}" for c in columns if c not in keys]
+            action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+            statement += f" ON CONFLICT ({', '.join(keys)}) {action}"
+        conn.register("_incoming", df)
+        try:
+            conn.execute(statement)
+        finally:
+            conn.unregister("_incoming")
+        inserted = conn.execute(count).fetchone()[0] - before
+        return UpsertResult(inserted=inserted, updated=len(df) - inserted)
+
+    def _primary_key(self, conn: duckdb.DuckDBPyConnection, table_name: str, df: pd.DataFrame) -> list[str]:
+        """Key columns of ``table_name``, creating the table if it is missing."""
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [table_name]
+        ).fetchone()[0]
+        if exists:
+            found = conn.execute(
+                "SELECT constraint_column_names FROM duckdb_constraints() "
+                "WHERE table_name = ? AND constraint_type = 'PRIMARY KEY'",
+                [table_name],
+            ).fetchone()
+            return list(found[0]) if found else []
+        keys = [c for c in self.keys.get(table_name, ()) if c in df.columns]
+        conn.register("_incoming", df)
+        try:
+            conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM _incoming LIMIT 0")
+        finally:
+            conn.unregister("_incoming")
+        if keys:
+            conn.execute(f"ALTER TABLE {table_name} ADD PRIMARY KEY ({', '.join(keys)})")
+        return keys
+
+    def bulk_load(self, tables: Iterable[tuple[str, TableData]]) -> dict[str, UpsertResult]:
+        """Load each table, one chunk at a time, through :meth:`load_dataframe`."""
+        results: dict[str, UpsertResult] = {}
+        for name, data in tables:
+            if data is None:
+                continue
+            for chunk in [data] if isinstance(data, pd.DataFrame) else data:
+                if not chunk.empty:
+                    results[name] = results.get(name, UpsertResult()) + self.load_dataframe(name, chunk)
+        return results
+
+    def fetch_dataframe(self, query: str) -> pd.DataFrame:
+        return self._connect().execute(query).df()
+
+    def execute_sql(self, statement: str) -> None:
+        conn = self._connect()
+        for stmt in split_statements(statement):
+            conn.execute(stmt)
@@ -0,0 +1,174 @@
+"""Mergeable heavy-hitter summaries for top menu items.
+
+:class:`TopItemSketches` keeps, per (day, location), the ``capacity``
+heaviest items by revenue with a lower and upper bound on each, plus a
+``floor``: an upper bound on the revenue of any item that was dropped.
+Summaries merge like Space-Saving counters. An item's lower bound is the
+sum of its known revenue; its upper bound also adds the floor of every
+summary it is missing from. Any window ("top items for this store this
+week") is answered from the summaries alone, and :meth:`top_exact`
+recounts the final candidates against the staged detail.
+
+The window's top K is guaranteed to be among the candidates whenever
+the merged floor is below the K-th lower bound (see :meth:`covers`); a
+larger ``capacity`` makes that hold for longer windows.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+_KEYS = ["sales_date", "location"]
+
+
+def _combine(
+    items: pd.DataFrame, floors: pd.DataFrame, by: list[str], capacity: int | None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Merge the summaries (``part``) within each ``by`` group."""
+    by = by or ["_all"]
+    if by == ["_all"]:
+        items, floors = items.assign(_all=0), floors.assign(_all=0)
+    floor_total = floors.groupby(by, dropna=False)["floor"].sum().rename("floor_total")
+    merged = (
+        items.merge(floors[[*by, "part", "floor"]], on=[*by, "part"], how="left")
+        .groupby([*by, "item_name"], dropna=False, observed=True)
+        .agg(lower=("lower", "sum"), upper=("upper", "sum"), floor_present=("floor", "sum"))
+        .reset_index()
+        .merge(floor_total.reset_index(), on=by, how="left")
+    )
+    merged["upper"] += merged["floor_total"] - merged["floor_present"]
+    merged = merged.sort_values([*by, "upper", "item_name"], ascending=[True] * len(by) + [False, True])
+    rank = merged.groupby(by, dropna=False, sort=False).cumcount()
+    kept = merged if capacity is None else merged[rank < capacity]
+    dropped_max = merged[rank >= (capacity or len(merged))].groupby(by, dropna=False)["upper"].max()
+    new_floors = floor_total.to_frame().join(dropped_max.rename("dropped"))
+    new_floors["floor"] = new_floors[["floor_total", "dropped"]].max(axis=1)
+    new_floors = new_floors[["floor"]].reset_index()
+    kept = kept[[*by, "item_name", "lower", "upper"]].reset_index(drop=True)
+    if by == ["_all"]:
+        kept, new_floors = kept.drop(columns="_all"), new_floors.drop(columns="_all")
+    return kept, new_floors
+
+
+@dataclass
+class TopItemSketches:
+    """Per day and location heavy-hitter summaries of item revenue."""
+    items: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=[*_KEYS, "item_name", "lower", "upper"])
+    )
+    floors: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=[*_KEYS, "floor"]))
+    capacity: int = 64
+
+    @classmethod
+    def from_detail(cls, detail: pd.DataFrame, capacity: int = 64) -> TopItemSketches:
+        timed = detail.loc[detail["order_timestamp"].notna()]
+        exact = (
+            pd.DataFrame({
+                "sales_date": timed["order_timestamp"].dt.normalize(),
+                "location": timed["location"].astype(object) if "location" in timed else None,
+                "item_name": timed["item_name"].astype(object),
+                "revenue": timed["line_total"],
+            })
+            .groupby([*_KEYS, "item_name"], dropna=False)["revenue"]
+            .sum()
+            .reset_index()
+        )
+        items = exact.assign(part=0, lower=exact["revenue"], upper=exact["revenue"])
+        floors = items[_KEYS].drop_duplicates().assign(part=0, floor=0.0)
+        items, floors = _combine(items, floors, _KEYS, capacity)
+        return cls(items=items, floors=floors, capacity=capacity)
+
+    @classmethod
+    def merge(cls, parts: list[TopItemSketches]) -> TopItemSketches:
+        """Merge summaries of disjoint rows, e.g. chunks or incremental runs."""
+        parts = [p for p in parts if len(p.floors)]
+        if not parts:
+            return cls()
+        capacity = min(p.capacity for p in parts)
+        items = pd.concat([p.items.assign(part=i) for i, p in enumerate(parts)], ignore_index=True)
+        floors = pd.concat([p.floors.assign(part=i) for i, p in enumerate(parts)], ignore_index=True)
+        items, floors = _combine(items, floors, _KEYS, capacity)
+        return cls(items=items, floors=floors, capacity=capacity)
+
+    def _window(
+        self, start: date | None, end: date | None, location: str | None
+    ) -> tuple[pd.DataFrame, float]:
+        def select(frame: pd.DataFrame) -> pd.DataFrame:
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= frame["sales_date"] >= pd.Timestamp(start)
+            if end is not None:
+                mask &= frame["sales_date"] <= pd.Timestamp(end)
+            if location is not None:
+                mask &= frame["location"] == location
+            return frame.loc[mask]
+
+        floors = select(self.floors)
+        part = floors[_KEYS].reset_index(drop=True).assign(part=np.arange(len(floors)))
+        items = select(self.items).merge(part, on=_KEYS)
+        merged, floor = _combine(items, floors.merge(part, on=_KEYS), [], None)
+        return merged, float(floor["floor"].sum()) if len(floor) else 0.0
+
+    def top(
+        self, k: int, start: date | None = None, end: date | None = None, location: str | None = None
+    ) -> pd.DataFrame:
+        """Top ``k`` items by estimated revenue, with revenue bounds."""
+        merged, _ = self._window(start, end, location)
+        ranked = merged.sort_values(["lower", "item_name"], ascending=[False, True]).head(k)
+        return ranked.rename(columns={"lower": "revenue_lower", "upper": "revenue_upper"}).reset_index(drop=True)
+
+    def candidates(
+        self, k: int, start: date | None = None, end: date | None = None, location: str | None = None
+    ) -> list:
+        """Every item whose upper bound reaches the ``k``-th lower bound."""
+        merged, _ = self._window(start, end, location)
+        if merged.empty:
+            return []
+        threshold = merged["lower"].nlargest(k).min()
+        return merged.loc[merged["upper"] >= threshold, "item_name"].tolist()
+
+    def covers(
+        self, k: int, start: date | None = None, end: date | None = None, location: str | None = None
+    ) -> bool:
+        """Whether no item outside the summaries can be in the window's top ``k``."""
+        merged, floor = self._window(start, end, location)
+        return len(merged) >= k and floor < merged["lower"].nlargest(k).min()
+
+    def top_exact(
+        self,
+        k: int,
+        detail: pd.DataFrame,
+        start: date | None = None,
+        end: date | None = None,
+        location: str | None = None,
+    ) -> pd.DataFrame:
+        """Exact top ``k`` for the window, recounted from ``detail``.
+
+        Only the candidate items are recounted, so ``detail`` may be read
+        with a filter on them (and on the window's months).
+        """
+        names = self.candidates(k, start, end, location)
+        day = detail["order_timestamp"].dt.normalize()
+        mask = detail["item_name"].isin(names)
+        if start is not None:
+            mask &= day >= pd.Timestamp(start)
+        if end is not None:
+            mask &= day <= pd.Timestamp(end)
+        if location is not None:
+            mask &= detail["location"] == location
+        recount = (
+            detail.loc[mask]
+            .groupby("item_name", as_index=False, observed=True)
+            .agg(total_quantity=("quantity", "sum"), total_revenue=("line_total", "sum"))
+        )
+        return recount.sort_values("total_revenue", ascending=False).head(k).reset_index(drop=True)
+
+    @classmethod
+    def from_frames(cls, items: pd.DataFrame, floors: pd.DataFrame, capacity: int = 64) -> TopItemSketches:
+        """Rebuild from stored ``items`` and ``floors`` frames."""
+        items = items.assign(sales_date=pd.to_datetime(items["sales_date"]))
+        floors = floors.assign(sales_date=pd.to_datetime(floors["sales_date"]))
+        return cls(items=items, floors=floors, capacity=capacity)
@@ -0,0 +1,294 @@
+"""Watermark-based incremental runs.
+
+A full run records the highest ``order_timestamp`` and ``order_id`` it
+ingested together with the mergeable KPI aggregates. Later runs only
+ingest orders beyond that high-water mark and merge their aggregates
+(and the customer-reach, top-item and order-value sketches) into the
+stored state, so their cost follows the size of the delta. The state
+also remembers where the last load started, which names the files it
+staged, so later stages run in another process can read back its delta.
+
+The highest ``order_item_id`` and ``payment_id`` are kept as well. A row
+beyond them whose order was already ingested arrived late: the order's
+aggregates are already merged, so such rows are counted and reported
+(a full run picks them up) rather than dropped unnoticed.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from src.services.customer_reach import ReachSketches
+from src.services.heavy_hitters import TopItemSketches
+from src.services.kpi_calculator import DetailAggregates
+from src.services.order_value import OrderValueSketches
+
+
+# Key of each child table, whose highest ingested value is kept with the
+# watermark to tell rows added to an order after it was ingested.
+CHILD_KEYS = {"order_items": "order_item_id", "payments": "payment_id"}
+
+
+@dataclass(frozen=True)
+class Watermark:
+    order_timestamp: pd.Timestamp
+    order_id: int
+    # ``None`` in state written before the child keys were kept.
+    order_item_id: int | None = None
+    payment_id: int | None = None
+
+    @classmethod
+    def from_orders(cls, orders: pd.DataFrame, **keys: int | None) -> Watermark:
+        """The marks of ``orders``; ``keys`` are the highest child keys seen."""
+        return cls(
+            order_timestamp=pd.Timestamp(orders["order_timestamp"].max()),
+            order_id=int(orders["order_id"].max()),
+            **keys,
+        )
+
+    def advance(self, orders: pd.DataFrame, **keys: int | None) -> Watermark:
+        latest = self if orders.empty else Watermark.from_orders(orders)
+        marks = {}
+        for key in CHILD_KEYS.values():
+            seen = [k for k in (getattr(self, key), keys.get(key)) if k is not None]
+            marks[key] = max(seen) if seen else None
+        return Watermark(
+            order_timestamp=max(self.order_timestamp, latest.order_timestamp),
+            order_id=max(self.order_id, latest.order_id),
+            **marks,
+        )
+
+    def new_orders_mask(self, orders: pd.DataFrame) -> pd.Series:
+        # Every ingested order sits at or below both marks, so an order
+        # beyond either one has not been seen yet.
+        return (orders["order_id"] > self.order_id) | (
+            orders["order_timestamp"] > self.order_timestamp
+        )
+
+    def select_new(
+        self, orders: pd.DataFrame, *children: pd.DataFrame | None
+    ) -> tuple[pd.DataFrame | None, ...]:
+        """Return new orders followed by each child table filtered to them."""
+        return _select(orders.loc[self.new_orders_mask(orders)], children)
+
+    def late_rows(self, table: str, child: pd.DataFrame, new_orders: pd.DataFrame) -> pd.Series:
+        """Mask of the ``table`` rows beyond its key mark that belong to an
+        order already ingested, rather than to one of ``new_orders``."""
+        key = CHILD_KEYS[table]
+        mark = getattr(self, key)
+        if mark is None:
+            return pd.Series(False, index=child.index)
+        return (child[key] > mark) & ~child["order_id"].isin(new_orders["order_id"])
+
+    @property
+    def tag(self) -> str:
+        """Names the state written at this mark and the delta staged by the
+        load that starts from it."""
+        return f"{self.order_id}-{self.order_timestamp:%Y%m%d%H%M%S}"
+
+    def __str__(self) -> str:
+        return f"order_id={self.order_id}, order_timestamp={self.order_timestamp}"
+
+
+def _select(
+    orders: pd.DataFrame, children: tuple[pd.DataFrame | None, ...]
+) -> tuple[pd.DataFrame | None, ...]:
+    ids = orders["order_id"]
+    selected: list[pd.DataFrame | None] = [orders]
+    for child in children:
+        selected.append(None if child is None else child.loc[child["order_id"].isin(ids)])
+    return tuple(selected)
+
+
+def max_key(df: pd.DataFrame | None, column: str) -> int | None:
+    """Highest value of ``column``, for the child key marks."""
+    if df is None or df.empty:
+        return None
+    return int(df[column].max())
+
+
+def _watermark(payload: dict) -> Watermark:
+    return Watermark(
+        order_timestamp=pd.Timestamp(payload["order_timestamp"]),
+        order_id=int(payload["order_id"]),
+        **{key: payload.get(key) for key in CHILD_KEYS.values()},
+    )
+
+
+def _payload(watermark: Watermark) -> dict:
+    payload = {
+        "order_timestamp": watermark.order_timestamp.isoformat(),
+        "order_id": watermark.order_id,
+    }
+    for key in CHILD_KEYS.values():
+        if getattr(watermark, key) is not None:
+            payload[key] = getattr(watermark, key)
+    return payload
+
+
+@dataclass
+class IncrementalState:
+    """Watermark and KPI aggregates persisted between pipeline runs.
+
+    Aggregates are written as snapshots named after the watermark, and
+    ``watermark.json`` is replaced last to point at them, so a run that
+    dies midway leaves the previous state intact and can simply be redone.
+
+    The state lists every load since the last full one, and
+    ``database.json`` the watermark the database was last loaded to, so a
+    database load that failed is made up by the next one.
+    """
+    directory: Path
+
+    @property
+    def _watermark_path(self) -> Path:
+        return self.directory / "watermark.json"
+
+    def _read(self) -> dict | None:
+        if not self._watermark_path.exists():
+            return None
+        return json.loads(self._watermark_path.read_text(encoding="utf-8"))
+
+    def load_watermark(self) -> Watermark | None:
+        payload = self._read()
+        if payload is None:
+            return None
+        return _watermark(payload)
+
+    def load_previous_watermark(self) -> Watermark | None:
+        """The watermark the last load started from; ``None`` after a full load."""
+        previous = (self._read() or {}).get("previous")
+        return None if previous is None else _watermark(previous)
+
+    def load_loads(self) -> list[tuple[Watermark | None, Watermark]]:
+        """Start and end marks of each load since the last full one (which
+        starts from ``None``), oldest first."""
+        payload = self._read()
+        if payload is None:
+            return []
+        if "loads" not in payload:
+            # State written before the loads were listed.
+            previous = payload.get("previous")
+            return [(None if previous is None else _watermark(previous), _watermark(payload))]
+        return [
+            (None if load["from"] is None else _watermark(load["from"]), _watermark(load["to"]))
+            for load in payload["loads"]
+        ]
+
+    def load_pending(self) -> list[tuple[Watermark | None, Watermark]]:
+        """The loads not in the database yet: those after the one it was
+        last loaded to, or all of them if that one is not listed."""
+        loads = self.load_loads()
+        ends = [end for _, end in loads]
+        database = self.load_database_watermark()
+        if database in ends:
+            return loads[ends.index(database) + 1:]
+        return loads
+
+    def load_database_watermark(self) -> Watermark | None:
+        path = self.directory / "database.json"
+        if not path.exists():
+            return None
+        return _watermark(json.loads(path.read_text(encoding="utf-8")))
+
+    def save_database_watermark(self, watermark: Watermark) -> None:
+        """Record that the database holds every load up to ``watermark``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / "database.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(_payload(watermark)), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load_customer_count(self) -> int | None:
+        """Size of the customer table at the last load, the base of reach rates."""
+        return (self._read() or {}).get("customers")
+
+    def load_aggregates(self) -> DetailAggregates:
+        payload = self._read() or {}
+        hourly = menu = None
+        if payload.get("hourly"):
+            hourly = pd.read_csv(self.directory / payload["hourly"], parse_dates=["hour_bucket"])
+        if payload.get("menu"):
+            menu = pd.read_csv(self.directory / payload["menu"])
+        return DetailAggregates(hourly=hourly, menu=menu)
+
+    def load_reach(self) -> ReachSketches:
+        payload = self._read() or {}
+        if not payload.get("reach"):
+            return ReachSketches()
+        return ReachSketches.from_frame(pd.read_parquet(self.directory / payload["reach"]))
+
+    def load_top_items(self) -> TopItemSketches:
+        payload = self._read() or {}
+        if not payload.get("top_items"):
+            return TopItemSketches()
+        return TopItemSketches.from_frames(
+            pd.read_parquet(self.directory / payload["top_items"]),
+            pd.read_parquet(self.directory / payload["top_floors"]),
+            capacity=payload["top_capacity"],
+        )
+
+    def load_order_values(self) -> OrderValueSketches:
+        payload = self._read() or {}
+        if not payload.get("order_values"):
+            return OrderValueSketches()
+        centroids = pd.read_parquet(self.directory / payload["order_values"])
+        return OrderValueSketches(
+            centroids.assign(sales_date=pd.to_datetime(centroids["sales_date"])),
+            compression=payload["order_value_compression"],
+        )
+
+    def save(
+        self,
+        watermark: Watermark,
+        aggregates: DetailAggregates,
+        reach: ReachSketches | None = None,
+        top_items: TopItemSketches | None = None,
+        order_values: OrderValueSketches | None = None,
+        previous_watermark: Watermark | None = None,
+        customers: int | None = None,
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        previous = self._read() or {}
+        payload: dict = {**_payload(watermark), "customers": customers}
+        loads = [] if previous_watermark is None else self.load_loads()
+        loads.append((previous_watermark, watermark))
+        payload["loads"] = [
+            {"from": None if start is None else _payload(start), "to": _payload(end)} for start, end in loads
+        ]
+        if previous_watermark is not None:
+            payload["previous"] = _payload(previous_watermark)
+        tag = watermark.tag
+        for name, frame in (("hourly", aggregates.hourly), ("menu", aggregates.menu)):
+            if frame is not None:
+                payload[name] = f"{name}-{tag}.csv"
+                frame.to_csv(self.directory / payload[name], index=False)
+        if reach is not None:
+            payload["reach"] = f"reach-{tag}.parquet"
+            reach.to_frame().to_parquet(
+                self.directory / payload["reach"], index=False, compression="zstd"
+            )
+        if top_items is not None:
+            payload["top_capacity"] = top_items.capacity
+            for name, frame in (("top_items", top_items.items), ("top_floors", top_items.floors)):
+                payload[name] = f"{name.replace('_', '-')}-{tag}.parquet"
+                frame.to_parquet(self.directory / payload[name], index=False, compression="zstd")
+        if order_values is not None:
+            payload["order_value_compression"] = order_values.compression
+            payload["order_values"] = f"order-values-{tag}.parquet"
+            order_values.centroids.to_parquet(
+                self.directory / payload["order_values"], index=False, compression="zstd"
+            )
+
+        tmp = self._watermark_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, self._watermark_path)
+
+        for name in ("hourly", "menu", "reach", "top_items", "top_floors", "order_values"):
+            stale = previous.get(name)
+            if stale and stale != payload.get(name):
+                (self.directory / stale).unlink(missing_ok=True)
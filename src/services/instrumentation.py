@@ -0,0 +1,285 @@
+"""Per-stage instrumentation of pipeline runs.
+
+:class:`Instrumentation` times each pipeline stage as a :class:`Span`
+with its rows in and out and the process's peak resident memory; with
+``trace_memory`` it also records how much traced (tracemalloc) memory the
+stage kept and needed at its peak. While a run is active, library code
+reports finer-grained operations through :func:`observe`: every KPI run
+by :func:`~src.services.kpi_calculator.compute_kpi` and every
+:class:`~src.services.data_loader.SqlAlchemyRepository` call, with the
+rows it produced or loaded. Outside a run :func:`observe` only times.
+
+A finished run is written as a JSON report and as a Prometheus textfile
+for node_exporter's textfile collector; ``labels`` are added to every
+metric, e.g. to tell apart runs of different pipeline stages. With
+``profile_dir`` each stage is also run under cProfile and dumped to
+``<stage>.prof``.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_PREFIX = "restaurant_etl"
+
+
+def peak_rss_mb() -> float | None:
+    """High-water resident memory of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 2)
+
+
+@dataclass
+class Span:
+    """One timed stage (``kind="stage"``) or operation within a stage."""
+    kind: str
+    name: str
+    stage: str | None = None
+    seconds: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    cached: bool = False
+    peak_rss_mb: float | None = None
+    rss_growth_mb: float | None = None
+    traced_delta_mb: float | None = None
+    traced_peak_mb: float | None = None
+
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.rows_out is None or self.seconds <= 0:
+            return None
+        return self.rows_out / self.seconds
+
+    def to_dict(self) -> dict:
+        rate = self.rows_per_second
+        return {
+            **asdict(self),
+            "seconds": round(self.seconds, 4),
+            "rows_per_second": None if rate is None else round(rate, 1),
+        }
+
+
+# The run that :func:`observe` reports to; module-wide so that KPIs run
+# on worker threads report too.
+_active: Instrumentation | None = None
+
+
+@contextmanager
+def observe(kind: str, name: str) -> Iterator[Span]:
+    """Time the enclosed operation; the caller may set rows on the span."""
+    instrumentation = _active
+    span = Span(kind, name, stage=instrumentation.current_stage if instrumentation else None)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span.seconds = time.perf_counter() - start
+        if instrumentation is not None:
+            instrumentation.add(span)
+
+
+def record(kind: str, name: str, seconds: float, rows_out: int | None = None) -> None:
+    """Report an operation timed elsewhere, e.g. in a worker process."""
+    if _active is not None:
+        _active.add(Span(kind, name, _active.current_stage, seconds, rows_out=rows_out))
+
+
+@dataclass
+class Instrumentation:
+    """Spans of one pipeline run; see :meth:`run` and :meth:`stage`."""
+    trace_memory: bool = False
+    profile_dir: Path | None = None
+    labels: dict[str, str] = field(default_factory=dict)
+    spans: list[Span] = field(default_factory=list, init=False)
+    current_stage: str | None = field(default=None, init=False)
+    started: datetime | None = field(default=None, init=False)
+    seconds: float = field(default=0.0, init=False)
+    error: str | None = field(default=None, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def run(self, report: Path | None = None, metrics: Path | None = None) -> Iterator[Instrumentation]:
+        """Activate :func:`observe` for the enclosed run, then write the
+        JSON ``report`` and Prometheus ``metrics`` files, even if it fails."""
+        global _active
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        previous, _active = _active, self
+        self.started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            yield self
+        except BaseException as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.seconds = time.perf_counter() - start
+            _active = previous
+            if tracing:
+                tracemalloc.stop()
+            if report is not None:
+                _replace_text(report, json.dumps(self.report(), indent=2))
+            if metrics is not None:
+                _replace_text(metrics, self.prometheus_text())
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[Span]:
+        """Time one pipeline stage; stages do not nest."""
+        if self.current_stage is not None:
+            raise RuntimeError(f"Stage {name!r} started inside stage {self.current_stage!r}")
+        span = Span("stage", name, rows_in=rows_in)
+        rss_before = peak_rss_mb()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile_dir is not None else None
+        self.current_stage = name
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            span.seconds = time.perf_counter() - start
+            self.current_stage = None
+            span.peak_rss_mb = peak_rss_mb()
+            if rss_before is not None:
+                span.rss_growth_mb = round(span.peak_rss_mb - rss_before, 2)
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                span.traced_delta_mb = round((current - traced_before) / 2**20, 2)
+                span.traced_peak_mb = round((peak - traced_before) / 2**20, 2)
+            if profiler is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(self.profile_dir / f"{name}.prof")
+            self.add(span)
+
+    # ── Exports ──────────────────────────────────────────────────────
+
+    def report(self) -> dict:
+        return {
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "seconds": round(self.seconds, 4),
+            "status": "failed" if self.error else "ok",
+            "error": self.error,
+            "peak_rss_mb": peak_rss_mb(),
+            "memory_traced": self.trace_memory,
+            "labels": self.labels,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def prometheus_text(self) -> str:
+        """Gauges in the Prometheus text exposition format.
+
+        Repeated operations (e.g. one ``execute_sql`` per view) are summed
+        per kind and name, with their call count.
+        """
+        stages = _totals(s for s in self.spans if s.kind == "stage")
+        operations = _totals(s for s in self.spans if s.kind != "stage")
+        finished = (self.started.timestamp() + self.seconds) if self.started else None
+        rss = peak_rss_mb()
+        lines: list[str] = []
+
+        def gauge(name: str, help_text: str, samples: list[tuple[dict, float | None]]) -> None:
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}_{name}{_labels({**self.labels, **labels})} {float(value)!r}")
+
+        gauge("run_seconds", "Wall time of the last pipeline run.", [({}, self.seconds)])
+        gauge("run_success", "Whether the last pipeline run completed.", [({}, float(self.error is None))])
+        gauge("run_finished_timestamp_seconds", "When the last pipeline run finished.", [({}, finished)])
+        gauge("peak_rss_bytes", "Peak resident memory of the last pipeline run.",
+              [({}, None if rss is None else rss * 2**20)])
+
+        def stage_samples(attr: str, scale: float = 1) -> list[tuple[dict, float | None]]:
+            values = ((s.name, getattr(s, attr)) for s in stages)
+            return [({"stage": name}, None if v is None else v * scale) for name, v in values]
+
+        gauge("stage_seconds", "Wall time of each pipeline stage.", stage_samples("seconds"))
+        gauge("stage_rows_in", "Rows entering each pipeline stage.", stage_samples("rows_in"))
+        gauge("stage_rows_out", "Rows produced by each pipeline stage.", stage_samples("rows_out"))
+        gauge("stage_cached", "Whether each stage was reused from the stage cache.", stage_samples("cached"))
+        gauge("stage_peak_rss_bytes", "Peak resident memory at the end of each stage.",
+              stage_samples("peak_rss_mb", 2**20))
+        gauge("stage_traced_peak_bytes", "Peak traced memory allocated within each stage.",
+              stage_samples("traced_peak_mb", 2**20))
+        labelled = [({"kind": s.kind, "name": s.name}, s) for s in operations]
+        gauge("operation_seconds", "Total wall time of each KPI and database operation.",
+              [(labels, s.seconds) for labels, s in labelled])
+        gauge("operation_calls", "Calls of each KPI and database operation.",
+              [(labels, s.calls) for labels, s in labelled])
+        gauge("operation_rows", "Rows produced or loaded by each operation.",
+              [(labels, s.rows_out) for labels, s in labelled])
+        gauge("db_rows_per_second", "Rows per second of each database operation.",
+              [({"name": s.name}, s.rows_per_second) for s in operations if s.kind == "db"])
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class _Total(Span):
+    calls: int = 0
+
+
+def _totals(spans) -> list[_Total]:
+    totals: dict[tuple[str, str], _Total] = {}
+    for span in spans:
+        total = totals.setdefault((span.kind, span.name), _Total(span.kind, span.name))
+        total.calls += 1
+        total.seconds += span.seconds
+        total.cached = span.cached
+        for attr in ("rows_in", "rows_out"):
+            if getattr(span, attr) is not None:
+                setattr(total, attr, (getattr(total, attr) or 0) + getattr(span, attr))
+        for attr in ("peak_rss_mb", "traced_peak_mb"):
+            if getattr(span, attr) is not None:
+                setattr(total, attr, max(getattr(total, attr) or 0, getattr(span, attr)))
+    return list(totals.values())
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _replace_text(path: Path, text: str) -> None:
+    # Written aside and moved into place, so readers (and the textfile
+    # collector) never see a partial file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
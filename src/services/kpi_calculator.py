@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Iterable, Protocol, Sequence
 
+import numpy as np
 import pandas as pd
 
+from src.services.instrumentation import observe
+from src.services.order_facts import build_order_facts
+
 
 class KPIBase(Protocol):
     name: str
@@ -13,49 +18,259 @@ class KPIBase(Protocol):
         ...
 
 
+class AggregateKPI(KPIBase, Protocol):
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        ...
+
+
+# ── Shared aggregates ───────────────────────────────────────────────
+
+@dataclass
+class DetailAggregates:
+    """Intermediate aggregates shared by the built-in KPIs.
+
+    ``hourly`` holds revenue (and, when ``order_id`` is present, order
+    counts) per hour bucket; ``menu`` holds quantity and revenue per
+    item/category pair. Both are also keyed by any slicing dimensions
+    (e.g. ``location``) passed to :meth:`from_detail`. Orders are assumed
+    to carry a single timestamp and dimension value, which holds for the
+    enriched detail table built by the pipeline.
+    """
+    hourly: pd.DataFrame | None = None
+    menu: pd.DataFrame | None = None
+
+    @cached_property
+    def calendar(self) -> pd.DataFrame | None:
+        return None if self.hourly is None else _calendar_keys(self.hourly)
+
+    @classmethod
+    def from_detail(
+        cls,
+        df: pd.DataFrame,
+        dimensions: Sequence[str] = (),
+        orders: pd.DataFrame | None = None,
+    ) -> DetailAggregates:
+        """Aggregate the line-item detail.
+
+        Order counts come from the order-grain fact table ``orders`` (see
+        :func:`build_order_facts`), which is built from ``df`` unless the
+        caller already has it.
+        """
+        hourly = menu = None
+        dimensions = [d for d in dimensions if d in df.columns]
+        if "line_total" in df.columns:
+            if "order_id" in df.columns:
+                if orders is None:
+                    orders = build_order_facts(df, dimensions)
+                hourly = cls.from_orders(orders, dimensions).hourly
+            else:
+                hourly = _hourly_aggregate(df, dimensions)
+            keys = [c for c in ("item_name", "category_name") if c in df.columns]
+            if keys and "quantity" in df.columns:
+                keys = dimensions + keys
+                menu = (
+                    df[keys + ["quantity", "line_total"]]
+                    .groupby(keys, dropna=False, sort=False, observed=True)
+                    .agg(
+                        total_quantity=("quantity", "sum"),
+                        total_revenue=("line_total", "sum"),
+                    )
+                    .reset_index()
+                    # A narrow quantity column's sum keeps its dtype when it fits.
+                    .astype({"total_quantity": "int64"})
+                )
+        return cls(hourly=hourly, menu=menu)
+
+    @classmethod
+    def from_orders(cls, orders: pd.DataFrame, dimensions: Sequence[str] = ()) -> DetailAggregates:
+        """Hourly revenue and order counts from the order-grain fact table."""
+        dimensions = [d for d in dimensions if d in orders.columns]
+        slim = pd.DataFrame({
+            "hour_bucket": _hour_bucket(orders),
+            "total_revenue": orders["order_total"],
+        })
+        for dimension in dimensions:
+            slim[dimension] = orders[dimension]
+        hourly = (
+            slim.groupby(dimensions + ["hour_bucket"], dropna=False, observed=True)
+            .agg(
+                total_revenue=("total_revenue", "sum"),
+                orders_count=("total_revenue", "size"),
+            )
+            .reset_index()
+        )
+        return cls(hourly=hourly)
+
+    @classmethod
+    def merge(cls, parts: Iterable[DetailAggregates]) -> DetailAggregates:
+        """Combine aggregates built from disjoint sets of orders."""
+        parts = list(parts)
+        return cls(
+            hourly=_merge_frames([p.hourly for p in parts]),
+            menu=_merge_frames([p.menu for p in parts]),
+        )
+
+    def require_calendar(self, dimensions: Sequence[str] = ()) -> pd.DataFrame:
+        if self.calendar is None:
+            raise ValueError("Expected columns: order_timestamp, line_total")
+        return _require_dimensions(self.calendar, dimensions)
+
+    def require_orders(self, dimensions: Sequence[str] = ()) -> pd.DataFrame:
+        if self.hourly is None or "orders_count" not in self.hourly.columns:
+            raise ValueError("Expected columns: order_id, line_total")
+        return _require_dimensions(self.hourly, dimensions)
+
+    def require_menu(self, column: str, dimensions: Sequence[str] = ()) -> pd.DataFrame:
+        if self.menu is None or column not in self.menu.columns:
+            raise ValueError(f"Expected column: {column}")
+        return _require_dimensions(self.menu, dimensions)
+
+
+_MEASURES = ("total_revenue", "orders_count", "total_quantity")
+
+
+def _require_dimensions(frame: pd.DataFrame, dimensions: Sequence[str]) -> pd.DataFrame:
+    missing = [d for d in dimensions if d not in frame.columns]
+    if missing:
+        raise ValueError(f"Expected columns: {', '.join(missing)}")
+    return frame
+
+
+def _hour_bucket(df: pd.DataFrame) -> pd.Series:
+    if "order_timestamp" in df.columns:
+        return df["order_timestamp"].dt.floor("h")
+    return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+
+
+def _hourly_aggregate(df: pd.DataFrame, dimensions: list[str]) -> pd.DataFrame:
+    """Revenue per hour bucket for detail rows without an ``order_id``."""
+    slim = pd.DataFrame({"hour_bucket": _hour_bucket(df), "line_total": df["line_total"]})
+    for dimension in dimensions:
+        slim[dimension] = df[dimension]
+    return (
+        slim.groupby(dimensions + ["hour_bucket"], dropna=False, observed=True)
+        .agg(total_revenue=("line_total", "sum"))
+        .reset_index()
+    )
+
+
+def _merge_frames(frames: list[pd.DataFrame | None]) -> pd.DataFrame | None:
+    present = [f for f in frames if f is not None]
+    if not present:
+        return None
+    non_empty = [f for f in present if not f.empty] or present[:1]
+    combined = pd.concat(non_empty, ignore_index=True)
+    keys = [c for c in combined.columns if c not in _MEASURES]
+    return (
+        combined.groupby(keys, dropna=False, observed=True)
+        .sum()
+        .reset_index()
+    )
+
+
+def _rollup(
+    frame: pd.DataFrame,
+    dimensions: Sequence[str],
+    keys: Sequence[str],
+    **aggregations: tuple[str, str],
+) -> pd.DataFrame:
+    """Grouping sets over a pre-aggregated frame.
+
+    Without ``dimensions`` this is a plain group-by on ``keys``. Otherwise
+    each dimension gets its own grouping set plus an overall one, and the
+    ``slice`` column names the dimension a row was grouped by (``"all"``
+    for the overall rollup). Rows with missing ``keys`` are dropped, rows
+    with a missing dimension value form their own slice.
+    """
+    frame = frame.dropna(subset=list(keys))
+
+    def group(by: list[str]) -> pd.DataFrame:
+        if not by:
+            return pd.DataFrame({
+                name: [frame[column].agg(func)] for name, (column, func) in aggregations.items()
+            })
+        return frame.groupby(by, as_index=False, dropna=False, observed=True).agg(**aggregations)
+
+    if not dimensions:
+        return group(list(keys))
+    parts = [group([d, *keys]).assign(slice=d) for d in dimensions]
+    parts.append(group(list(keys)).assign(slice="all"))
+    result = pd.concat(parts, ignore_index=True)
+    leading = ["slice", *dimensions]
+    return result[leading + [c for c in result.columns if c not in leading]]
+
+
+def _sort_descending(frame: pd.DataFrame, column: str, dimensions: Sequence[str]) -> pd.DataFrame:
+    if not dimensions:
+        return frame.sort_values(column, ascending=False)
+    by = ["slice", *dimensions, column]
+    return frame.sort_values(by, ascending=[True] * (len(by) - 1) + [False], kind="stable")
+
+
+def _calendar_keys(hourly: pd.DataFrame) -> pd.DataFrame:
+    """Derive every time key once, on the (small) hourly table."""
+    timed = hourly.loc[hourly["hour_bucket"].notna()]
+    bucket = timed["hour_bucket"]
+    return timed.assign(
+        order_date=bucket.dt.date,
+        year=bucket.dt.year,
+        week=bucket.dt.isocalendar().week.astype(int),
+        year_month=bucket.dt.to_period("M").astype(str),
+        hour=bucket.dt.hour,
+        day_type=np.where(bucket.dt.dayofweek >= 5, "weekend", "weekday"),
+    )
+
+
 # ── Revenue KPIs ─────────────────────────────────────────────────────
+#
+# Every KPI takes optional ``dimensions`` (e.g. ``("location",)``); with
+# them it returns one slice per dimension value plus the overall rollup,
+# all grouped from the same shared aggregates.
 
 @dataclass
 class DailyRevenueKPI:
     name: str = "daily_revenue"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         if not {"order_timestamp", "line_total"}.issubset(df.columns):
             raise ValueError("Expected columns: order_timestamp, line_total")
-        return (
-            df.assign(order_date=df["order_timestamp"].dt.date)
-            .groupby("order_date", as_index=False)["line_total"]
-            .sum()
-            .rename(columns={"line_total": "total_revenue"})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["order_date"],
+            total_revenue=("total_revenue", "sum"),
         )
 
 
 @dataclass
 class WeeklyRevenueKPI:
     name: str = "weekly_revenue"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["week"] = tmp["order_timestamp"].dt.isocalendar().week.astype(int)
-        tmp["year"] = tmp["order_timestamp"].dt.year
-        return (
-            tmp.groupby(["year", "week"], as_index=False)["line_total"]
-            .sum()
-            .rename(columns={"line_total": "total_revenue"})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["year", "week"],
+            total_revenue=("total_revenue", "sum"),
         )
 
 
 @dataclass
 class MonthlyRevenueKPI:
     name: str = "monthly_revenue"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["year_month"] = tmp["order_timestamp"].dt.to_period("M").astype(str)
-        return (
-            tmp.groupby("year_month", as_index=False)["line_total"]
-            .sum()
-            .rename(columns={"line_total": "total_revenue"})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["year_month"],
+            total_revenue=("total_revenue", "sum"),
         )
 
 
@@ -64,25 +279,39 @@ class MonthlyRevenueKPI:
 @dataclass
 class AverageOrderValueKPI:
     name: str = "average_order_value"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         if not {"order_id", "line_total"}.issubset(df.columns):
             raise ValueError("Expected columns: order_id, line_total")
-        order_totals = df.groupby("order_id", as_index=False)["line_total"].sum()
-        return pd.DataFrame({"average_order_value": [round(order_totals["line_total"].mean(), 2)]})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        totals = _rollup(
+            aggregates.require_orders(self.dimensions), self.dimensions, [],
+            total_revenue=("total_revenue", "sum"),
+            orders_count=("orders_count", "sum"),
+        )
+        totals["average_order_value"] = [
+            round(revenue / count, 2) if count else float("nan")
+            for revenue, count in zip(totals["total_revenue"], totals["orders_count"])
+        ]
+        return totals.drop(columns=["total_revenue", "orders_count"])
 
 
 @dataclass
 class OrdersPerDayKPI:
     name: str = "orders_per_day"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["order_date"] = tmp["order_timestamp"].dt.date
-        return (
-            tmp.groupby("order_date", as_index=False)["order_id"]
-            .nunique()
-            .rename(columns={"order_id": "orders_count"})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        aggregates.require_orders()
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["order_date"],
+            orders_count=("orders_count", "sum"),
         )
 
 
@@ -91,48 +320,49 @@ class OrdersPerDayKPI:
 @dataclass
 class RevenuePerHourKPI:
     name: str = "revenue_per_hour"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["hour"] = tmp["order_timestamp"].dt.hour
-        return (
-            tmp.groupby("hour", as_index=False)["line_total"]
-            .sum()
-            .rename(columns={"line_total": "total_revenue"})
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["hour"],
+            total_revenue=("total_revenue", "sum"),
         )
 
 
 @dataclass
 class PeakHoursKPI:
     name: str = "peak_hours"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["hour"] = tmp["order_timestamp"].dt.hour
-        hourly = (
-            tmp.groupby("hour", as_index=False)["order_id"]
-            .nunique()
-            .rename(columns={"order_id": "orders_count"})
-            .sort_values("orders_count", ascending=False)
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        aggregates.require_orders()
+        hourly = _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["hour"],
+            orders_count=("orders_count", "sum"),
         )
-        return hourly
+        return _sort_descending(hourly, "orders_count", self.dimensions)
 
 
 @dataclass
 class WeekdayVsWeekendKPI:
     name: str = "weekday_vs_weekend"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        tmp = df.copy()
-        tmp["day_type"] = tmp["order_timestamp"].dt.dayofweek.apply(
-            lambda d: "weekend" if d >= 5 else "weekday"
-        )
-        return (
-            tmp.groupby("day_type", as_index=False)
-            .agg(
-                orders_count=("order_id", "nunique"),
-                total_revenue=("line_total", "sum"),
-            )
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        aggregates.require_orders()
+        return _rollup(
+            aggregates.require_calendar(self.dimensions), self.dimensions, ["day_type"],
+            orders_count=("orders_count", "sum"),
+            total_revenue=("total_revenue", "sum"),
         )
 
 
@@ -140,39 +370,126 @@ class WeekdayVsWeekendKPI:
 
 @dataclass
 class TopMenuItemsKPI:
+    """Items by revenue; ``top_k`` keeps only the first K of each slice.
+
+    Ad-hoc windows over long histories are served by
+    :class:`~src.services.heavy_hitters.TopItemSketches` instead.
+    """
     name: str = "top_menu_items"
+    dimensions: tuple[str, ...] = ()
+    top_k: int | None = None
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         if "item_name" not in df.columns:
             raise ValueError("Expected column: item_name")
-        return (
-            df.groupby("item_name", as_index=False)
-            .agg(
-                total_quantity=("quantity", "sum"),
-                total_revenue=("line_total", "sum"),
-            )
-            .sort_values("total_revenue", ascending=False)
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        items = _rollup(
+            aggregates.require_menu("item_name", self.dimensions), self.dimensions, ["item_name"],
+            total_quantity=("total_quantity", "sum"),
+            total_revenue=("total_revenue", "sum"),
         )
+        items = _sort_descending(items, "total_revenue", self.dimensions)
+        if self.top_k is None:
+            return items
+        if not self.dimensions:
+            return items.head(self.top_k)
+        return items.groupby(["slice", *self.dimensions], dropna=False, sort=False).head(self.top_k)
 
 
 @dataclass
 class RevenueByCategoryKPI:
     name: str = "revenue_by_category"
+    dimensions: tuple[str, ...] = ()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         if "category_name" not in df.columns:
             raise ValueError("Expected column: category_name")
-        return (
-            df.groupby("category_name", as_index=False)
-            .agg(
-                total_quantity=("quantity", "sum"),
-                total_revenue=("line_total", "sum"),
-            )
-            .sort_values("total_revenue", ascending=False)
+        return self.from_aggregates(DetailAggregates.from_detail(df, self.dimensions))
+
+    def from_aggregates(self, aggregates: DetailAggregates) -> pd.DataFrame:
+        categories = _rollup(
+            aggregates.require_menu("category_name", self.dimensions), self.dimensions,
+            ["category_name"],
+            total_quantity=("total_quantity", "sum"),
+            total_revenue=("total_revenue", "sum"),
         )
+        return _sort_descending(categories, "total_revenue", self.dimensions)
+
+
+# ── Fused engine ─────────────────────────────────────────────────────
+
+def default_kpis(
+    columns: Iterable[str] = (), dimensions: Sequence[str] = (), top_k: int | None = None
+) -> list[KPIBase]:
+    """Built-in KPIs, including the menu KPIs when their columns exist."""
+    columns = set(columns)
+    dimensions = tuple(dimensions)
+    kpis: list[KPIBase] = [
+        DailyRevenueKPI(dimensions=dimensions),
+        WeeklyRevenueKPI(dimensions=dimensions),
+        MonthlyRevenueKPI(dimensions=dimensions),
+        AverageOrderValueKPI(dimensions=dimensions),
+        OrdersPerDayKPI(dimensions=dimensions),
+        RevenuePerHourKPI(dimensions=dimensions),
+        PeakHoursKPI(dimensions=dimensions),
+        WeekdayVsWeekendKPI(dimensions=dimensions),
+    ]
+    if "item_name" in columns:
+        kpis.append(TopMenuItemsKPI(dimensions=dimensions, top_k=top_k))
+    if "category_name" in columns:
+        kpis.append(RevenueByCategoryKPI(dimensions=dimensions))
+    return kpis
+
+
+def kpi_dimensions(kpis: Iterable[KPIBase]) -> tuple[str, ...]:
+    """Every slicing dimension requested by ``kpis``, in first-seen order."""
+    seen: dict[str, None] = {}
+    for kpi in kpis:
+        seen.update(dict.fromkeys(getattr(kpi, "dimensions", ())))
+    return tuple(seen)
+
+
+@dataclass
+class KPIEngine:
+    """Computes every registered KPI from one shared set of aggregates.
+
+    The detail table is scanned once to build :class:`DetailAggregates`;
+    KPIs that only implement ``calculate`` still receive the raw frame.
+    """
+    kpis: list[KPIBase] = field(default_factory=default_kpis)
+
+    def run(self, df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+        aggregates = DetailAggregates.from_detail(df, kpi_dimensions(self.kpis))
+        return self.run_aggregates(aggregates, df)
+
+    def run_aggregates(
+        self, aggregates: DetailAggregates, df: pd.DataFrame | None = None
+    ) -> dict[str, pd.DataFrame]:
+        return {kpi.name: compute_kpi(kpi, aggregates, df) for kpi in self.kpis}
+
+
+def compute_kpi(
+    kpi: KPIBase, aggregates: DetailAggregates, df: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """Run one KPI from the shared aggregates, or from ``df`` if it needs rows.
+
+    Its time and result rows are reported through :func:`observe`.
+    """
+    compute = getattr(kpi, "from_aggregates", None)
+    if compute is None and df is None:
+        raise ValueError(f"KPI {kpi.name!r} needs the detail frame")
+    with observe("kpi", kpi.name) as span:
+        result = compute(aggregates) if compute is not None else kpi.calculate(df)
+        span.rows_out = len(result)
+    return result
 
 
 # ── Convenience runner ───────────────────────────────────────────────
 
 def run_kpi(kpi: KPIBase, df: pd.DataFrame) -> pd.DataFrame:
-    return kpi.calculate(df)
+    with observe("kpi", kpi.name) as span:
+        result = kpi.calculate(df)
+        span.rows_out = len(result)
+    return result
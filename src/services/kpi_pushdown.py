@@ -0,0 +1,59 @@
+"""Database execution backend for the KPI calculators.
+
+:class:`SqlAggregates` builds the same :class:`DetailAggregates` the pandas
+backend derives from the detail table, but reads them from the summary
+tables in ``sql/summary/``, so the scan over orders and order_items runs
+next to the data. Every built-in KPI then rolls those small aggregates up
+exactly as it does for the pandas backend.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.config.options import KPI_BACKENDS
+from src.services.data_loader import DataRepository
+from src.services.kpi_calculator import DetailAggregates
+
+HOURLY_SQL = """
+SELECT sales_date, sales_hour, orders_count, total_revenue
+FROM summary_hourly
+"""
+
+# LEFT JOINs keep items missing from the menu, as the pandas detail does.
+MENU_SQL = """
+SELECT
+  mi.item_name,
+  c.category_name,
+  SUM(s.total_quantity) AS total_quantity,
+  SUM(s.total_revenue) AS total_revenue
+FROM summary_menu_items s
+LEFT JOIN menu_items mi ON s.menu_item_id = mi.menu_item_id
+LEFT JOIN categories c ON mi.category_id = c.category_id
+GROUP BY mi.item_name, c.category_name
+"""
+
+
+@dataclass
+class SqlAggregates:
+    """Reads :class:`DetailAggregates` from the database summaries."""
+    repository: DataRepository
+
+    def load(self) -> DetailAggregates:
+        rows = self.repository.fetch_dataframe(HOURLY_SQL)
+        hourly = pd.DataFrame({
+            "hour_bucket": pd.to_datetime(rows["sales_date"])
+            + pd.to_timedelta(rows["sales_hour"].astype("int64"), unit="h"),
+            # PostgreSQL returns NUMERIC sums as Decimal objects.
+            "total_revenue": rows["total_revenue"].astype("float64"),
+            "orders_count": rows["orders_count"].astype("int64"),
+        })
+        # The dtypes the pandas backend produces from the schema-typed detail.
+        menu = self.repository.fetch_dataframe(MENU_SQL).astype({
+            "item_name": "category",
+            "category_name": "category",
+            "total_quantity": "int64",
+            "total_revenue": "float64",
+        })
+        return DetailAggregates(hourly=hourly, menu=menu)
@@ -0,0 +1,123 @@
+"""Parallel execution of independent KPIs.
+
+:class:`KPIScheduler` runs each registered KPI as its own task on a thread
+or process pool and returns the results in registration order, recording
+the wall time of every KPI. KPIs run in the pipeline's own process report
+through :func:`~src.services.instrumentation.observe`; those run in
+worker processes are reported from their recorded timings.
+
+In process mode each worker receives the shared aggregates once, through
+the pool initializer. A detail frame needed by ``calculate``-only KPIs is
+written once to an Arrow IPC file that every worker memory-maps: its
+columns are read from the shared page cache, and those without nulls
+become pandas columns without a copy, rather than the frame being pickled
+into each task. The thread pool stays the default, since the built-in
+KPIs read small pre-aggregated frames and finish before a worker process
+has started.
+"""
+from __future__ import annotations
+
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from src.config.options import POOL_MODES
+from src.services.instrumentation import record
+from src.services.kpi_calculator import DetailAggregates, KPIBase, compute_kpi
+
+
+def _timed(kpi: KPIBase, aggregates: DetailAggregates, df: pd.DataFrame | None) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    result = compute_kpi(kpi, aggregates, df)
+    return result, time.perf_counter() - start
+
+
+# Per-process state for pool workers, set once by _init_worker.
+_worker_aggregates: DetailAggregates | None = None
+_worker_detail_path: str | None = None
+_worker_detail: pd.DataFrame | None = None
+
+
+def _init_worker(aggregates: DetailAggregates, detail_path: str | None) -> None:
+    global _worker_aggregates, _worker_detail_path, _worker_detail
+    _worker_aggregates, _worker_detail_path, _worker_detail = aggregates, detail_path, None
+
+
+def _worker_run(kpi: KPIBase) -> tuple[pd.DataFrame, float]:
+    global _worker_detail
+    if _worker_detail is None and _worker_detail_path is not None and not hasattr(kpi, "from_aggregates"):
+        # The frame's buffers keep the map open for the worker's lifetime.
+        table = ipc.open_file(pa.memory_map(_worker_detail_path)).read_all()
+        _worker_detail = table.to_pandas(split_blocks=True)
+    return _timed(kpi, _worker_aggregates, _worker_detail)
+
+
+def _write_arrow(df: pd.DataFrame, directory: str) -> str:
+    path = str(Path(directory) / "detail.arrow")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+@dataclass
+class KPIScheduler:
+    """Runs independent KPIs on a ``serial``, ``thread`` or ``process`` pool.
+
+    ``max_workers`` defaults to the executor's own default (the CPU count).
+    After :meth:`run`, ``timings`` maps each KPI name to its wall time in
+    seconds, in registration order.
+    """
+    kpis: list[KPIBase]
+    mode: str = "thread"
+    max_workers: int | None = None
+    timings: dict[str, float] = field(default_factory=dict, init=False)
+
+    def __post_init__(self) -> None:
+        if self.mode not in POOL_MODES:
+            raise ValueError(f"mode must be one of {POOL_MODES}, got {self.mode!r}")
+
+    def run(
+        self, aggregates: DetailAggregates, df: pd.DataFrame | None = None
+    ) -> dict[str, pd.DataFrame]:
+        if aggregates.hourly is not None:
+            # Build the shared calendar once, before the tasks race to build it.
+            aggregates.require_calendar()
+        if self.mode == "serial":
+            outcomes = [_timed(kpi, aggregates, df) for kpi in self.kpis]
+        else:
+            with ExitStack() as stack:
+                executor = stack.enter_context(self._executor(stack, aggregates, df))
+                if self.mode == "thread":
+                    futures = [executor.submit(_timed, kpi, aggregates, df) for kpi in self.kpis]
+                else:
+                    futures = [executor.submit(_worker_run, kpi) for kpi in self.kpis]
+                outcomes = [future.result() for future in futures]
+            if self.mode == "process":
+                for kpi, (result, seconds) in zip(self.kpis, outcomes):
+                    record("kpi", kpi.name, seconds, rows_out=len(result))
+
+        self.timings = {kpi.name: seconds for kpi, (_, seconds) in zip(self.kpis, outcomes)}
+        return {kpi.name: result for kpi, (result, _) in zip(self.kpis, outcomes)}
+
+    def _executor(
+        self, stack: ExitStack, aggregates: DetailAggregates, df: pd.DataFrame | None
+    ) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        detail_path = None
+        if df is not None and any(not hasattr(k, "from_aggregates") for k in self.kpis):
+            directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="kpi-"))
+            detail_path = _write_arrow(df, directory)
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(aggregates, detail_path),
+        )
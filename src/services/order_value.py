@@ -0,0 +1,131 @@
+"""Order-value distribution KPIs over mergeable daily t-digests.
+
+:class:`OrderValueSketches` keeps one t-digest of order totals per
+(day, location), built from the order fact table. Percentiles for any
+window come from merging those digests rather than re-sorting every
+order total. Digests of at most ``compression`` orders are stored
+uncompressed and are exact; see :mod:`src.services.sketches` for the
+accuracy of larger ones.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.services.customer_reach import REACH_PERIODS, with_periods
+from src.services.order_facts import build_order_facts
+from src.services.sketches import (
+    DEFAULT_COMPRESSION, TDigest, compress_centroids, grouped_quantiles,
+)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+_KEYS = ["sales_date", "location"]
+
+
+def _quantile_label(q: float) -> str:
+    return f"p{100 * q:g}".replace(".", "_")
+
+
+@dataclass
+class OrderValueSketches:
+    """Order-total t-digest centroids, keyed by ``sales_date`` and ``location``."""
+    centroids: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=[*_KEYS, "mean", "weight"])
+    )
+    compression: float = DEFAULT_COMPRESSION
+
+    @classmethod
+    def from_orders(
+        cls, orders: pd.DataFrame, compression: float = DEFAULT_COMPRESSION
+    ) -> OrderValueSketches:
+        """Digest the ``order_total`` of an order fact table."""
+        timed = orders.loc[orders["order_timestamp"].notna() & orders["order_total"].notna()]
+        values = pd.DataFrame({
+            "sales_date": timed["order_timestamp"].dt.normalize(),
+            "location": timed["location"].astype(object) if "location" in timed else None,
+            "mean": timed["order_total"].astype(float),
+            "weight": 1.0,
+        })
+        return cls(compress_centroids(values, _KEYS, compression), compression)
+
+    @classmethod
+    def merge(cls, parts: Sequence[OrderValueSketches]) -> OrderValueSketches:
+        """Combine digests from several runs; matching days are merged."""
+        parts = [p for p in parts if len(p.centroids)]
+        if not parts:
+            return cls()
+        compression = min(p.compression for p in parts)
+        combined = pd.concat([p.centroids for p in parts], ignore_index=True)
+        return cls(compress_centroids(combined, _KEYS, compression), compression)
+
+    def window(
+        self, start: date | None = None, end: date | None = None, location: str | None = None
+    ) -> TDigest:
+        """The merged digest over inclusive dates, optionally for one location."""
+        frame = self.centroids
+        mask = pd.Series(True, index=frame.index)
+        if start is not None:
+            mask &= frame["sales_date"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= frame["sales_date"] <= pd.Timestamp(end)
+        if location is not None:
+            mask &= frame["location"] == location
+        selected = frame.loc[mask, ["mean", "weight"]]
+        if selected.empty:
+            return TDigest(self.compression)
+        return TDigest(self.compression, compress_centroids(selected, compression=self.compression))
+
+    def rollup(
+        self,
+        period: str,
+        by_location: bool = False,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> pd.DataFrame:
+        """Order count and order-value quantiles per ``period`` (and per location)."""
+        if period not in REACH_PERIODS:
+            raise ValueError(f"period must be one of {tuple(REACH_PERIODS)}, got {period!r}")
+        by = (["location"] if by_location else []) + REACH_PERIODS[period]
+        labels = [_quantile_label(q) for q in quantiles]
+        if self.centroids.empty:
+            return pd.DataFrame(columns=[*by, "orders_count", *labels])
+        calendar = with_periods(self.centroids)[[*by, "mean", "weight"]]
+        merged = compress_centroids(calendar, by, self.compression)
+        keys, values = grouped_quantiles(merged, by, quantiles)
+        result = keys.rename(columns={"weight": "orders_count"})
+        result["orders_count"] = result["orders_count"].astype("int64")
+        result[labels] = np.round(values, 2)
+        return result
+
+
+# ── Order-value KPIs ─────────────────────────────────────────────────
+
+@dataclass
+class OrderValueDistributionKPI:
+    """Order-value percentiles (default p50/p90/p99) per ``period``
+    (``day``, ``week``, ``month`` or ``total``), optionally per location."""
+    name: str = "order_value_daily"
+    period: str = "day"
+    by_location: bool = False
+    quantiles: tuple[float, ...] = DEFAULT_QUANTILES
+    compression: float = DEFAULT_COMPRESSION
+
+    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not {"order_id", "order_timestamp", "line_total"}.issubset(df.columns):
+            raise ValueError("Expected columns: order_id, order_timestamp, line_total")
+        facts = build_order_facts(df)
+        return self.from_sketches(OrderValueSketches.from_orders(facts, self.compression))
+
+    def from_sketches(self, sketches: OrderValueSketches) -> pd.DataFrame:
+        return sketches.rollup(self.period, self.by_location, self.quantiles)
+
+
+def default_order_value_kpis() -> list[OrderValueDistributionKPI]:
+    return [
+        OrderValueDistributionKPI("order_value_daily", "day"),
+        OrderValueDistributionKPI("order_value_daily_by_location", "day", by_location=True),
+        OrderValueDistributionKPI("order_value_by_location", "total", by_location=True),
+    ]
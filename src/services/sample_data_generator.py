@@ -4,17 +4,22 @@ Inspired by:
 - Restaurant Sales Report (Kaggle: rajatsurana979)
 - Coffee Shop Sales (Kaggle: dieterholger)
 
-Produces normalized CSVs for all tables in data/raw/.
+Produces normalized CSVs for all tables in data/raw/. Rows are drawn
+with NumPy a chunk of orders at a time and appended to the CSVs, so
+memory stays flat however many orders are requested. Output is
+reproducible for a given ``seed`` and ``chunk_size``.
 """
 from __future__ import annotations
 
-import random
-from datetime import datetime, timedelta
+import argparse
+from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 
+import numpy as np
 import pandas as pd
-
-random.seed(42)
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 
 # ── Menu categories & items ──────────────────────────────────────────
 MENU = {
@@ -67,143 +72,264 @@ PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "UPI", "Digital Wallet"]
 START_DATE = datetime(2022, 3, 1)
 END_DATE = datetime(2023, 3, 31)
 
+# Orders per hour from 06:00 to 22:00: peaks at lunch and in the evening.
+HOURS = np.arange(6, 23)
+HOUR_WEIGHTS = np.array([1] * 6 + [3] * 2 + [5] * 2 + [4] * 2 + [8] * 2 + [6] * 2 + [4])
+BASKET_SIZES = np.array([1, 2, 3, 4, 5])
+BASKET_WEIGHTS = np.array([15, 35, 30, 15, 5])
+QUANTITIES = np.array([1, 2, 3])
+QUANTITY_WEIGHTS = np.array([60, 30, 10])
+NUM_STAFF = 10
+# Day of year on which seasonal demand peaks (mid-December).
+SEASONAL_PEAK = 350
 
-def _random_timestamp(date: datetime) -> datetime:
-    """Weighted hours: peak at lunch (12-14) and evening (18-21)."""
-    hour_weights = (
-        [1]*6 + [3]*2 + [5]*2 + [4]*2 + [8]*2 + [6]*2 +
-        [4]*2 + [9]*3 + [5]*1
-    )
-    hours = list(range(6, 23))
-    # Trim weights to match hours length
-    weights = hour_weights[:len(hours)]
-    hour = random.choices(hours, weights=weights, k=1)[0]
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
-    return date.replace(hour=hour, minute=minute, second=second)
+
+class _CsvSink:
+    """Appends frames to one CSV per table through Arrow's CSV writer.
+
+    The header is written plainly and values are never quoted (the
+    generated values hold no delimiters; Arrow raises if one does).
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._files: dict[str, tuple[BinaryIO, pa_csv.CSVWriter, pa.Schema]] = {}
+
+    def write(self, name: str, df: pd.DataFrame) -> None:
+        if name not in self._files:
+            sink = open(self.directory / f"{name}.csv", "wb")
+            sink.write((",".join(df.columns) + "\n").encode("utf-8"))
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            options = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+            self._files[name] = sink, pa_csv.CSVWriter(sink, schema, write_options=options), schema
+        _, writer, schema = self._files[name]
+        writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+
+    def __enter__(self) -> _CsvSink:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for sink, writer, _ in self._files.values():
+            writer.close()
+            sink.close()
+
+
+def _probabilities(weights: np.ndarray) -> np.ndarray:
+    return weights / weights.sum()
+
+
+def _menu(num_items: int | None, rng: np.random.Generator) -> pd.DataFrame:
+    """The MENU items; beyond them, house specials priced like their category."""
+    rows = [
+        (cat_id, cat_name, item_name, price)
+        for cat_id, (cat_name, items) in enumerate(MENU.items(), start=1)
+        for item_name, price in items
+    ]
+    base = len(rows)
+    num_items = base if num_items is None else num_items
+    categories = list(MENU.items())
+    for n in range(base, num_items):
+        cat_id = n % len(categories) + 1
+        cat_name, items = categories[cat_id - 1]
+        prices = [price for _, price in items]
+        price = int(rng.integers(min(prices), max(prices) + 1))
+        rows.append((cat_id, cat_name, f"{cat_name} Special {n - base + 1}", price))
+    menu = pd.DataFrame(rows[:num_items], columns=["category_id", "cat_name", "item_name", "unit_price"])
+    menu.insert(0, "menu_item_id", np.arange(1, len(menu) + 1))
+    menu.insert(4, "item_description", menu["item_name"] + " from our " + menu["cat_name"] + " menu")
+    return menu.drop(columns="cat_name")
+
+
+def _locations(num_locations: int) -> list[str]:
+    extra = [f"Store {n}" for n in range(len(LOCATIONS) + 1, num_locations + 1)]
+    return (LOCATIONS + extra)[:num_locations]
+
+
+def _day_weights(start: np.datetime64, num_days: int, seasonality: float) -> np.ndarray:
+    """Relative order volume per day: a yearly cycle of amplitude ``seasonality``."""
+    days = start + np.arange(num_days)
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(int) + 1
+    return 1 + seasonality * np.cos(2 * np.pi * (day_of_year - SEASONAL_PEAK) / 365.25)
+
+
+def _people(rng: np.random.Generator, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), len(ids))]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), len(ids))]
+    return first, last
 
 
-def generate(output_dir: Path, num_customers: int = 200, num_orders: int = 5000) -> None:
+def _customers(rng: np.random.Generator, ids: np.ndarray) -> pd.DataFrame:
+    first, last = _people(rng, ids)
+    created = np.datetime64(START_DATE, "s") + rng.integers(0, 61, len(ids)).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "customer_id": ids,
+        "first_name": first,
+        "last_name": last,
+        "email": pd.Series(first).str.lower() + "." + pd.Series(last).str.lower()
+        + pd.Series(ids).astype(str) + "@email.com",
+        "phone": "+91" + pd.Series(rng.integers(7_000_000_000, 10_000_000_000, len(ids))).astype(str),
+        "created_at": np.datetime_as_string(created, unit="s"),
+    })
+
+
+def _staff(rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, NUM_STAFF + 1)
+    first, last = _people(rng, ids)
+    hired = np.datetime64(START_DATE, "D") - rng.integers(30, 366, len(ids)).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "staff_id": ids,
+        "first_name": first,
+        "last_name": last,
+        "role": np.array(STAFF_ROLES, dtype=object)[rng.integers(0, len(STAFF_ROLES), len(ids))],
+        "hire_date": np.datetime_as_string(hired, unit="D"),
+    })
+
+
+def _baskets(rng: np.random.Generator, sizes: np.ndarray, num_items: int) -> np.ndarray:
+    """Distinct item indexes per order: row i holds ``sizes[i]`` of them, then -1."""
+    width = int(sizes.max(initial=1))
+    picks = rng.integers(0, num_items, (len(sizes), width))
+    for j in range(1, width):
+        while True:
+            clash = (picks[:, :j] == picks[:, [j]]).any(axis=1) & (sizes > j)
+            if not clash.any():
+                break
+            picks[clash, j] = rng.integers(0, num_items, clash.sum())
+    picks[np.arange(width) >= sizes[:, None]] = -1
+    return picks
+
+
+def _order_chunk(
+    rng: np.random.Generator,
+    first_order: int,
+    count: int,
+    first_item: int,
+    *,
+    num_customers: int,
+    locations: list[str],
+    menu: pd.DataFrame,
+    start: np.datetime64,
+    day_probabilities: np.ndarray,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    order_ids = np.arange(first_order, first_order + count)
+    day = rng.choice(len(day_probabilities), count, p=day_probabilities)
+    hour = rng.choice(HOURS, count, p=_probabilities(HOUR_WEIGHTS))
+    seconds = hour * 3600 + rng.integers(0, 60, count) * 60 + rng.integers(0, 60, count)
+    timestamps = (start + day.astype("timedelta64[D]")).astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": rng.integers(1, num_customers + 1, count),
+        "staff_id": rng.integers(1, NUM_STAFF + 1, count),
+        "order_timestamp": timestamps,
+        "order_status": "completed",
+        "location": np.array(locations, dtype=object)[rng.integers(0, len(locations), count)],
+    })
+
+    sizes = np.minimum(rng.choice(BASKET_SIZES, count, p=_probabilities(BASKET_WEIGHTS)), len(menu))
+    picks = _baskets(rng, sizes, len(menu))
+    rows, slots = np.nonzero(picks >= 0)
+    items = picks[rows, slots]
+    quantity = rng.choice(QUANTITIES, len(items), p=_probabilities(QUANTITY_WEIGHTS))
+    price = menu["unit_price"].to_numpy()[items]
+    order_items = pd.DataFrame({
+        "order_item_id": np.arange(first_item, first_item + len(items)),
+        "order_id": order_ids[rows],
+        "menu_item_id": menu["menu_item_id"].to_numpy()[items],
+        "quantity": quantity,
+        "item_price": price,
+    })
+
+    totals = np.bincount(rows, weights=quantity * price, minlength=count)
+    payments = pd.DataFrame({
+        "payment_id": order_ids,
+        "order_id": order_ids,
+        "payment_method": np.array(PAYMENT_METHODS, dtype=object)[
+            rng.integers(0, len(PAYMENT_METHODS), count)
+        ],
+        "payment_amount": np.round(totals, 2),
+        "payment_timestamp": timestamps,
+    })
+    return orders, order_items, payments
+
+
+def generate(
+    output_dir: Path,
+    num_customers: int = 200,
+    num_orders: int = 5000,
+    *,
+    num_locations: int = len(LOCATIONS),
+    num_days: int | None = None,
+    num_items: int | None = None,
+    seasonality: float = 0.0,
+    seed: int = 42,
+    chunk_size: int = 1_000_000,
+) -> None:
+    """Write the sample CSVs to ``output_dir``.
+
+    Orders spread over ``num_days`` from ``START_DATE`` (default: up to
+    ``END_DATE``), across ``num_locations`` stores, choosing from
+    ``num_items`` menu items (default: the 45 in ``MENU``).
+    ``seasonality`` between 0 and 1 is the amplitude of a yearly demand
+    cycle peaking in December.
+    """
+    if not 0 <= seasonality <= 1:
+        raise ValueError(f"seasonality must be between 0 and 1, got {seasonality}")
     output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(START_DATE, "D")
+    num_days = num_days or int((np.datetime64(END_DATE, "D") - start).astype(int)) + 1
 
-    # ── Categories ───────────────────────────────────────────────────
-    categories = list(MENU.keys())
+    # ── Dimension tables ─────────────────────────────────────────────
     categories_df = pd.DataFrame({
-        "category_id": range(1, len(categories) + 1),
-        "category_name": categories,
+        "category_id": range(1, len(MENU) + 1),
+        "category_name": list(MENU),
     })
+    menu_df = _menu(num_items, rng)
+    staff_df = _staff(rng)
+    day_probabilities = _probabilities(_day_weights(start, num_days, seasonality))
+    locations = _locations(num_locations)
+    num_order_items = 0
+    with _CsvSink(output_dir) as sink:
+        sink.write("categories", categories_df)
+        sink.write("menu_items", menu_df)
+        sink.write("staff", staff_df)
+        for first in range(1, num_customers + 1, chunk_size):
+            sink.write("customers", _customers(rng, np.arange(first, min(first + chunk_size, num_customers + 1))))
 
-    # ── Menu items ───────────────────────────────────────────────────
-    menu_rows = []
-    menu_id = 1
-    for cat_id, (cat_name, items) in enumerate(MENU.items(), start=1):
-        for item_name, price in items:
-            menu_rows.append({
-                "menu_item_id": menu_id,
-                "category_id": cat_id,
-                "item_name": item_name,
-                "item_description": f"{item_name} from our {cat_name} menu",
-                "unit_price": price,
-            })
-            menu_id += 1
-    menu_df = pd.DataFrame(menu_rows)
-
-    # ── Customers ────────────────────────────────────────────────────
-    customer_rows = []
-    for cid in range(1, num_customers + 1):
-        fn = random.choice(FIRST_NAMES)
-        ln = random.choice(LAST_NAMES)
-        customer_rows.append({
-            "customer_id": cid,
-            "first_name": fn,
-            "last_name": ln,
-            "email": f"{fn.lower()}.{ln.lower()}{cid}@email.com",
-            "phone": f"+91{random.randint(7000000000, 9999999999)}",
-            "created_at": (START_DATE + timedelta(days=random.randint(0, 60))).isoformat(),
-        })
-    customers_df = pd.DataFrame(customer_rows)
-
-    # ── Staff ────────────────────────────────────────────────────────
-    staff_rows = []
-    for sid in range(1, 11):
-        staff_rows.append({
-            "staff_id": sid,
-            "first_name": random.choice(FIRST_NAMES),
-            "last_name": random.choice(LAST_NAMES),
-            "role": random.choice(STAFF_ROLES),
-            "hire_date": (START_DATE - timedelta(days=random.randint(30, 365))).date().isoformat(),
-        })
-    staff_df = pd.DataFrame(staff_rows)
-
-    # ── Orders + Order Items + Payments ──────────────────────────────
-    order_rows = []
-    order_item_rows = []
-    payment_rows = []
-    oi_id = 1
-    total_days = (END_DATE - START_DATE).days
-
-    for oid in range(1, num_orders + 1):
-        day_offset = random.randint(0, total_days)
-        order_date = START_DATE + timedelta(days=day_offset)
-        ts = _random_timestamp(order_date)
-
-        cust_id = random.randint(1, num_customers)
-        staff_id = random.randint(1, 10)
-        location = random.choice(LOCATIONS)
-
-        order_rows.append({
-            "order_id": oid,
-            "customer_id": cust_id,
-            "staff_id": staff_id,
-            "order_timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "order_status": "completed",
-            "location": location,
-        })
-
-        # 1-5 items per order
-        num_items = random.choices([1, 2, 3, 4, 5], weights=[15, 35, 30, 15, 5], k=1)[0]
-        chosen_items = random.sample(menu_rows, min(num_items, len(menu_rows)))
-        order_total = 0.0
-
-        for item in chosen_items:
-            qty = random.choices([1, 2, 3], weights=[60, 30, 10], k=1)[0]
-            line_price = item["unit_price"]
-            order_item_rows.append({
-                "order_item_id": oi_id,
-                "order_id": oid,
-                "menu_item_id": item["menu_item_id"],
-                "quantity": qty,
-                "item_price": line_price,
-            })
-            order_total += qty * line_price
-            oi_id += 1
-
-        payment_rows.append({
-            "payment_id": oid,
-            "order_id": oid,
-            "payment_method": random.choice(PAYMENT_METHODS),
-            "payment_amount": round(order_total, 2),
-            "payment_timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
-        })
-
-    orders_df = pd.DataFrame(order_rows)
-    order_items_df = pd.DataFrame(order_item_rows)
-    payments_df = pd.DataFrame(payment_rows)
-
-    # ── Write all CSVs ───────────────────────────────────────────────
-    categories_df.to_csv(output_dir / "categories.csv", index=False)
-    menu_df.to_csv(output_dir / "menu_items.csv", index=False)
-    customers_df.to_csv(output_dir / "customers.csv", index=False)
-    staff_df.to_csv(output_dir / "staff.csv", index=False)
-    orders_df.to_csv(output_dir / "orders.csv", index=False)
-    order_items_df.to_csv(output_dir / "order_items.csv", index=False)
-    payments_df.to_csv(output_dir / "payments.csv", index=False)
+        # ── Orders + Order Items + Payments ──────────────────────────
+        for first in range(1, num_orders + 1, chunk_size):
+            tables = _order_chunk(
+                rng, first, min(chunk_size, num_orders + 1 - first), num_order_items + 1,
+                num_customers=num_customers, locations=locations, menu=menu_df,
+                start=start, day_probabilities=day_probabilities,
+            )
+            for name, df in zip(("orders", "order_items", "payments"), tables):
+                sink.write(name, df)
+            num_order_items += len(tables[1])
 
     print(f"Generated: {len(categories_df)} categories, {len(menu_df)} menu items, "
-          f"{len(customers_df)} customers, {len(staff_df)} staff, "
-          f"{len(orders_df)} orders, {len(order_items_df)} order items, "
-          f"{len(payments_df)} payments")
+          f"{num_customers} customers, {len(staff_df)} staff, "
+          f"{num_orders} orders, {num_order_items} order items, "
+          f"{num_orders} payments")
 
 
 if __name__ == "__main__":
-    generate(Path("data/raw"))
+    parser = argparse.ArgumentParser(description="Generate sample restaurant CSVs")
+    parser.add_argument("--output", type=Path, default=Path("data/raw"))
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--locations", type=int, default=len(LOCATIONS))
+    parser.add_argument("--days", type=int, default=None, help="default: March 2022 to March 2023")
+    parser.add_argument("--items", type=int, default=None, help="menu size (default: 45)")
+    parser.add_argument(
+        "--seasonality", type=float, default=0.0,
+        help="amplitude (0-1) of a yearly demand cycle peaking in December",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, metavar="ORDERS")
+    args = parser.parse_args()
+    generate(
+        args.output, args.customers, args.orders,
+        num_locations=args.locations, num_days=args.days, num_items=args.items,
+        seasonality=args.seasonality, seed=args.seed, chunk_size=args.chunk_size,
+    )
@@ -0,0 +1,230 @@
+"""Mergeable sketches: HyperLogLog distinct counts and t-digest quantiles.
+
+A sketch of precision ``p`` keeps ``m = 2**p`` one-byte registers. The
+union of two sketches is their element-wise maximum, so sketches built
+per day can be merged into any window without revisiting the rows. The
+estimate has a relative standard error of ``1.04 / sqrt(m)`` (1.6% at the
+default ``p = 12``, 4 KiB per sketch); about 99% of estimates fall within
+three standard errors. Below ``2.5 * m`` distinct values the small-range
+(linear counting) correction applies, which is close to exact.
+
+A t-digest summarizes a distribution as weighted centroids that are
+small near the tails, so extreme quantiles stay accurate. Digests merge
+by pooling their centroids and compressing again. At the default
+compression of 100 the rank error is well under 1% at p50/p90/p99.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 12
+
+_MASK = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads integer ids over all 64 bits."""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (z ^ (z >> np.uint64(31))) & _MASK
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    length = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        values[high] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def register_updates(ids: pd.Series | np.ndarray, precision: int) -> tuple[np.ndarray, np.ndarray]:
+    """Register index and rank for each integer id (missing ids must be dropped)."""
+    hashed = _mix64(np.asarray(ids, dtype=np.int64).view(np.uint64))
+    index = (hashed >> np.uint64(64 - precision)).astype(np.int64)
+    remainder = (hashed << np.uint64(precision)) & _MASK
+    # Rank is the position of the first set bit in the remaining bits.
+    rank = 64 - _bit_length(remainder) + 1
+    return index, np.minimum(rank, 64 - precision + 1).astype(np.uint8)
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """Distinct-count estimate of each sketch along the last axis."""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def relative_error(precision: int = DEFAULT_PRECISION) -> float:
+    """Relative standard error of a sketch with ``2**precision`` registers."""
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+@dataclass
+class HyperLogLog:
+    """A single mergeable distinct-count sketch over integer ids."""
+    precision: int = DEFAULT_PRECISION
+    registers: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 4 <= self.precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {self.precision}")
+        if self.registers is None:
+            self.registers = np.zeros(2 ** self.precision, dtype=np.uint8)
+        elif len(self.registers) != 2 ** self.precision:
+            raise ValueError("registers do not match the precision")
+
+    def add(self, ids: pd.Series | np.ndarray) -> HyperLogLog:
+        ids = pd.Series(ids).dropna()
+        index, rank = register_updates(ids.to_numpy(dtype=np.int64), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: HyperLogLog) -> HyperLogLog:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def count(self) -> float:
+        return float(estimate(self.registers)[0])
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> HyperLogLog:
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(int(np.log2(len(registers))), registers)
+
+
+# ── Quantile sketches ────────────────────────────────────────────────
+
+DEFAULT_COMPRESSION = 100
+
+
+def compress_centroids(
+    centroids: pd.DataFrame, by: list[str] = (), compression: float = DEFAULT_COMPRESSION
+) -> pd.DataFrame:
+    """Merge the ``mean``/``weight`` centroids of each ``by`` group into a t-digest.
+
+    Neighbouring centroids are combined while they fall within one unit of
+    the arcsine scale function, which keeps clusters small near the tails
+    (accurate p99) and bounds each digest to about ``compression / 2``
+    centroids. Groups of at most ``compression`` centroids are left as
+    they are, so small digests stay exact. The smallest and largest
+    centroid of a group are never merged, so the exact minimum and maximum
+    survive every merge.
+    """
+    by = list(by)
+    frame = centroids.sort_values([*by, "mean"], kind="stable").reset_index(drop=True)
+    if by:
+        groups = frame.groupby(by, dropna=False, sort=False)
+        cumulative = groups["weight"].cumsum()
+        total = groups["weight"].transform("sum")
+        size = groups["weight"].transform("size")
+        position = groups.cumcount()
+    else:
+        cumulative = frame["weight"].cumsum()
+        total = frame["weight"].sum()
+        size = len(frame)
+        position = pd.Series(np.arange(len(frame)))
+    q = ((cumulative - frame["weight"] / 2) / total).clip(0, 1)
+    cluster = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+    cluster = np.where(position == 0, -compression, np.where(position == size - 1, compression, cluster))
+    # Digests that are already small enough are kept as they are.
+    frame["cluster"] = np.where(size <= compression, position, cluster)
+    frame["weighted"] = frame["mean"] * frame["weight"]
+    merged = (
+        frame.groupby([*by, "cluster"], dropna=False, sort=False)
+        .agg(weighted=("weighted", "sum"), weight=("weight", "sum"))
+        .reset_index()
+    )
+    merged["mean"] = merged["weighted"] / merged["weight"]
+    return merged[[*by, "mean", "weight"]]
+
+
+def centroid_quantiles(means: np.ndarray, weights: np.ndarray, q: np.ndarray | list[float]) -> np.ndarray:
+    """Quantiles of one sorted digest, interpolated between centroid centres.
+
+    With unit weights (an uncompressed digest) this is exactly
+    ``numpy.percentile``'s linear method.
+    """
+    total = weights.sum()
+    if total == 0:
+        return np.full(len(np.atleast_1d(q)), np.nan)
+    centres = np.cumsum(weights) - weights / 2
+    position = 0.5 + np.asarray(q, dtype=float) * (total - 1)
+    return np.interp(position, centres, means)
+
+
+def grouped_quantiles(
+    centroids: pd.DataFrame, by: list[str], q: np.ndarray | list[float]
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """:func:`centroid_quantiles` for every ``by`` group at once.
+
+    Returns the group keys (sorted, with each group's total ``weight``)
+    and an array of their quantiles, one row per group. The groups are
+    laid end to end on one weight axis, and each position is clamped to
+    its own group's centres, so a single interpolation serves them all.
+    """
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    if by:
+        codes = centroids.groupby(by, dropna=False, sort=True).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(centroids), dtype=np.int64)
+    means = centroids["mean"].to_numpy(dtype=float)
+    order = np.lexsort((means, codes))
+    codes, means = codes[order], means[order]
+    weights = centroids["weight"].to_numpy(dtype=float)[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(codes) != 0])
+    ends = np.r_[starts[1:], len(codes)] - 1
+    cumulative = np.cumsum(weights)
+    centres = cumulative - weights / 2
+    totals = np.add.reduceat(weights, starts)
+    offsets = cumulative[starts] - weights[starts]
+    position = offsets[:, None] + 0.5 + q[None, :] * (totals[:, None] - 1)
+    position = np.clip(position, centres[starts][:, None], centres[ends][:, None])
+    values = np.interp(position.ravel(), centres, means).reshape(position.shape)
+    keys = centroids.iloc[order[starts]][list(by)].reset_index(drop=True)
+    return keys.assign(weight=totals), values
+
+
+@dataclass
+class TDigest:
+    """A single mergeable quantile sketch (merging t-digest)."""
+    compression: float = DEFAULT_COMPRESSION
+    centroids: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame({"mean": [], "weight": []}), repr=False
+    )
+
+    def add(self, values: pd.Series | np.ndarray) -> TDigest:
+        values = pd.Series(values, dtype=float).dropna()
+        incoming = pd.DataFrame({"mean": values.to_numpy(), "weight": 1.0})
+        self.centroids = compress_centroids(
+            pd.concat([self.centroids, incoming], ignore_index=True), compression=self.compression
+        )
+        return self
+
+    def merge(self, other: TDigest) -> TDigest:
+        combined = pd.concat([self.centroids, other.centroids], ignore_index=True)
+        return TDigest(self.compression, compress_centroids(combined, compression=self.compression))
+
+    @property
+    def weight(self) -> float:
+        """Number of values summarized."""
+        return float(self.centroids["weight"].sum())
+
+    def quantile(self, q: float | list[float]) -> np.ndarray:
+        return centroid_quantiles(
+            self.centroids["mean"].to_numpy(), self.centroids["weight"].to_numpy(), np.atleast_1d(q)
+        )
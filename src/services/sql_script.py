@@ -0,0 +1,44 @@
+"""Splitting of multi-statement SQL scripts.
+
+A plain ``split(";")`` breaks trigger bodies (``BEGIN ... END``) and
+PostgreSQL dollar-quoted function bodies, so statements are only split on
+semicolons outside comments, string literals, dollar quotes and
+``BEGIN``/``CASE ... END`` blocks.
+"""
+from __future__ import annotations
+
+import re
+
+_TOKEN = re.compile(
+    r"(--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\$\w*\$|;|\b(?:BEGIN|CASE|END)\b)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def split_statements(script: str) -> list[str]:
+    statements: list[str] = []
+    current: list[str] = []
+    depth = 0
+    dollar: str | None = None
+    for token in _TOKEN.split(script):
+        upper = token.upper()
+        if dollar is not None:
+            if token == dollar:
+                dollar = None
+        elif token.startswith("$") and token.endswith("$") and len(token) > 1:
+            dollar = token
+        elif upper in ("BEGIN", "CASE"):
+            depth += 1
+        elif upper == "END":
+            depth = max(depth - 1, 0)
+        elif token == ";" and depth == 0:
+            statements.append("".join(current))
+            current = []
+            continue
+        current.append(token)
+    statements.append("".join(current))
+    return [s.strip() for s in statements if _has_code(s)]
+
+
+def _has_code(statement: str) -> bool:
+    return bool(re.sub(r"--[^\n]*|/\*.*?\*/", "", statement, flags=re.DOTALL).strip())
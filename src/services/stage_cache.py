@@ -0,0 +1,188 @@
+"""Content-hash cache of pipeline stage outputs.
+
+Each stage is keyed by a fingerprint of everything it reads: the content
+hash of its input files, the source of the ``src`` package, its options
+and the key of the stage before it. A stage whose key is already cached
+is skipped. Stages that produce frames get them back from Parquet;
+stages whose output lives elsewhere (staged files, the database, the
+exports) are cached as markers. Such a stage keeps a single entry, which
+the caller invalidates before redoing the stage, so a marker never
+outlives the output it stands for. Entries beyond ``max_bytes`` are
+evicted least recently used first.
+
+File hashes are memoized by size and modification time, so an unchanged
+raw file is not re-read just to be fingerprinted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+_PACKAGE = Path(__file__).resolve().parents[1]
+_BLOCK = 1 << 20
+
+
+def fingerprint(*parts: object) -> str:
+    """Stable hex digest of the ``repr`` of ``parts``."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Digest of a frame's columns, dtypes and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(df.columns), list(df.dtypes.astype(str)))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(package: Path = _PACKAGE) -> str:
+    """Digest of every Python source file in ``package``."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(package.rglob("*.py")):
+        digest.update(path.relative_to(package).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedStage:
+    frames: dict[str, pd.DataFrame | None]
+    meta: dict
+
+
+@dataclass
+class StageCache:
+    """Stage outputs under ``directory``, bounded to about ``max_bytes``.
+
+    With ``enabled`` false nothing is hashed, read or stored: every
+    :meth:`load` misses and :meth:`store` does nothing, while
+    :meth:`invalidate` still drops the entries a redone stage replaces.
+    """
+    directory: Path
+    max_bytes: int = 2**30
+    enabled: bool = True
+    _digests: dict | None = field(default=None, init=False, repr=False)
+
+    @property
+    def _digest_path(self) -> Path:
+        return self.directory / "file_digests.json"
+
+    def file_digest(self, path: Path) -> str | None:
+        """Content hash of ``path`` (``None`` if it does not exist)."""
+        if not path.exists():
+            return None
+        if self._digests is None:
+            self._digests = (
+                json.loads(self._digest_path.read_text(encoding="utf-8"))
+                if self._digest_path.exists() else {}
+            )
+        stat = path.stat()
+        name = str(path.resolve())
+        known = self._digests.get(name)
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+        digest = _hash_file(path)
+        self._digests[name] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _replace_text(self._digest_path, json.dumps(self._digests))
+        return digest
+
+    def key(self, *parts: object, files: Sequence[Path] = ()) -> str:
+        """Fingerprint of ``parts`` and the contents of ``files``."""
+        if not self.enabled:
+            return ""
+        return fingerprint(*parts, [(Path(f).name, self.file_digest(Path(f))) for f in files])
+
+    def _entry(self, stage: str, key: str) -> Path:
+        return self.directory / f"{stage}-{key}"
+
+    def load(self, stage: str, key: str, requires: Sequence[Path] = ()) -> CachedStage | None:
+        """The cached outputs of ``stage``, if ``key`` matches and every
+        path in ``requires`` still exists."""
+        if not self.enabled:
+            return None
+        manifest = self._entry(stage, key) / "manifest.json"
+        if not manifest.exists() or not all(Path(p).exists() for p in requires):
+            return None
+        payload = json.loads(manifest.read_text(encoding="utf-8"))
+        frames = {
+            name: pd.read_parquet(manifest.parent / f"{name}.parquet") if stored else None
+            for name, stored in payload["frames"].items()
+        }
+        os.utime(manifest)
+        return CachedStage(frames=frames, meta=payload["meta"])
+
+    def store(
+        self,
+        stage: str,
+        key: str,
+        frames: dict[str, pd.DataFrame | None] | None = None,
+        meta: dict | None = None,
+    ) -> None:
+        """Record the outputs of ``stage``; a stage without frames is a marker."""
+        if not self.enabled:
+            return
+        frames = frames or {}
+        tmp = self.directory / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        for name, frame in frames.items():
+            if frame is not None:
+                frame.to_parquet(tmp / f"{name}.parquet", compression="zstd")
+        payload = {
+            "frames": {name: frame is not None for name, frame in frames.items()},
+            "meta": meta or {},
+        }
+        (tmp / "manifest.json").write_text(json.dumps(payload), encoding="utf-8")
+        entry = self._entry(stage, key)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self._evict(keep=entry)
+
+    def invalidate(self, *stages: str) -> None:
+        """Drop every entry of ``stages``."""
+        if not self.directory.exists():
+            return
+        for stage in stages:
+            for entry in self.directory.glob(f"{stage}-*"):
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        for entry in self.directory.iterdir():
+            manifest = entry / "manifest.json"
+            if manifest.exists():
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((manifest.stat().st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+
+def _replace_text(path: Path, text: str) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,211 @@
+"""Parquet staging layer for the enriched order detail table.
+
+The detail table, and the order-grain fact table built from it, are each
+written as a zstd-compressed Parquet dataset with hive-style
+``year=YYYY/month=M`` partitions derived from ``order_timestamp``. The
+readers project only the requested columns and skip every month outside
+the requested range, so KPI and notebook code reads just what it needs.
+
+A load's files can be named after it (``part``), so its delta alone can
+be read back or replaced. The other ingested tables and the computed KPI
+tables are staged too, one Parquet file each, for the database load and
+export run in another process (:func:`write_tables`, :func:`write_kpis`).
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+PARTITION_COLUMNS = ("year", "month")
+
+
+def write_order_detail(
+    detail: pd.DataFrame, path: Path, append: bool = False, part: str | None = None
+) -> None:
+    """Write ``detail`` under ``path``; without ``append`` it replaces the dataset.
+
+    Files are named after ``part`` when one is given, so writing the same
+    part again overwrites it instead of adding a second copy.
+    """
+    _write_partitioned(detail, path, append, part)
+
+
+def write_order_facts(
+    facts: pd.DataFrame, path: Path, append: bool = False, part: str | None = None
+) -> None:
+    """Write the order fact table under ``path``, partitioned like the detail."""
+    _write_partitioned(facts, path, append, part)
+
+
+def remove_part(path: Path, part: str) -> int:
+    """Delete the files of ``part`` (and its ``part-*`` sub-parts) under
+    ``path``; returns how many there were."""
+    stale = list(path.glob(f"*/*/{part}-*.parquet")) if path.exists() else []
+    for file in stale:
+        file.unlink()
+    return len(stale)
+
+
+def _write_partitioned(df: pd.DataFrame, path: Path, append: bool, part: str | None) -> None:
+    if not append and path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True, exist_ok=True)
+    timestamps = df["order_timestamp"]
+    table = pa.Table.from_pandas(
+        df.assign(year=timestamps.dt.year, month=timestamps.dt.month),
+        preserve_index=False,
+    )
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(
+            table.select(list(PARTITION_COLUMNS)).schema, flavor="hive"
+        ),
+        basename_template=f"{part or 'part-' + uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+
+
+def _month_filter(start: date | None, end: date | None) -> ds.Expression | None:
+    year, month = ds.field("year"), ds.field("month")
+    conditions = []
+    if start is not None:
+        conditions.append((year > start.year) | ((year == start.year) & (month >= start.month)))
+    if end is not None:
+        conditions.append((year < end.year) | ((year == end.year) & (month <= end.month)))
+    if not conditions:
+        return None
+    combined = conditions[0]
+    for condition in conditions[1:]:
+        combined = combined & condition
+    return combined
+
+
+def read_order_detail(
+    path: Path,
+    columns: Sequence[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    part: str | Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Read the staged detail table.
+
+    ``columns`` limits the columns read from disk; ``start`` and ``end``
+    are inclusive order dates. Months outside the range are pruned by
+    partition, and rows are then filtered to the exact dates. ``part``
+    reads only the files written under that name (or those names).
+    """
+    return _read_partitioned(path, columns, start, end, part)
+
+
+def iter_order_detail(
+    path: Path,
+    columns: Sequence[str] | None = None,
+    part: str | Sequence[str] | None = None,
+    batch_size: int = 100_000,
+) -> Iterator[pd.DataFrame]:
+    """Like :func:`read_order_detail`, as frames of at most ``batch_size`` rows."""
+    dataset = _dataset(path, part)
+    if dataset is None:
+        return
+    for batch in dataset.to_batches(columns=_columns(dataset, columns), batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def read_order_facts(
+    path: Path,
+    columns: Sequence[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    part: str | Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Read the staged order fact table, with the same pruning as the detail."""
+    return _read_partitioned(path, columns, start, end, part)
+
+
+def _dataset(path: Path, part: str | Sequence[str] | None) -> ds.Dataset | None:
+    """The staged dataset, or just the files of ``part`` (or of several
+    parts); ``None`` if it has none."""
+    if part is None:
+        return ds.dataset(path, format="parquet", partitioning="hive")
+    parts = [part] if isinstance(part, str) else part
+    files = sorted(str(f) for p in parts for f in path.glob(f"*/*/{p}-*.parquet"))
+    if not files:
+        return None
+    return ds.dataset(files, format="parquet", partitioning="hive", partition_base_dir=str(path))
+
+
+def _columns(dataset: ds.Dataset, columns: Sequence[str] | None) -> list[str]:
+    if columns is None:
+        return [n for n in dataset.schema.names if n not in PARTITION_COLUMNS]
+    return list(columns)
+
+
+def _read_partitioned(
+    path: Path,
+    columns: Sequence[str] | None,
+    start: date | None,
+    end: date | None,
+    part: str | Sequence[str] | None = None,
+) -> pd.DataFrame:
+    dataset = _dataset(path, part)
+    if dataset is None:
+        return pd.DataFrame(columns=list(columns or ()))
+    row_filter = _month_filter(start, end)
+    timestamp = ds.field("order_timestamp")
+    if start is not None:
+        row_filter = row_filter & (timestamp >= pd.Timestamp(start))
+    if end is not None:
+        row_filter = row_filter & (timestamp < pd.Timestamp(end + timedelta(days=1)))
+    table = dataset.to_table(columns=_columns(dataset, columns), filter=row_filter)
+    return table.to_pandas()
+
+
+# ── Ingested and KPI tables ──────────────────────────────────────────
+
+def write_tables(tables: dict[str, pd.DataFrame], path: Path) -> None:
+    """Stage ``tables`` under ``path``, replacing the tables staged before."""
+    path.mkdir(parents=True, exist_ok=True)
+    tag = uuid.uuid4().hex[:8]
+    files = {name: f"{name}-{tag}.parquet" for name in tables}
+    for name, df in tables.items():
+        df.to_parquet(path / files[name], index=False, compression="zstd")
+    # The index is replaced last, so readers never see a half-written set.
+    index = path / "index.json"
+    tmp = index.with_suffix(".tmp")
+    tmp.write_text(json.dumps(files), encoding="utf-8")
+    os.replace(tmp, index)
+    for stale in path.glob("*.parquet"):
+        if stale.name not in files.values():
+            stale.unlink()
+
+
+def read_tables(path: Path) -> dict[str, pd.DataFrame]:
+    """The staged tables in the order they were written; empty if none."""
+    index = path / "index.json"
+    if not index.exists():
+        return {}
+    files = json.loads(index.read_text(encoding="utf-8"))
+    return {name: pd.read_parquet(path / file) for name, file in files.items()}
+
+
+def write_kpis(kpis: dict[str, pd.DataFrame], path: Path) -> None:
+    """Stage the KPI tables for the export; see :func:`write_tables`."""
+    write_tables(kpis, path)
+
+
+def read_kpis(path: Path) -> dict[str, pd.DataFrame]:
+    """The staged KPI tables; see :func:`read_tables`."""
+    return read_tables(path)
@@ -0,0 +1,131 @@
+"""Bounded-memory ingestion of order_items.
+
+``order_items.csv`` is read in fixed-size chunks instead of all at once.
+Each chunk is enriched against the in-memory order lookup and folded into
+:class:`StreamingAggregator`, whose partial aggregates (menu sums and
+per-chunk order facts) combine into the same :class:`DetailAggregates`
+and order fact table the in-memory path builds.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.models.schema import read_table
+from src.services.kpi_calculator import DetailAggregates
+from src.services.order_facts import build_order_facts, merge_order_facts
+
+if TYPE_CHECKING:
+    from src.services.validator import ValidationEngine
+
+
+class _SeenIds:
+    """Remembers ids across chunks; a bitmap for dense non-negative ints."""
+
+    def __init__(self) -> None:
+        self._bitmap = np.zeros(0, dtype=bool)
+        self._other: set = set()
+
+    def first_seen(self, ids: pd.Series) -> pd.Series:
+        mask = ~ids.duplicated()
+        values = ids.to_numpy()
+        if len(values) and pd.api.types.is_integer_dtype(ids) and values.min() >= 0:
+            if values.max() >= len(self._bitmap):
+                grown = np.zeros(max(values.max() + 1, 2 * len(self._bitmap)), dtype=bool)
+                grown[:len(self._bitmap)] = self._bitmap
+                self._bitmap = grown
+            mask &= ~self._bitmap[values]
+            self._bitmap[values[mask.to_numpy()]] = True
+        else:
+            mask &= ~ids.isin(self._other)
+            self._other.update(ids[mask])
+        return mask
+
+
+@dataclass
+class OrderItemChunks:
+    """Re-iterable stream of deduplicated ``order_items`` chunks.
+
+    ``order_ids`` restricts the stream to those orders, e.g. the new
+    orders of an incremental run. With a ``validator`` each chunk is
+    validated before that filter; the first pass records the report and
+    quarantined rows, later passes only drop them. The first pass also
+    records the highest ``order_item_id`` and, as ``late``, how many rows
+    beyond ``late_after`` that filter dropped.
+    """
+    path: Path
+    chunk_size: int = 100_000
+    order_ids: pd.Series | None = None
+    validator: ValidationEngine | None = None
+    late_after: int | None = None
+    max_key: int | None = field(default=None, init=False)
+    late: int = field(default=0, init=False)
+    _passes: int = field(default=0, init=False, repr=False)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        seen = _SeenIds()
+        record = self._passes == 0
+        self._passes += 1
+        for i, chunk in enumerate(read_table(self.path, "order_items", chunksize=self.chunk_size)):
+            chunk = chunk.loc[seen.first_seen(chunk["order_item_id"])]
+            if self.validator is not None:
+                chunk = self.validator.validate("order_items", chunk, record=record, append=i > 0)
+            if record and not chunk.empty:
+                key = int(chunk["order_item_id"].max())
+                self.max_key = key if self.max_key is None else max(self.max_key, key)
+            if self.order_ids is not None:
+                new = chunk["order_id"].isin(self.order_ids)
+                if record and self.late_after is not None:
+                    self.late += int((~new & (chunk["order_item_id"] > self.late_after)).sum())
+                chunk = chunk.loc[new]
+            if not chunk.empty:
+                yield chunk
+
+
+@dataclass
+class StreamingAggregator:
+    """Folds enriched detail chunks into mergeable partial aggregates.
+
+    Menu totals are merged as each chunk arrives. Orders can straddle
+    chunks, so each chunk's order facts are kept and merged once, in
+    :meth:`order_facts`, before the hourly order counts are derived.
+    ``dimensions`` are passed through to :meth:`DetailAggregates.from_detail`.
+    """
+    dimensions: tuple[str, ...] = ()
+    _aggregates: DetailAggregates | None = field(default=None, init=False)
+    _order_facts: list[pd.DataFrame] = field(default_factory=list, init=False)
+    _merged_facts: pd.DataFrame | None = field(default=None, init=False)
+    rows: int = field(default=0, init=False)
+
+    def add(self, detail: pd.DataFrame) -> None:
+        facts = None
+        if {"order_id", "line_total"}.issubset(detail.columns):
+            facts = build_order_facts(detail, self.dimensions)
+            self._order_facts.append(facts)
+            self._merged_facts = None
+        part = DetailAggregates.from_detail(detail, self.dimensions, orders=facts)
+        self._aggregates = (
+            part if self._aggregates is None
+            else DetailAggregates.merge([self._aggregates, part])
+        )
+        self.rows += len(detail)
+
+    def order_facts(self) -> pd.DataFrame | None:
+        """The order-grain fact table of every chunk added so far."""
+        if self._merged_facts is None and self._order_facts:
+            self._merged_facts = merge_order_facts(self._order_facts)
+            self._order_facts = [self._merged_facts]
+        return self._merged_facts
+
+    def result(self) -> DetailAggregates:
+        if self._aggregates is None:
+            return DetailAggregates()
+        hourly = self._aggregates.hourly
+        orders = self.order_facts()
+        if orders is not None:
+            hourly = DetailAggregates.from_orders(orders, self.dimensions).hourly
+        return DetailAggregates(hourly=hourly, menu=self._aggregates.menu)
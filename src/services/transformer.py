@@ -1,22 +1,202 @@
+"""Row-level transforms applied after validation.
+
+:class:`TimestampNormalizer` parses timestamp columns in three steps. It
+detects the format from a sample of the column (the first of
+:data:`TIMESTAMP_FORMATS` that parses the most sampled values), parses
+the whole column with that fixed format in Arrow, and infers formats
+only for the values that failed. When the sample shows repeated strings,
+each distinct string is parsed once and the results are mapped back.
+Values that parse under no format become ``NaT`` and are counted in
+:attr:`TimestampNormalizer.reports`, with examples. With ``timezones``
+the local times are converted to naive UTC, per location.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Candidates for format detection, in order of preference on ties (so
+# an ambiguous day/month sample reads as day first).
+TIMESTAMP_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%d-%m-%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M:%S",
+)
+_UNIT = "datetime64[us]"
+
+
+@dataclass
+class ParseReport:
+    """How one column's timestamps were parsed.
+
+    ``parsed`` values matched the detected ``format``, ``inferred`` ones
+    needed per-value inference and ``failed`` ones are ``NaT`` now
+    (``examples`` holds a few). ``ambiguous`` local times, repeated when
+    clocks go back, are ``NaT`` too. Empty values are not failures.
+    """
+    column: str
+    rows: int
+    format: str | None = None
+    cached: bool = False
+    parsed: int = 0
+    inferred: int = 0
+    failed: int = 0
+    ambiguous: int = 0
+    examples: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.column}: {self.parsed:,} parsed as {self.format or 'inferred formats'}, "
+            f"{self.inferred:,} inferred, {self.failed:,} unparseable"
+        )
+        if self.examples:
+            text += f" (e.g. {', '.join(map(repr, self.examples))})"
+        if self.ambiguous:
+            text += f", {self.ambiguous:,} ambiguous local times"
+        return text
 
 
 @dataclass
 class TimestampNormalizer:
     timestamp_columns: Iterable[str]
+    formats: Sequence[str] = TIMESTAMP_FORMATS
+    sample_size: int = 10_000
+    # Location -> IANA zone; timestamps of mapped locations become UTC.
+    timezones: Mapping[str, str] | None = None
+    location_column: str = "location"
+    max_examples: int = 5
+    reports: dict[str, ParseReport] = field(default_factory=dict, init=False)
 
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
-        transformed = df.copy()
+        # Columns are replaced on a shallow copy: no other column is copied
+        # and the caller's frame is left as it was.
+        transformed = df.copy(deep=False)
+        self.reports = {}
         for column in self.timestamp_columns:
-            if column in transformed.columns:
-                transformed[column] = pd.to_datetime(transformed[column], errors="coerce")
+            if column not in transformed.columns:
+                continue
+            report = ParseReport(column, len(transformed))
+            values = self._parse(transformed[column], report)
+            if self.timezones and self.location_column in transformed.columns:
+                values = self._to_utc(values, transformed[self.location_column], report)
+            transformed[column] = values
+            self.reports[column] = report
         return transformed
 
+    # ── Parsing ──────────────────────────────────────────────────────
+
+    def _parse(self, values: pd.Series, report: ParseReport) -> pd.Series:
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            report.parsed = int(values.notna().sum())
+            return values
+        if not (pd.api.types.is_string_dtype(values.dtype) or isinstance(values.dtype, pd.CategoricalDtype)):
+            parsed = pd.to_datetime(values, errors="coerce")
+            report.inferred = int(parsed.notna().sum())
+            report.failed = int(values.notna().sum()) - report.inferred
+            return parsed
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories.astype(object)
+            report.cached = True
+        else:
+            sample = values.iloc[:: max(1, len(values) // self.sample_size)]
+            report.cached = sample.nunique() < len(sample) // 2
+            if report.cached:
+                codes, uniques = pd.factorize(values)
+        if report.cached:
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            parsed = self._parse_strings(pd.Series(uniques, dtype=object), report, counts)
+            # Missing values have code -1, which picks the trailing NaT.
+            lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", "us"))
+            return pd.Series(lookup[codes], index=values.index, name=values.name)
+        parsed = self._parse_strings(values, report)
+        parsed.index = values.index
+        parsed.name = values.name
+        return parsed
+
+    def _parse_strings(
+        self, values: pd.Series, report: ParseReport, counts: np.ndarray | None = None
+    ) -> pd.Series:
+        """Parse ``values`` (each standing for ``counts`` rows, if given)."""
+        strings = pa.array(values, type=pa.string(), from_pandas=True)
+        report.format = self._detect_format(strings)
+        if report.format is not None:
+            fixed = pc.strptime(strings, format=report.format, unit="us", error_is_null=True)
+            parsed = pd.Series(fixed.to_pandas(), dtype=_UNIT)
+        else:
+            parsed = pd.Series(np.full(len(values), np.datetime64("NaT"), dtype=_UNIT))
+        weights = np.ones(len(values), dtype=np.int64) if counts is None else counts
+        missed = parsed.isna().to_numpy()
+        report.parsed = int(weights[~missed].sum())
+        if not missed.any():
+            return parsed
+
+        # Only the values the fixed format missed pay for inference; empty
+        # and missing ones stay NaT without counting as failures.
+        rows = np.flatnonzero(missed)
+        candidates = pd.Series(strings.take(pa.array(rows)).to_pandas(), dtype=object).str.strip()
+        present = (candidates.fillna("") != "").to_numpy()
+        rows, candidates = rows[present], candidates[present]
+        inferred = pd.to_datetime(candidates, errors="coerce", format="mixed", utc=True)
+        inferred = inferred.dt.tz_localize(None).astype(_UNIT)
+        parsed.iloc[rows] = inferred.to_numpy()
+        ok = inferred.notna().to_numpy()
+        retried = weights[rows]
+        report.inferred = int(retried[ok].sum())
+        report.failed = int(retried[~ok].sum())
+        report.examples = candidates[~ok].drop_duplicates().head(self.max_examples).tolist()
+        return parsed
+
+    def _detect_format(self, strings: pa.Array) -> str | None:
+        if len(strings) > self.sample_size:
+            strings = strings.take(pa.array(np.arange(0, len(strings), len(strings) // self.sample_size)))
+        present = strings.filter(pc.greater(pc.utf8_length(strings), 0))
+        if len(present) == 0:
+            return None
+        best, best_count = None, 0
+        for fmt in self.formats:
+            count = len(present) - pc.strptime(
+                present, format=fmt, unit="s", error_is_null=True
+            ).null_count
+            if count > best_count:
+                best, best_count = fmt, count
+            if best_count == len(present):
+                break
+        return best
+
+    # ── Time zones ───────────────────────────────────────────────────
+
+    def _to_utc(self, values: pd.Series, locations: pd.Series, report: ParseReport) -> pd.Series:
+        """Local times -> naive UTC, one vectorized call per time zone."""
+        zones = locations.astype(object).map(self.timezones)
+        codes, names = pd.factorize(zones)
+        result = values.to_numpy(copy=True)
+        for code, zone in enumerate(names):
+            rows = np.flatnonzero(codes == code)
+            local = pd.DatetimeIndex(result[rows]).tz_localize(
+                zone, ambiguous="NaT", nonexistent="shift_forward"
+            )
+            report.ambiguous += int(local.isna().sum() - pd.isna(result[rows]).sum())
+            result[rows] = local.tz_convert("UTC").tz_localize(None).to_numpy()
+        return pd.Series(result, index=values.index, name=values.name)
+
 
 @dataclass
 class Deduplicator:
@@ -24,4 +204,3 @@ class Deduplicator:
 
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         return df.drop_duplicates(subset=list(self.subset)).copy()
-
@@ -1,10 +1,34 @@
+"""Validation of the raw tables before they are staged and loaded.
+
+:data:`TABLE_RULES` mirrors ``sql/schema/create_tables_sqlite.sql`` for
+the seven raw tables: keys (which must be unique), NOT NULL columns and
+defaults, CHECK and UNIQUE constraints and foreign keys. :class:`ValidationEngine` checks a
+table in one vectorized pass: text in number or timestamp columns is
+coerced (and counted when it does not parse), every rule yields a row
+mask, and foreign keys are looked up in a hash index of the parent's
+valid keys. Failing rows are removed and written, with their reasons,
+to ``<quarantine_dir>/<table>.csv``, so a bad row never fails the
+database load halfway. Parents are validated before their children,
+so rows referencing a quarantined row are quarantined too.
+
+:class:`OrderValidator` and :class:`MenuItemValidator` are the earlier
+single-table validators.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
+import operator
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Protocol
 
+import numpy as np
 import pandas as pd
 
+from src.models.schema import TABLE_SCHEMAS
+from src.services.instrumentation import observe
+from src.services.transformer import ParseReport, TimestampNormalizer
+
 
 class Validator(Protocol):
     def validate(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -32,3 +56,295 @@ class MenuItemValidator:
             raise ValueError(f"Missing required columns: {missing}")
         return df.dropna(subset=["item_name", "unit_price"]).copy()
 
+
+# ── Rules ────────────────────────────────────────────────────────────
+
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+@dataclass(frozen=True)
+class Check:
+    """A CHECK constraint on one column, e.g. ``Check("quantity", ">", 0)``."""
+    column: str
+    op: str
+    value: float
+
+    def __str__(self) -> str:
+        return f"{self.column} {self.op} {self.value:g}"
+
+    def violations(self, values: pd.Series) -> np.ndarray:
+        # Missing values are left to the NOT NULL rules.
+        return (values.notna() & ~_OPERATORS[self.op](values, self.value)).to_numpy()
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    column: str
+    table: str
+    references: str
+
+
+@dataclass(frozen=True)
+class TableRules:
+    """Constraints of one raw table.
+
+    ``required`` columns (and the key) must be present; the other rules
+    apply to the columns the file has. The key, foreign keys and
+    ``numeric`` columns are coerced to numbers, ``timestamps`` are parsed,
+    and NULLs in a column with a default take the default.
+    """
+    key: str
+    required: tuple[str, ...] = ()
+    not_null: tuple[str, ...] = ()
+    numeric: tuple[str, ...] = ()
+    timestamps: tuple[str, ...] = ()
+    checks: tuple[Check, ...] = ()
+    unique: tuple[str, ...] = ()
+    foreign_keys: tuple[ForeignKey, ...] = ()
+    defaults: Mapping[str, object] = field(default_factory=dict)
+
+
+# In dependency order: every table comes after the tables it references.
+TABLE_RULES: dict[str, TableRules] = {
+    "categories": TableRules(
+        "category_id", not_null=("category_name",), unique=("category_name",),
+    ),
+    "customers": TableRules("customer_id", not_null=("created_at",), unique=("email",)),
+    "staff": TableRules("staff_id"),
+    "menu_items": TableRules(
+        "menu_item_id",
+        required=("item_name", "unit_price"),
+        not_null=("category_id", "item_name", "unit_price"),
+        numeric=("unit_price",),
+        checks=(Check("unit_price", ">=", 0),),
+        foreign_keys=(ForeignKey("category_id", "categories", "category_id"),),
+    ),
+    "orders": TableRules(
+        "order_id",
+        required=("order_timestamp",),
+        not_null=("order_timestamp",),
+        timestamps=("order_timestamp",),
+        foreign_keys=(
+            ForeignKey("customer_id", "customers", "customer_id"),
+            ForeignKey("staff_id", "staff", "staff_id"),
+        ),
+        defaults={"order_status": "completed"},
+    ),
+    "order_items": TableRules(
+        "order_item_id",
+        required=("order_id", "menu_item_id", "quantity", "item_price"),
+        not_null=("order_id", "menu_item_id", "quantity", "item_price"),
+        numeric=("quantity", "item_price"),
+        checks=(Check("quantity", ">", 0), Check("item_price", ">=", 0)),
+        foreign_keys=(
+            ForeignKey("order_id", "orders", "order_id"),
+            ForeignKey("menu_item_id", "menu_items", "menu_item_id"),
+        ),
+    ),
+    "payments": TableRules(
+        "payment_id",
+        required=("order_id",),
+        not_null=("order_id", "payment_method", "payment_amount", "payment_timestamp"),
+        numeric=("payment_amount",),
+        checks=(Check("payment_amount", ">=", 0),),
+        foreign_keys=(ForeignKey("order_id", "orders", "order_id"),),
+    ),
+}
+
+
+# ── Engine ───────────────────────────────────────────────────────────
+
+@dataclass
+class ValidationReport:
+    """Rows checked and quarantined in one table; ``reasons`` counts the
+    rows failing each rule (a row may fail several)."""
+    table: str
+    rows: int = 0
+    quarantined: int = 0
+    reasons: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    timestamps: list[ParseReport] = field(default_factory=list)
+
+    def add(self, other: ValidationReport) -> None:
+        """Fold in the report of another chunk of the same table."""
+        self.rows += other.rows
+        self.quarantined += other.quarantined
+        for reason, count in other.reasons.items():
+            self.reasons[reason] = self.reasons.get(reason, 0) + count
+        self.seconds += other.seconds
+        self.timestamps += other.timestamps
+
+    def __str__(self) -> str:
+        text = f"{self.table}: {self.rows:,} rows, {self.quarantined:,} quarantined"
+        if self.reasons:
+            text += " (" + "; ".join(f"{r}: {n:,}" for r, n in self.reasons.items()) + ")"
+        return f"{text} in {self.seconds:.3f} s"
+
+
+def _cast(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Valid rows back to the dtypes of :data:`TABLE_SCHEMAS`, where coercion changed them."""
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return df
+    for column, dtype in schema.dtypes.items():
+        if column in df.columns and str(df[column].dtype) != dtype:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def _integer_columns(table: str) -> set[str]:
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return set()
+    return {c for c, t in schema.dtypes.items() if t.lower().startswith("int")}
+
+
+@dataclass
+class ValidationEngine:
+    """Validates raw tables against ``rules``, quarantining failing rows.
+
+    :meth:`validate_all` checks the tables in rule order; :meth:`validate`
+    checks one table, or one chunk of it. The valid keys of referenced
+    tables are kept for the foreign key checks of later tables; tables
+    validated elsewhere (e.g. a cached ingest) are registered with
+    :meth:`reference`. A foreign key into a table never seen is not checked.
+    """
+    rules: Mapping[str, TableRules] = field(default_factory=lambda: dict(TABLE_RULES))
+    quarantine_dir: Path | None = None
+    reports: dict[str, ValidationReport] = field(default_factory=dict, init=False)
+    _keys: dict[tuple[str, str], pd.Index] = field(default_factory=dict, init=False, repr=False)
+
+    def validate_all(self, tables: Mapping[str, pd.DataFrame | None]) -> dict[str, pd.DataFrame | None]:
+        validated = dict(tables)
+        for table in self.rules:
+            if validated.get(table) is not None:
+                validated[table] = self.validate(table, validated[table])
+        return validated
+
+    def reference(self, table: str, df: pd.DataFrame) -> None:
+        """Keep ``df``'s keys as the valid keys of ``table`` for foreign key checks."""
+        for rules in self.rules.values():
+            for fk in rules.foreign_keys:
+                if fk.table == table and fk.references in df.columns:
+                    self._keys[table, fk.references] = pd.Index(df[fk.references].dropna().unique())
+
+    def validate(
+        self, table: str, df: pd.DataFrame, *, record: bool = True, append: bool = False
+    ) -> pd.DataFrame:
+        """The valid rows of ``df``, cast to the table's schema dtypes.
+
+        With ``record`` the table's report is replaced (or, with ``append``,
+        added to, for the next chunk) and the failing rows are written to
+        its quarantine file.
+        """
+        rules = self.rules.get(table)
+        if rules is None:
+            return df
+        missing = [c for c in (rules.key, *rules.required) if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns in {table}: {missing}")
+
+        with observe("validate", table) as span:
+            start = time.perf_counter()
+            checked, failures, timestamps = self._check(table, rules, df)
+            bad = np.zeros(len(df), dtype=bool)
+            for _, mask in failures:
+                bad |= mask
+            valid = _cast(table, checked.loc[~bad] if bad.any() else checked)
+            self.reference(table, valid)
+            span.rows_out = len(valid)
+            report = ValidationReport(
+                table, len(df), int(bad.sum()),
+                {reason: int(mask.sum()) for reason, mask in failures},
+                time.perf_counter() - start, timestamps,
+            )
+        if record:
+            self._record(report, df, failures, bad, append)
+        return valid
+
+    def _check(
+        self, table: str, rules: TableRules, df: pd.DataFrame
+    ) -> tuple[pd.DataFrame, list[tuple[str, np.ndarray]], list[ParseReport]]:
+        """The coerced table and a row mask per failed rule."""
+        checked = df.copy(deep=False)
+        failures: list[tuple[str, np.ndarray]] = []
+
+        def fail(reason: str, mask: np.ndarray) -> None:
+            if mask.any():
+                failures.append((reason, mask))
+
+        for column in dict.fromkeys((rules.key, *(fk.column for fk in rules.foreign_keys), *rules.numeric)):
+            if column not in checked.columns:
+                continue
+            values = checked[column]
+            if not pd.api.types.is_numeric_dtype(values.dtype):
+                values = pd.to_numeric(values.astype(object), errors="coerce")
+                fail(f"{column} is not a number", (values.isna() & df[column].notna()).to_numpy())
+                checked[column] = values
+            if column in _integer_columns(table) and pd.api.types.is_float_dtype(values.dtype):
+                fail(f"{column} is not an integer", (values.notna() & (values % 1 != 0)).to_numpy())
+
+        timestamps = []
+        columns = [c for c in rules.timestamps if c in checked.columns]
+        if columns:
+            normalizer = TimestampNormalizer(columns)
+            checked = normalizer.transform(checked)
+            timestamps = list(normalizer.reports.values())
+            for column in columns:
+                fail(f"{column} is not a timestamp", (checked[column].isna() & df[column].notna()).to_numpy())
+
+        for column, default in rules.defaults.items():
+            if column in checked.columns and checked[column].isna().any():
+                values = checked[column]
+                if isinstance(values.dtype, pd.CategoricalDtype) and default not in values.cat.categories:
+                    values = values.cat.add_categories([default])
+                checked[column] = values.fillna(default)
+
+        for column in dict.fromkeys((rules.key, *rules.not_null)):
+            if column in df.columns and column not in rules.defaults:
+                fail(f"{column} is null", df[column].isna().to_numpy())
+        for check in rules.checks:
+            if check.column in checked.columns:
+                fail(f"violates {check}", check.violations(checked[check.column]))
+        # Like the UNIQUE constraints, the first row with a key is kept.
+        for column in dict.fromkeys((rules.key, *rules.unique)):
+            if column in checked.columns:
+                values = checked[column]
+                fail(f"duplicate {column}", (values.notna() & values.duplicated()).to_numpy())
+        for fk in rules.foreign_keys:
+            keys = self._keys.get((fk.table, fk.references))
+            if keys is None or fk.column not in checked.columns:
+                continue
+            values = checked[fk.column]
+            fail(f"{fk.column} not in {fk.table}", (values.notna() & (keys.get_indexer(values) < 0)).to_numpy())
+        return checked, failures, timestamps
+
+    def _record(
+        self,
+        report: ValidationReport,
+        df: pd.DataFrame,
+        failures: list[tuple[str, np.ndarray]],
+        bad: np.ndarray,
+        append: bool,
+    ) -> None:
+        table = report.table
+        if append and table in self.reports:
+            self.reports[table].add(report)
+        else:
+            self.reports[table] = report
+        if self.quarantine_dir is None:
+            return
+        path = self.quarantine_dir / f"{table}.csv"
+        if not append:
+            path.unlink(missing_ok=True)
+        if not bad.any():
+            return
+        # Only the failing rows pay for building reason strings.
+        reasons = np.full(int(bad.sum()), "", dtype=object)
+        for reason, mask in failures:
+            hit = mask[bad]
+            reasons[hit] = reasons[hit] + np.where(reasons[hit] == "", "", "; ") + reason
+        # The rows as read, so values that failed coercion are kept.
+        rejected = df.loc[bad].assign(quarantine_reason=reasons)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rejected.to_csv(path, mode="a", header=not path.exists(), index=False)
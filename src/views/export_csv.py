@@ -0,0 +1,41 @@
+"""Per-KPI CSV export.
+
+Each table is written to its own file on a thread pool; compressed
+output gets the compression's extension (``daily_revenue.csv.gz``).
+Gzip headers carry no timestamp, so unchanged tables give identical files.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.options import CSV_COMPRESSIONS
+
+
+def csv_path(directory: Path, name: str, compression: str | None = None) -> Path:
+    suffix = CSV_COMPRESSIONS[compression] if compression else ""
+    return directory / f"{name}.csv{suffix}"
+
+
+def export_to_csv(
+    directory: Path,
+    tables: dict[str, pd.DataFrame],
+    compression: str | None = None,
+    max_workers: int | None = None,
+) -> list[Path]:
+    """Write every table to ``directory``; returns the paths in table order."""
+    if compression is not None and compression not in CSV_COMPRESSIONS:
+        raise ValueError(f"compression must be one of {tuple(CSV_COMPRESSIONS)}, got {compression!r}")
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = [csv_path(directory, name, compression) for name in tables]
+    options = {"method": "gzip", "mtime": 0} if compression == "gzip" else compression
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(df.to_csv, path, index=False, compression=options)
+            for path, df in zip(paths, tables.values())
+        ]
+        for future in futures:
+            future.result()
+    return paths
@@ -1,12 +1,157 @@
+"""Multi-sheet Excel export.
+
+The default ``streaming`` mode writes the workbook with xlsxwriter in
+``constant_memory`` mode: each row is flushed to disk once the next one
+starts, so memory does not grow with the sheets. Rows are written in
+order (pandas' own writer goes column by column, which that mode does
+not allow), straight from each column's numpy array, a block of rows at
+a time. Numbers and booleans are native cells, dates and timestamps are
+date-formatted Excel serials and missing values are left empty.
+
+``mode="openpyxl"`` is the former in-memory pandas/openpyxl export.
+"""
 from __future__ import annotations
 
+import os
+from dataclasses import dataclass
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import xlsxwriter
+
+from src.config.options import EXCEL_MODES
+
+_BLOCK_ROWS = 10_000
+_MAX_SHEET_NAME = 31
+_NUMBER_FORMATS = {"date": "yyyy-mm-dd", "datetime": "yyyy-mm-dd hh:mm:ss"}
+# Day 0 of Excel's 1900 date system, counting its phantom 1900-02-29.
+_EXCEL_EPOCH = np.datetime64("1899-12-30", "ns")
 
 
-def export_to_excel(output_path: Path, sheets: dict[str, pd.DataFrame]) -> None:
+def export_to_excel(
+    output_path: Path, sheets: dict[str, pd.DataFrame], mode: str = "streaming"
+) -> None:
+    if mode not in EXCEL_MODES:
+        raise ValueError(f"mode must be one of {EXCEL_MODES}, got {mode!r}")
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        for sheet_name, df in sheets.items():
-            df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+    if mode == "openpyxl":
+        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name[:_MAX_SHEET_NAME], index=False)
+        return
+    _stream_workbook(output_path, sheets)
+
+
+# ── Streaming workbook ───────────────────────────────────────────────
+
+def _stream_workbook(output_path: Path, sheets: dict[str, pd.DataFrame]) -> None:
+    names = [name[:_MAX_SHEET_NAME] for name in sheets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Sheet names must be unique within {_MAX_SHEET_NAME} characters: {names}")
+    # Written beside the target and moved into place, so a failed export
+    # leaves the previous workbook intact.
+    tmp = output_path.with_name(f".{output_path.name}.tmp")
+    workbook = xlsxwriter.Workbook(str(tmp), {"constant_memory": True})
+    try:
+        header = workbook.add_format({"bold": True})
+        formats = {kind: workbook.add_format({"num_format": f}) for kind, f in _NUMBER_FORMATS.items()}
+        for name, df in zip(names, sheets.values()):
+            sheet = workbook.add_worksheet(name)
+            columns = [_column(df.iloc[:, i]) for i in range(df.shape[1])]
+            for i, column in enumerate(columns):
+                sheet.set_column(i, i, column.width)
+            sheet.freeze_panes(1, 0)
+            sheet.write_row(0, 0, [str(c) for c in df.columns], header)
+            writers = [getattr(sheet, _WRITERS[column.kind]) for column in columns]
+            cell_formats = [formats.get(column.kind) for column in columns]
+            for start in range(0, len(df), _BLOCK_ROWS):
+                stop = start + _BLOCK_ROWS
+                # Only one block of values is ever turned into Python objects.
+                blocks = [
+                    (col, writers[col], column.values[start:stop].tolist(),
+                     column.present[start:stop].tolist(), cell_formats[col])
+                    for col, column in enumerate(columns)
+                ]
+                for offset in range(min(_BLOCK_ROWS, len(df) - start)):
+                    row = start + offset + 1
+                    for col, write, values, present, cell_format in blocks:
+                        if present[offset]:
+                            write(row, col, values[offset], cell_format)
+    except BaseException:
+        workbook.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    workbook.close()
+    os.replace(tmp, output_path)
+
+
+def _kind(values: pd.Series) -> str:
+    """How a column is written: ``bool``, ``number``, ``date`` or ``text``."""
+    if pd.api.types.is_bool_dtype(values):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(values):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "date"
+    if values.dtype == object:
+        inferred = pd.api.types.infer_dtype(values, skipna=True)
+        if inferred == "boolean":
+            return "bool"
+        if inferred in ("integer", "floating", "mixed-integer-float", "decimal"):
+            return "number"
+        if inferred in ("date", "datetime", "datetime64"):
+            return "date"
+    return "text"
+
+
+@dataclass
+class _Column:
+    """One column as written: values, which are present, kind and width."""
+    values: np.ndarray
+    present: np.ndarray
+    kind: str
+    width: int
+
+
+# Worksheet method that writes each kind of cell.
+_WRITERS = {
+    "bool": "write_boolean", "number": "write_number", "date": "write_number",
+    "datetime": "write_number", "text": "write_string",
+}
+
+
+def _column(values: pd.Series) -> _Column:
+    """A column's cell values as one numpy array.
+
+    Dates become Excel serial numbers, of kind ``date`` or ``datetime`` by
+    whether any value has a time of day.
+    """
+    kind = _kind(values)
+    present = values.notna().to_numpy(copy=True)
+    if kind == "bool":
+        cells = values.astype("boolean").to_numpy(dtype=bool, na_value=False)
+    elif kind == "number":
+        cells = values.astype("float64").to_numpy(na_value=np.nan)
+        present &= np.isfinite(cells)
+    elif kind == "date":
+        stamps = pd.to_datetime(values)
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_localize(None)
+        known = stamps.dropna()
+        kind = "date" if (known == known.dt.normalize()).all() else "datetime"
+        elapsed = stamps.to_numpy(dtype="datetime64[ns]") - _EXCEL_EPOCH
+        cells = elapsed / np.timedelta64(1, "D")
+    else:
+        cells = values.astype(str).to_numpy(dtype=object)
+    return _Column(cells, present, kind, _width(values, kind))
+
 
+def _width(values: pd.Series, kind: str) -> int:
+    if kind in ("date", "datetime"):
+        longest = 19
+    elif kind == "text" and values.notna().any():
+        longest = int(values.dropna().astype(str).str.len().max())
+    else:
+        longest = 12
+    return min(max(longest, len(str(values.name))) + 2, 60)
@@ -0,0 +1,71 @@
+"""Tests for src.services.benchmark module."""
+import pytest
+
+from src.services.benchmark import MIN_SECONDS, Benchmark, compare, dataset
+
+
+def _run(results, traced=True):
+    return {
+        "memory_traced": traced,
+        "results": [
+            {"orders": 5000, "stage": stage, "seconds": seconds, "peak_mb": peak, "rows": None}
+            for stage, seconds, peak in results
+        ],
+    }
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    return Benchmark(300, tmp_path_factory.mktemp("bench")).run()
+
+
+class TestBenchmark:
+
+    def test_dataset_is_generated_once(self, tmp_path):
+        raw = dataset(tmp_path, 50)
+        stamp = (raw / "orders.csv").stat().st_mtime_ns
+        assert dataset(tmp_path, 50) == raw
+        assert (raw / "orders.csv").stat().st_mtime_ns == stamp
+
+    def test_every_stage_is_measured(self, results):
+        stages = [r.stage for r in results]
+        for stage in ("load", "enrich", "kpi:daily_revenue", "kpi:order_value_daily",
+                      "export_excel", "db_load", "view:kpi_daily_revenue"):
+            assert stage in stages
+        assert all(r.seconds >= 0 and r.peak_mb is not None for r in results)
+        assert next(r.rows for r in results if r.stage == "order_facts") == 300
+
+    def test_repeats_keep_one_result_per_stage(self, tmp_path):
+        single = Benchmark(100, tmp_path, trace_memory=False).run()
+        repeated = Benchmark(100, tmp_path, trace_memory=False, repeat=2).run()
+        assert [r.stage for r in repeated] == [r.stage for r in single]
+        assert all(r.peak_mb is None for r in repeated)
+
+
+class TestCompare:
+
+    def test_flags_slower_stages(self):
+        report = compare(
+            _run([("db_load", 1.0, 10.0), ("enrich", 0.5, 10.0)]),
+            _run([("db_load", 1.5, 10.0), ("enrich", 0.55, 10.0)]),
+        )
+        assert report.set_index("stage")["regression"].to_dict() == {"db_load": True, "enrich": False}
+
+    def test_flags_memory_growth(self):
+        report = compare(_run([("enrich", 0.5, 10.0)]), _run([("enrich", 0.5, 20.0)]))
+        assert report["regression"].all()
+
+    def test_ignores_noise_in_fast_stages(self):
+        fast = MIN_SECONDS / 10
+        report = compare(_run([("kpi:peak_hours", fast, 0.1)]), _run([("kpi:peak_hours", 3 * fast, 0.2)]))
+        assert not report["regression"].any()
+
+    def test_untraced_runs_compare_time_only(self):
+        report = compare(
+            _run([("db_load", 1.0, None)], traced=False), _run([("db_load", 1.1, None)], traced=False)
+        )
+        assert not report["regression"].any()
+
+    def test_tracing_must_match(self):
+        with pytest.raises(ValueError, match="memory tracing"):
+            compare(_run([("load", 1.0, 1.0)]), _run([("load", 1.0, None)], traced=False))
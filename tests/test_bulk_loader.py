@@ -0,0 +1,141 @@
+"""Tests for src.services.bulk_loader module."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.services.bulk_loader import SqliteFastLoader, iter_rows
+from src.services.data_loader import SqlAlchemyRepository, UpsertResult
+
+SCHEMA = Path("sql/schema/create_tables_sqlite.sql")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = SqlAlchemyRepository(f"sqlite:///{tmp_path / 'bulk.db'}")
+    repository.execute_sql(SCHEMA.read_text(encoding="utf-8"))
+    yield repository
+    repository.close()
+
+
+def _orders(ids):
+    return pd.DataFrame({
+        "order_id": ids,
+        "customer_id": [None] * len(ids),
+        "order_timestamp": pd.to_datetime(["2023-01-02 10:00"] * len(ids)),
+        "location": ["Downtown"] * len(ids),
+    })
+
+
+def _order_items(ids):
+    return pd.DataFrame({
+        "order_item_id": ids,
+        "order_id": ids,
+        "menu_item_id": [1] * len(ids),
+        "quantity": [2] * len(ids),
+        "item_price": [50.0] * len(ids),
+    })
+
+
+# ── iter_rows ────────────────────────────────────────────────────────
+
+class TestIterRows:
+
+    def test_nulls_become_none(self):
+        rows = list(iter_rows(pd.DataFrame({"a": [1.0, None], "b": ["x", None]}), "sqlite"))
+        assert rows == [(1.0, "x"), (None, None)]
+
+    def test_sqlite_timestamps_are_text(self):
+        df = pd.DataFrame({"t": pd.to_datetime(["2023-01-02 10:00"])})
+        assert list(iter_rows(df, "sqlite")) == [("2023-01-02 10:00:00.000000",)]
+
+
+# ── SqliteFastLoader ─────────────────────────────────────────────────
+
+class TestSqliteFastLoader:
+
+    def test_indexes_filtered_by_table(self):
+        indexes = SqliteFastLoader()._indexes(["order_items"])
+        assert [name for name, _ in indexes] == [
+            "idx_order_items_order_id", "idx_order_items_menu_item_id",
+        ]
+
+    def test_missing_index_file(self, tmp_path):
+        assert SqliteFastLoader(index_sql=tmp_path / "none.sql")._indexes(["orders"]) == []
+
+
+# ── SqlAlchemyRepository.bulk_load ───────────────────────────────────
+
+class TestBulkLoad:
+
+    def test_loads_empty_tables(self, repo):
+        result = repo.bulk_load([("orders", _orders([1, 2, 3])), ("order_items", _order_items([1, 2]))])
+        assert result == {
+            "orders": UpsertResult(inserted=3),
+            "order_items": UpsertResult(inserted=2),
+        }
+        rows = repo.fetch_dataframe("SELECT * FROM orders ORDER BY order_id")
+        assert rows["customer_id"].isna().all()
+        assert rows["order_timestamp"].iloc[0].startswith("2023-01-02 10:00:00")
+
+    def test_deferred_indexes_are_created(self, repo):
+        repo.bulk_load([("order_items", _order_items([1, 2]))])
+        names = repo.fetch_dataframe("SELECT name FROM sqlite_master WHERE type = 'index'")["name"]
+        assert {"idx_order_items_order_id", "idx_order_items_menu_item_id"} <= set(names)
+
+    def test_pragmas_restored(self, repo):
+        repo.bulk_load([("orders", _orders([1]))])
+        assert repo.fetch_dataframe("PRAGMA synchronous").iloc[0, 0] == 1  # NORMAL
+
+    def test_non_empty_table_falls_back_to_upsert(self, repo):
+        repo.bulk_load([("orders", _orders([1, 2]))])
+        result = repo.bulk_load([("orders", _orders([2, 3]))])
+        assert result == {"orders": UpsertResult(inserted=1, updated=1)}
+
+    def test_chunks_of_non_empty_table_are_counted_once(self, repo):
+        repo.bulk_load([("orders", _orders([1, 2]))])
+        chunks = (_orders(ids) for ids in ([2, 3], [3, 4]))
+        result = repo.bulk_load([("orders", chunks)])
+        assert result == {"orders": UpsertResult(inserted=2, updated=2)}
+
+    def test_skips_missing_and_empty_frames(self, repo):
+        assert repo.bulk_load([("orders", None), ("order_items", _order_items([]))]) == {}
+
+    def test_failed_load_rolls_back_and_keeps_indexes(self, repo):
+        bad = _order_items([1, 2])
+        bad.loc[1, "quantity"] = 0  # violates CHECK (quantity > 0)
+        with pytest.raises(Exception):
+            repo.bulk_load([("order_items", bad)])
+        count = repo.fetch_dataframe("SELECT COUNT(*) AS cnt FROM order_items")
+        assert count["cnt"].iloc[0] == 0
+        names = repo.fetch_dataframe("SELECT name FROM sqlite_master WHERE type = 'index'")["name"]
+        assert "idx_order_items_order_id" in set(names)
+
+    def test_duplicate_keys_keep_last_row_like_upsert(self, repo):
+        def orders(locations):
+            df = _orders([1, 2, 1])
+            df["location"] = locations
+            return df
+
+        chunks = iter([orders(["A", "B", "C"]), orders(["D", "E", "F"]).iloc[:1]])
+        fast = repo.bulk_load([("orders", chunks)])
+        upserted = repo.bulk_load([("orders", orders(["G", "H", "I"]))])
+        assert fast == {"orders": UpsertResult(inserted=2, updated=1)}
+        assert upserted == {"orders": UpsertResult(updated=2)}
+        rows = repo.fetch_dataframe("SELECT order_id, location FROM orders ORDER BY order_id")
+        assert rows["location"].tolist() == ["I", "H"]
+
+    def test_fast_load_matches_upsert_of_duplicates(self, repo, tmp_path):
+        df = _orders([1, 2, 1])
+        df["location"] = ["A", "B", "C"]
+        repo.bulk_load([("orders", df)])
+        with SqlAlchemyRepository(f"sqlite:///{tmp_path / 'upsert.db'}") as other:
+            other.execute_sql(SCHEMA.read_text(encoding="utf-8"))
+            other.load_dataframe("orders", df)
+            expected = other.fetch_dataframe("SELECT * FROM orders ORDER BY order_id")
+        pd.testing.assert_frame_equal(repo.fetch_dataframe("SELECT * FROM orders ORDER BY order_id"), expected)
+
+    def test_streams_chunked_tables(self, repo):
+        chunks = (_order_items(ids) for ids in ([1, 2], [3], [4, 5]))
+        result = repo.bulk_load([("order_items", chunks)])
+        assert result == {"order_items": UpsertResult(inserted=5)}
@@ -0,0 +1,66 @@
+"""Tests for src.cli module."""
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from src.cli import kpi_names, parse_args
+from src.config.options import STAGES
+
+
+class TestParseArgs:
+
+    def test_defaults_run_every_stage(self):
+        args = parse_args(["run"])
+        assert (args.command, args.stages, args.kpis, args.since) == ("run", STAGES, (), None)
+
+    def test_flags_without_subcommand_mean_run(self):
+        args = parse_args(["--incremental", "--chunk-size", "1000"])
+        assert args.command == "run" and args.incremental and args.chunk_size == 1000
+        assert parse_args([]).command == "run"
+
+    def test_stage_kpi_and_date_selection(self):
+        args = parse_args([
+            "run", "--stages", "kpi, export,kpi", "--kpis", "daily_revenue,peak_hours", "--since", "2024-01-31",
+        ])
+        assert args.stages == ("kpi", "export")
+        assert args.kpis == ("daily_revenue", "peak_hours")
+        assert args.since == date(2024, 1, 31)
+
+    @pytest.mark.parametrize("argv", [
+        ["run", "--stages", "load,transform"],
+        ["run", "--stages", ""],
+        ["run", "--since", "31/01/2024"],
+        ["run", "--stages", "load", "--kpis", "daily_revenue"],
+        ["run", "--kpi-backend", "sql", "--since", "2024-01-01"],
+    ])
+    def test_invalid_arguments(self, argv, capsys):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+        assert "error" in capsys.readouterr().err
+
+    def test_listing_commands(self):
+        assert parse_args(["stages"]).command == "stages"
+        names = kpi_names()
+        assert names[0] == "daily_revenue" and "customer_reach_daily" in names
+        assert len(names) == len(set(names))
+
+    def test_help_does_not_import_heavy_modules(self):
+        code = (
+            "import sys\n"
+            "from src.cli import main\n"
+            "try:\n"
+            "    main(['run', '--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "import src.pipeline\n"
+            "print(sorted({'pandas', 'sqlalchemy', 'openpyxl', 'pyarrow'} & set(sys.modules)))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1],
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
@@ -0,0 +1,106 @@
+"""Tests for src.services.customer_reach module."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.models.schema import read_table
+from src.services.customer_reach import CustomerReachKPI, ReachSketches, default_reach_kpis
+from src.services.sample_data_generator import generate
+from src.services.sketches import relative_error
+
+TOLERANCE = 3 * relative_error()
+
+
+@pytest.fixture(scope="module")
+def orders(tmp_path_factory):
+    raw = tmp_path_factory.mktemp("raw")
+    generate(raw)
+    return read_table(raw / "orders.csv", "orders")
+
+
+@pytest.fixture(scope="module")
+def sketches(orders):
+    return ReachSketches.from_orders(orders)
+
+
+def _close(estimate, exact):
+    assert abs(estimate - exact) <= max(TOLERANCE * exact, 1)
+
+
+# ── Sketches vs exact counts ─────────────────────────────────────────
+
+class TestReachSketches:
+
+    def test_whole_history(self, sketches, orders):
+        counts = sketches.distinct()
+        _close(counts["customers"], orders["customer_id"].nunique())
+        _close(counts["orders"], orders["order_id"].nunique())
+
+    def test_custom_range_and_location(self, sketches, orders):
+        location = orders["location"].iloc[0]
+        day = orders["order_timestamp"].dt.normalize()
+        window = orders[
+            (day >= pd.Timestamp("2022-05-10")) & (day <= pd.Timestamp("2022-08-20"))
+            & (orders["location"] == location)
+        ]
+        counts = sketches.distinct(date(2022, 5, 10), date(2022, 8, 20), location)
+        _close(counts["customers"], window["customer_id"].nunique())
+        _close(counts["orders"], len(window))
+
+    def test_monthly_rollup(self, sketches, orders):
+        reach = sketches.rollup("month").set_index("year_month")["unique_customers"]
+        exact = orders.groupby(
+            orders["order_timestamp"].dt.to_period("M").astype(str)
+        )["customer_id"].nunique()
+        assert list(reach.index) == list(exact.index)
+        for month, count in exact.items():
+            _close(reach[month], count)
+
+    def test_merge_of_parts_matches_whole(self, sketches, orders):
+        merged = ReachSketches.merge([
+            ReachSketches.from_orders(orders.iloc[:1_500]),
+            ReachSketches.from_orders(orders.iloc[1_500:]),
+        ])
+        assert merged.distinct() == sketches.distinct()
+        assert len(merged.keys) == len(sketches.keys)
+
+    def test_between_keeps_the_range(self, sketches):
+        window = sketches.between(date(2022, 5, 10), date(2022, 8, 20))
+        assert window.keys["sales_date"].between("2022-05-10", "2022-08-20").all()
+        assert window.distinct() == sketches.distinct(date(2022, 5, 10), date(2022, 8, 20))
+
+    def test_weeks_are_keyed_by_iso_year(self):
+        orders = pd.DataFrame({
+            "order_id": [1, 2, 3],
+            "customer_id": [1, 2, 3],
+            "location": ["Downtown"] * 3,
+            "order_timestamp": pd.to_datetime(["2024-12-29", "2024-12-30", "2025-01-02"]),
+        })
+        weekly = ReachSketches.from_orders(orders).rollup("week")
+        assert weekly[["year", "week"]].values.tolist() == [[2024, 52], [2025, 1]]
+        assert weekly["unique_customers"].tolist() == [1, 2]
+
+    def test_frame_round_trip(self, sketches):
+        restored = ReachSketches.from_frame(sketches.to_frame())
+        pd.testing.assert_frame_equal(restored.rollup("week"), sketches.rollup("week"))
+
+    def test_unknown_period(self, sketches):
+        with pytest.raises(ValueError, match="period must be one of"):
+            sketches.rollup("quarter")
+
+
+# ── Reach KPIs ───────────────────────────────────────────────────────
+
+class TestCustomerReachKPI:
+
+    def test_default_kpis(self, sketches):
+        results = {k.name: k.from_sketches(sketches) for k in default_reach_kpis(200)}
+        assert list(results["customer_reach_by_location"].columns) == [
+            "location", "unique_customers", "unique_orders", "reach_rate",
+        ]
+        assert results["customer_reach_daily"]["reach_rate"].between(0, 1).all()
+
+    def test_calculate_requires_customer_id(self, orders):
+        with pytest.raises(ValueError, match="customer_id"):
+            CustomerReachKPI().calculate(orders.drop(columns="customer_id"))
@@ -0,0 +1,129 @@
+"""Tests for src.services.data_loader module."""
+import pandas as pd
+import pytest
+
+from src.services.data_loader import SqlAlchemyRepository, UpsertResult
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = SqlAlchemyRepository(f"sqlite:///{tmp_path / 'test.db'}")
+    repository.execute_sql("""
+        CREATE TABLE orders (
+          order_id INTEGER PRIMARY KEY,
+          order_timestamp TEXT NOT NULL,
+          location TEXT
+        );
+        CREATE TABLE restaurant_categories (
+          restaurant_id INTEGER NOT NULL,
+          category_id INTEGER NOT NULL,
+          PRIMARY KEY (restaurant_id, category_id)
+        );
+        CREATE TABLE events (note TEXT)
+    """)
+    yield repository
+    repository.close()
+
+
+def _orders(ids, location="Downtown"):
+    return pd.DataFrame({
+        "order_id": ids,
+        "order_timestamp": pd.to_datetime(["2023-01-02 10:00"] * len(ids)),
+        "location": [location] * len(ids),
+    })
+
+
+# ── load_dataframe (upsert) ──────────────────────────────────────────
+
+class TestLoadDataframe:
+
+    def test_inserts_new_rows(self, repo):
+        result = repo.load_dataframe("orders", _orders([1, 2, 3]))
+        assert result == UpsertResult(inserted=3)
+
+    def test_rerun_is_idempotent(self, repo):
+        repo.load_dataframe("orders", _orders([1, 2, 3]))
+        result = repo.load_dataframe("orders", _orders([1, 2, 3]))
+        assert result == UpsertResult(updated=3)
+        count = repo.fetch_dataframe("SELECT COUNT(*) AS cnt FROM orders")
+        assert count["cnt"].iloc[0] == 3
+
+    def test_updates_existing_and_inserts_new(self, repo):
+        repo.load_dataframe("orders", _orders([1, 2]))
+        result = repo.load_dataframe("orders", _orders([2, 3], location="Airport"))
+        assert result == UpsertResult(inserted=1, updated=1)
+        rows = repo.fetch_dataframe("SELECT order_id, location FROM orders ORDER BY order_id")
+        assert rows["location"].tolist() == ["Downtown", "Airport", "Airport"]
+
+    def test_composite_primary_key(self, repo):
+        df = pd.DataFrame({"restaurant_id": [1, 1, 2], "category_id": [1, 2, 1]})
+        repo.load_dataframe("restaurant_categories", df)
+        result = repo.load_dataframe("restaurant_categories", df)
+        assert result == UpsertResult(updated=3)
+        count = repo.fetch_dataframe("SELECT COUNT(*) AS cnt FROM restaurant_categories")
+        assert count["cnt"].iloc[0] == 3
+
+    def test_table_without_primary_key_appends(self, repo):
+        df = pd.DataFrame({"note": ["a", "b"]})
+        repo.load_dataframe("events", df)
+        result = repo.load_dataframe("events", df)
+        assert result.inserted == 2
+        count = repo.fetch_dataframe("SELECT COUNT(*) AS cnt FROM events")
+        assert count["cnt"].iloc[0] == 4
+
+    def test_nulls_and_timestamps(self, repo):
+        df = _orders([1, 2])
+        df.loc[1, "location"] = None
+        repo.load_dataframe("orders", df)
+        rows = repo.fetch_dataframe("SELECT * FROM orders ORDER BY order_id")
+        assert rows["location"].isna().tolist() == [False, True]
+        assert rows["order_timestamp"].iloc[0].startswith("2023-01-02 10:00:00")
+
+    def test_batches_larger_than_parameter_limit(self, repo):
+        ids = list(range(1, 25001))
+        result = repo.load_dataframe("orders", _orders(ids))
+        assert result == UpsertResult(inserted=25000)
+
+    def test_duplicate_keys_keep_last_row(self, repo):
+        df = _orders([1, 2, 1])
+        df["location"] = ["Downtown", "Airport", "Harbor"]
+        result = repo.load_dataframe("orders", df)
+        assert result == UpsertResult(inserted=2)
+        rows = repo.fetch_dataframe("SELECT order_id, location FROM orders ORDER BY order_id")
+        assert rows["location"].tolist() == ["Harbor", "Airport"]
+
+    def test_empty_dataframe_is_noop(self, repo):
+        assert repo.load_dataframe("orders", _orders([])) == UpsertResult()
+
+
+# ── Engine lifecycle ─────────────────────────────────────────────────
+
+class TestEngineLifecycle:
+
+    def test_engine_is_reused(self, repo):
+        assert repo._engine() is repo._engine()
+
+    def test_sqlite_pragmas_applied(self, repo):
+        mode = repo.fetch_dataframe("PRAGMA journal_mode")
+        assert mode.iloc[0, 0].lower() == "wal"
+        temp_store = repo.fetch_dataframe("PRAGMA temp_store")
+        assert temp_store.iloc[0, 0] == 2  # MEMORY
+
+    def test_custom_pragmas(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'custom.db'}"
+        with SqlAlchemyRepository(url, sqlite_pragmas={"synchronous": "OFF"}) as custom:
+            assert custom.fetch_dataframe("PRAGMA synchronous").iloc[0, 0] == 0
+
+    def test_close_disposes_engine(self, repo):
+        first = repo._engine()
+        repo.close()
+        assert repo._engine() is not first
+
+    def test_context_manager_closes(self, tmp_path):
+        with SqlAlchemyRepository(f"sqlite:///{tmp_path / 'ctx.db'}") as repository:
+            repository.execute_sql("CREATE TABLE t (x INTEGER)")
+        assert repository._engine_instance is None
+
+    def test_in_memory_database(self):
+        with SqlAlchemyRepository("sqlite://") as repository:
+            assert repository.fetch_dataframe("SELECT 1 AS one")["one"].iloc[0] == 1
@@ -0,0 +1,115 @@
+"""Tests for src.services.duckdb_repository module."""
+import pandas as pd
+import pytest
+
+from src.services.duckdb_repository import DuckDBRepository
+from src.services.kpi_calculator import DailyRevenueKPI, TopMenuItemsKPI
+from src.services.data_loader import UpsertResult
+from src.services.order_facts import build_order_facts
+from src.services.staging import write_order_detail, write_order_facts
+
+
+@pytest.fixture
+def detail():
+    return pd.DataFrame({
+        "order_item_id": [1, 2, 3, 4, 5],
+        "order_id": [1, 1, 2, 3, 4],
+        "menu_item_id": [1, 2, 1, 3, 2],
+        "quantity": [2, 1, 1, 3, 2],
+        "item_price": [10.0, 4.0, 10.0, 6.0, 4.0],
+        "order_timestamp": pd.to_datetime([
+            "2023-01-02 10:00", "2023-01-02 10:00", "2023-01-07 18:30",
+            "2023-02-15 12:00", "2023-02-15 13:00",
+        ]),
+        "item_name": ["Burger", "Latte", "Burger", "Cake", "Latte"],
+        "category_name": ["Mains", "Drinks", "Mains", "Desserts", "Drinks"],
+    }).assign(line_total=lambda df: df["quantity"] * df["item_price"])
+
+
+@pytest.fixture
+def repo(tmp_path, detail):
+    write_order_detail(detail, tmp_path / "order_detail")
+    repository = DuckDBRepository(
+        staging_path=tmp_path / "order_detail", facts_path=tmp_path / "order_facts", threads=2
+    )
+    yield repository
+    repository.close()
+
+
+# ── KPI views over the staged detail ─────────────────────────────────
+
+class TestDuckDBViews:
+
+    def test_daily_revenue_matches_pandas(self, repo, detail):
+        result = repo.fetch_dataframe(
+            "SELECT sales_date, total_revenue FROM kpi_daily_revenue ORDER BY sales_date"
+        )
+        expected = DailyRevenueKPI().calculate(detail)
+        assert result["total_revenue"].tolist() == expected["total_revenue"].tolist()
+        assert [d.date() for d in result["sales_date"]] == expected["order_date"].tolist()
+
+    def test_top_menu_items_matches_pandas(self, repo, detail):
+        result = repo.fetch_dataframe("SELECT * FROM kpi_top_menu_items")
+        expected = TopMenuItemsKPI().calculate(detail)
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+        )
+
+    def test_weekday_vs_weekend(self, repo):
+        result = repo.fetch_dataframe(
+            "SELECT day_type, orders_count FROM kpi_weekday_vs_weekend ORDER BY day_type"
+        )
+        assert result.to_dict("list") == {"day_type": ["weekday", "weekend"], "orders_count": [3, 1]}
+
+    def test_staged_facts_match_derived_facts(self, tmp_path, repo, detail):
+        query = "SELECT * FROM kpi_daily_revenue ORDER BY sales_date"
+        derived = repo.fetch_dataframe(query)
+        write_order_facts(build_order_facts(detail), tmp_path / "order_facts")
+        with DuckDBRepository(
+            staging_path=tmp_path / "order_detail", facts_path=tmp_path / "order_facts"
+        ) as staged:
+            pd.testing.assert_frame_equal(staged.fetch_dataframe(query), derived)
+
+    def test_partition_columns_filter(self, repo):
+        result = repo.fetch_dataframe(
+            "SELECT COUNT(*) AS cnt FROM order_detail WHERE year = 2023 AND month = 2"
+        )
+        assert result["cnt"].iloc[0] == 2
+
+    def test_missing_staging_has_no_views(self, tmp_path):
+        with DuckDBRepository(staging_path=tmp_path / "absent") as repository:
+            tables = repository.fetch_dataframe("SELECT table_name FROM information_schema.tables")
+            assert tables.empty
+
+
+# ── Loading ──────────────────────────────────────────────────────────
+
+class TestDuckDBLoading:
+
+    def test_load_dataframe_upserts_on_key(self, repo):
+        repo.load_dataframe("orders", pd.DataFrame({"order_id": [1, 2], "location": ["A", "B"]}))
+        result = repo.load_dataframe("orders", pd.DataFrame({"order_id": [2, 3], "location": ["C", "D"]}))
+        assert result == UpsertResult(inserted=1, updated=1)
+        rows = repo.fetch_dataframe("SELECT * FROM orders ORDER BY order_id")
+        assert rows.to_dict("list") == {"order_id": [1, 2, 3], "location": ["A", "C", "D"]}
+
+    def test_incremental_loads_keep_earlier_rows(self, repo):
+        first = pd.DataFrame({"order_item_id": [1, 2], "order_id": [1, 1], "quantity": [1, 2]})
+        delta = pd.DataFrame({"order_item_id": [3, 3], "order_id": [2, 2], "quantity": [1, 4]})
+        repo.bulk_load([("order_items", first)])
+        results = repo.bulk_load([("order_items", iter([delta.iloc[:1], delta.iloc[1:]]))])
+        assert results == {"order_items": UpsertResult(inserted=1, updated=1)}
+        rows = repo.fetch_dataframe("SELECT order_item_id, quantity FROM order_items ORDER BY 1")
+        assert rows.to_dict("list") == {"order_item_id": [1, 2, 3], "quantity": [1, 2, 4]}
+
+    def test_existing_table_keeps_its_own_key(self, repo):
+        repo.execute_sql("CREATE TABLE targets (day INTEGER PRIMARY KEY, goal INTEGER)")
+        repo.load_dataframe("targets", pd.DataFrame({"day": [1, 2, 1], "goal": [100, 120, 90]}))
+        rows = repo.fetch_dataframe("SELECT * FROM targets ORDER BY day")
+        assert rows.to_dict("list") == {"day": [1, 2], "goal": [90, 120]}
+
+    def test_bulk_load_appends_chunks_without_key(self, repo):
+        chunks = iter([pd.DataFrame({"x": [1, 2]}), pd.DataFrame({"x": [3]})])
+        results = repo.bulk_load([("numbers", chunks), ("skipped", None)])
+        assert results == {"numbers": UpsertResult(inserted=3)}
+        assert repo.fetch_dataframe("SELECT SUM(x) AS s FROM numbers")["s"].iloc[0] == 6
@@ -0,0 +1,38 @@
+"""Tests for src.views.export_csv module."""
+import pandas as pd
+import pytest
+
+from src.config.options import CSV_COMPRESSIONS
+from src.views.export_csv import csv_path, export_to_csv
+
+
+@pytest.fixture
+def tables():
+    return {
+        f"kpi_{n}": pd.DataFrame({"day": [f"2023-01-0{n}"], "revenue": [n * 10.5]})
+        for n in range(1, 6)
+    }
+
+
+class TestExportCsv:
+
+    def test_writes_every_table(self, tmp_path, tables):
+        paths = export_to_csv(tmp_path / "out", tables)
+        assert [p.name for p in paths] == [f"kpi_{n}.csv" for n in range(1, 6)]
+        for path, df in zip(paths, tables.values()):
+            pd.testing.assert_frame_equal(pd.read_csv(path), df)
+
+    @pytest.mark.parametrize("compression", list(CSV_COMPRESSIONS))
+    def test_compressed(self, tmp_path, tables, compression):
+        paths = export_to_csv(tmp_path, tables, compression=compression, max_workers=2)
+        assert paths[0] == csv_path(tmp_path, "kpi_1", compression)
+        pd.testing.assert_frame_equal(pd.read_csv(paths[0]), tables["kpi_1"])
+
+    def test_gzip_output_is_reproducible(self, tmp_path, tables):
+        first = export_to_csv(tmp_path / "a", tables, compression="gzip")
+        second = export_to_csv(tmp_path / "b", tables, compression="gzip")
+        assert [p.read_bytes() for p in first] == [p.read_bytes() for p in second]
+
+    def test_unknown_compression(self, tmp_path, tables):
+        with pytest.raises(ValueError, match="compression"):
+            export_to_csv(tmp_path, tables, compression="zstd")
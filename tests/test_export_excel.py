@@ -1,7 +1,12 @@
 """Tests for src.views.export_excel module."""
+from datetime import date
+
+import openpyxl
 import pandas as pd
+import pytest
 from pathlib import Path
 
+from src.views import export_excel
 from src.views.export_excel import export_to_excel
 
 
@@ -36,3 +41,95 @@ class TestExportExcel:
         sheets = {"s": pd.DataFrame({"x": [1]})}
         export_to_excel(out, sheets)
         assert out.exists()
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError, match="mode must be one of"):
+            export_to_excel(tmp_path / "r.xlsx", {}, mode="xlsxwriter")
+
+
+@pytest.fixture
+def kpis():
+    return {
+        "daily_revenue": pd.DataFrame({
+            "order_date": [date(2023, 1, 1), date(2023, 1, 2), None],
+            "total_revenue": [120.5, 80.0, float("nan")],
+        }),
+        "orders": pd.DataFrame({
+            "order_timestamp": pd.to_datetime(["2023-01-01 10:30:00", None]),
+            "location": ["Down & <town>", None],
+            "orders_count": pd.array([3, None], dtype="Int64"),
+            "completed": [True, False],
+        }),
+    }
+
+
+class TestStreamingExport:
+
+    def test_round_trip_with_native_types(self, tmp_path, kpis):
+        out = tmp_path / "report.xlsx"
+        export_to_excel(out, kpis)
+        result = pd.read_excel(out, sheet_name=None)
+        assert list(result) == ["daily_revenue", "orders"]
+        assert list(result["daily_revenue"]["order_date"][:2]) == [
+            pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-02"),
+        ]
+        assert result["daily_revenue"]["total_revenue"][:2].tolist() == [120.5, 80.0]
+        orders = result["orders"]
+        assert orders["order_timestamp"][0] == pd.Timestamp("2023-01-01 10:30:00")
+        assert orders["location"][0] == "Down & <town>"
+        assert pd.isna(orders["location"][1]) and pd.isna(orders["orders_count"][1])
+        assert orders["completed"].tolist() == [True, False]
+
+    def test_date_formats(self, tmp_path, kpis):
+        out = tmp_path / "report.xlsx"
+        export_to_excel(out, kpis)
+        book = openpyxl.load_workbook(out)
+        assert book["daily_revenue"]["A2"].number_format == "yyyy-mm-dd"
+        assert book["orders"]["A2"].number_format == "yyyy-mm-dd hh:mm:ss"
+        assert book["orders"]["A1"].font.b
+
+    def test_matches_openpyxl_export(self, tmp_path, kpis):
+        export_to_excel(tmp_path / "stream.xlsx", kpis)
+        export_to_excel(tmp_path / "openpyxl.xlsx", kpis, mode="openpyxl")
+        streamed = pd.read_excel(tmp_path / "stream.xlsx", sheet_name=None)
+        expected = pd.read_excel(tmp_path / "openpyxl.xlsx", sheet_name=None)
+        for name in expected:
+            pd.testing.assert_frame_equal(streamed[name], expected[name], check_dtype=False)
+
+    def test_duplicate_truncated_names(self, tmp_path):
+        sheets = {"a" * 40: pd.DataFrame({"x": [1]}), "a" * 35: pd.DataFrame({"x": [2]})}
+        with pytest.raises(ValueError, match="unique"):
+            export_to_excel(tmp_path / "r.xlsx", sheets)
+
+    def test_rows_written_in_order(self, tmp_path):
+        # Cells written out of row order are dropped in constant-memory mode.
+        df = pd.DataFrame({"a": range(1, 6), "b": list("vwxyz"), "c": [0.5] * 5})
+        export_to_excel(tmp_path / "r.xlsx", {"s": df})
+        pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "r.xlsx"), df, check_dtype=False)
+
+    def test_rows_across_blocks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(export_excel, "_BLOCK_ROWS", 3)
+        df = pd.DataFrame({
+            "n": [1.5, None, 3, 4, 5, 6, 7],
+            "day": pd.to_datetime(["2024-03-01", None, "2024-03-03", "2024-03-04",
+                                   "2024-03-05", "2024-03-06", "2024-12-31"]),
+            "s": list("abcdefg"),
+        })
+        export_to_excel(tmp_path / "r.xlsx", {"s": df})
+        pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "r.xlsx"), df, check_dtype=False)
+
+    def test_text_is_not_a_formula(self, tmp_path):
+        df = pd.DataFrame({"s": ["=1+1", "http://example.com"]})
+        export_to_excel(tmp_path / "r.xlsx", {"s": df})
+        sheet = openpyxl.load_workbook(tmp_path / "r.xlsx")["s"]
+        assert [sheet["A2"].value, sheet["A3"].value] == ["=1+1", "http://example.com"]
+        assert sheet["A2"].data_type == "s" and sheet["A3"].hyperlink is None
+
+    def test_failed_export_keeps_previous_workbook(self, tmp_path, kpis):
+        out = tmp_path / "report.xlsx"
+        export_to_excel(out, kpis)
+        before = out.read_bytes()
+        with pytest.raises(AttributeError):
+            export_to_excel(out, {"s": pd.DataFrame({"x": [1]}), "bad": None})
+        assert out.read_bytes() == before
+        assert list(tmp_path.iterdir()) == [out]
@@ -0,0 +1,83 @@
+"""Tests for src.services.heavy_hitters module."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.heavy_hitters import TopItemSketches
+
+
+@pytest.fixture(scope="module")
+def detail():
+    """A 5,000-SKU catalog with Zipf-like sales over two months and three stores."""
+    rng = np.random.default_rng(5)
+    n = 60_000
+    skus = np.minimum(rng.zipf(1.3, n), 5_000)
+    quantity = rng.integers(1, 4, n)
+    price = 2.0 + (skus % 17)
+    return pd.DataFrame({
+        "order_timestamp": pd.Timestamp("2023-01-01")
+        + pd.to_timedelta(rng.integers(0, 59 * 86_400, n), unit="s"),
+        "location": rng.choice(["Downtown", "Airport", "Mall"], n),
+        "item_name": [f"SKU-{s:05d}" for s in skus],
+        "quantity": quantity,
+        "line_total": quantity * price,
+    })
+
+
+def _exact(detail, k, start=None, end=None, location=None):
+    day = detail["order_timestamp"].dt.normalize()
+    mask = pd.Series(True, index=detail.index)
+    if start is not None:
+        mask &= day >= pd.Timestamp(start)
+    if end is not None:
+        mask &= day <= pd.Timestamp(end)
+    if location is not None:
+        mask &= detail["location"] == location
+    return (
+        detail.loc[mask].groupby("item_name", as_index=False)
+        .agg(total_quantity=("quantity", "sum"), total_revenue=("line_total", "sum"))
+        .sort_values("total_revenue", ascending=False).head(k).reset_index(drop=True)
+    )
+
+
+class TestTopItemSketches:
+
+    def test_summaries_are_bounded(self, detail):
+        sketches = TopItemSketches.from_detail(detail, capacity=32)
+        assert sketches.items.groupby(["sales_date", "location"]).size().max() <= 32
+
+    def test_bounds_contain_true_revenue(self, detail):
+        sketches = TopItemSketches.from_detail(detail, capacity=32)
+        top = sketches.top(20).set_index("item_name")
+        exact = detail.groupby("item_name")["line_total"].sum()
+        assert (top["revenue_lower"] <= exact[top.index]).all()
+        assert (exact[top.index] <= top["revenue_upper"]).all()
+
+    @pytest.mark.parametrize("window", [
+        (None, None, None),
+        (date(2023, 1, 9), date(2023, 1, 15), "Mall"),
+        (date(2023, 2, 1), None, "Airport"),
+    ])
+    def test_top_exact_matches_full_scan(self, detail, window):
+        sketches = TopItemSketches.from_detail(detail, capacity=32)
+        assert sketches.covers(5, *window)
+        pd.testing.assert_frame_equal(
+            sketches.top_exact(5, detail, *window), _exact(detail, 5, *window), check_dtype=False
+        )
+
+    def test_merged_chunks_keep_guarantee(self, detail):
+        chunks = [detail.iloc[i:i + 7_000] for i in range(0, len(detail), 7_000)]
+        merged = TopItemSketches.merge([TopItemSketches.from_detail(c, capacity=32) for c in chunks])
+        assert merged.covers(5)
+        pd.testing.assert_frame_equal(
+            merged.top_exact(5, detail), _exact(detail, 5), check_dtype=False
+        )
+
+    def test_small_capacity_is_reported(self, detail):
+        sketches = TopItemSketches.from_detail(detail, capacity=1)
+        assert not sketches.covers(20)
+
+    def test_empty_merge(self):
+        assert TopItemSketches.merge([TopItemSketches()]).items.empty
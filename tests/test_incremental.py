@@ -0,0 +1,179 @@
+"""Tests for src.services.incremental module."""
+import pandas as pd
+
+from src.services.customer_reach import ReachSketches
+from src.services.heavy_hitters import TopItemSketches
+from src.services.incremental import IncrementalState, Watermark
+from src.services.kpi_calculator import DetailAggregates, KPIEngine
+from src.services.order_facts import build_order_facts
+from src.services.order_value import OrderValueSketches
+
+
+def _orders():
+    return pd.DataFrame({
+        "order_id": [1, 2, 3, 4],
+        "order_timestamp": pd.to_datetime([
+            "2023-01-02 10:00", "2023-01-05 14:00",
+            "2023-01-03 19:00", "2023-01-07 09:00",
+        ]),
+    })
+
+
+def _detail():
+    orders = _orders()
+    items = pd.DataFrame({
+        "order_id": [1, 1, 2, 3, 4, 4],
+        "quantity": [2, 1, 3, 1, 1, 2],
+        "line_total": [100.0, 30.0, 150.0, 60.0, 40.0, 80.0],
+        "item_name": ["Burger", "Fries", "Burger", "Latte", "Cookie", "Latte"],
+        "category_name": ["Fastfood", "Fastfood", "Fastfood", "Coffee", "Desserts", "Coffee"],
+    })
+    return items.merge(orders, on="order_id")
+
+
+# ── Watermark ────────────────────────────────────────────────────────
+
+class TestWatermark:
+
+    def test_from_orders_takes_maxima(self):
+        wm = Watermark.from_orders(_orders())
+        assert wm.order_id == 4
+        assert wm.order_timestamp == pd.Timestamp("2023-01-07 09:00")
+
+    def test_select_new_by_id_or_timestamp(self):
+        wm = Watermark(pd.Timestamp("2023-01-05 14:00"), 2)
+        new_orders, = wm.select_new(_orders())
+        # Order 3 has a later id, order 2 is below both marks.
+        assert new_orders["order_id"].tolist() == [3, 4]
+
+    def test_select_new_filters_children(self):
+        wm = Watermark(pd.Timestamp("2023-01-05 14:00"), 3)
+        _, items, missing = wm.select_new(_orders(), _detail(), None)
+        assert set(items["order_id"]) == {4}
+        assert missing is None
+
+    def test_nothing_new_after_advance(self):
+        wm = Watermark(pd.Timestamp("2023-01-01"), 0).advance(_orders())
+        new_orders, = wm.select_new(_orders())
+        assert new_orders.empty
+
+    def test_advance_keeps_highest_child_keys(self):
+        wm = Watermark(pd.Timestamp("2023-01-01"), 0, order_item_id=7)
+        advanced = wm.advance(_orders(), order_item_id=5, payment_id=3)
+        assert (advanced.order_item_id, advanced.payment_id) == (7, 3)
+
+    def test_late_rows_of_ingested_orders(self):
+        wm = Watermark(pd.Timestamp("2023-01-05 14:00"), 3, order_item_id=4)
+        new_orders, = wm.select_new(_orders())
+        items = pd.DataFrame({"order_item_id": [3, 5, 6], "order_id": [1, 1, 4]})
+        # Item 5 is new but its order 1 was ingested; item 6 belongs to new order 4.
+        assert wm.late_rows("order_items", items, new_orders).tolist() == [False, True, False]
+
+    def test_no_late_rows_without_child_mark(self):
+        wm = Watermark(pd.Timestamp("2023-01-05 14:00"), 3)
+        items = pd.DataFrame({"order_item_id": [9], "order_id": [1]})
+        assert not wm.late_rows("order_items", items, _orders().iloc[:0]).any()
+
+
+# ── IncrementalState ─────────────────────────────────────────────────
+
+class TestIncrementalState:
+
+    def test_missing_state_has_no_watermark(self, tmp_path):
+        assert IncrementalState(tmp_path / "state").load_watermark() is None
+
+    def test_round_trip(self, tmp_path):
+        state = IncrementalState(tmp_path / "state")
+        aggregates = DetailAggregates.from_detail(_detail())
+        wm = Watermark.from_orders(_orders(), order_item_id=6, payment_id=4)
+        state.save(wm, aggregates)
+        assert state.load_watermark() == wm
+        restored = state.load_aggregates()
+        pd.testing.assert_frame_equal(
+            restored.hourly, aggregates.hourly, check_dtype=False
+        )
+
+    def test_pending_loads_follow_the_database(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        aggregates = DetailAggregates.from_detail(_detail())
+        marks = [Watermark(pd.Timestamp(f"2023-01-0{day}"), day) for day in (3, 5, 7)]
+        state.save(marks[0], aggregates)
+        state.save(marks[1], aggregates, previous_watermark=marks[0])
+        state.save(marks[2], aggregates, previous_watermark=marks[1])
+        loads = [(None, marks[0]), (marks[0], marks[1]), (marks[1], marks[2])]
+        assert state.load_loads() == loads
+        # Never loaded, then loaded up to the first load only.
+        assert state.load_pending() == loads
+        state.save_database_watermark(marks[0])
+        assert state.load_pending() == loads[1:]
+        state.save_database_watermark(marks[2])
+        assert state.load_pending() == []
+        # A full load starts the list over.
+        state.save(marks[2], aggregates)
+        assert state.load_loads() == [(None, marks[2])]
+
+    def test_last_load_range_and_customers(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        aggregates = DetailAggregates.from_detail(_detail())
+        first = Watermark(pd.Timestamp("2023-01-03"), 2)
+        state.save(first, aggregates, customers=3)
+        assert state.load_previous_watermark() is None
+        state.save(Watermark(pd.Timestamp("2023-01-07"), 4), aggregates, previous_watermark=first, customers=5)
+        assert state.load_previous_watermark() == first
+        assert state.load_customer_count() == 5
+
+    def test_save_replaces_previous_snapshot(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        aggregates = DetailAggregates.from_detail(_detail())
+        state.save(Watermark(pd.Timestamp("2023-01-03"), 2), aggregates)
+        state.save(Watermark(pd.Timestamp("2023-01-07"), 4), aggregates)
+        assert len(list(tmp_path.glob("hourly-*.csv"))) == 1
+
+    def test_reach_sketches_round_trip(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        orders = _orders().assign(customer_id=[10, 11, 10, 12])
+        reach = ReachSketches.from_orders(orders)
+        state.save(Watermark.from_orders(orders), DetailAggregates.from_detail(_detail()), reach)
+        assert state.load_reach().distinct() == reach.distinct()
+        assert IncrementalState(tmp_path / "empty").load_reach().distinct() == {}
+
+    def test_top_item_sketches_round_trip(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        detail = _detail().assign(location="Downtown")
+        top_items = TopItemSketches.from_detail(detail, capacity=2)
+        state.save(Watermark.from_orders(_orders()), DetailAggregates.from_detail(detail), None, top_items)
+        restored = state.load_top_items()
+        assert restored.capacity == 2
+        pd.testing.assert_frame_equal(restored.top(2), top_items.top(2))
+
+    def test_order_value_sketches_round_trip(self, tmp_path):
+        state = IncrementalState(tmp_path)
+        facts = build_order_facts(_detail())
+        order_values = OrderValueSketches.from_orders(facts, compression=50)
+        state.save(
+            Watermark.from_orders(_orders()), DetailAggregates.from_detail(_detail()),
+            order_values=order_values,
+        )
+        restored = state.load_order_values()
+        assert restored.compression == 50
+        pd.testing.assert_frame_equal(restored.rollup("day"), order_values.rollup("day"))
+
+    def test_merged_delta_matches_full_run(self, tmp_path):
+        detail = _detail()
+        state = IncrementalState(tmp_path)
+        first = detail[detail["order_id"] <= 2]
+        state.save(Watermark.from_orders(first), DetailAggregates.from_detail(first))
+
+        merged = DetailAggregates.merge([
+            state.load_aggregates(),
+            DetailAggregates.from_detail(detail[detail["order_id"] > 2]),
+        ])
+        engine = KPIEngine()
+        incremental = engine.run_aggregates(merged)
+        full = engine.run(detail)
+        for name, expected in full.items():
+            pd.testing.assert_frame_equal(
+                incremental[name].reset_index(drop=True),
+                expected.reset_index(drop=True),
+                check_dtype=False,
+            )
@@ -0,0 +1,168 @@
+"""Tests for src.services.instrumentation module."""
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from src.services.data_loader import SqlAlchemyRepository
+from src.services.instrumentation import Instrumentation, observe, record
+from src.services.kpi_calculator import DailyRevenueKPI, DetailAggregates, compute_kpi, run_kpi
+from src.services.kpi_scheduler import KPIScheduler
+
+
+@pytest.fixture
+def detail():
+    return pd.DataFrame({
+        "order_id": [1, 1, 2, 3],
+        "order_timestamp": pd.to_datetime(
+            ["2023-01-02 10:00", "2023-01-02 10:00", "2023-01-02 12:30", "2023-01-03 09:15"]
+        ),
+        "location": ["Downtown"] * 4,
+        "quantity": [1, 2, 1, 3],
+        "item_price": [10.0, 5.0, 20.0, 4.0],
+        "line_total": [10.0, 10.0, 20.0, 12.0],
+    })
+
+
+def _spans(instrumentation, kind):
+    return [s for s in instrumentation.spans if s.kind == kind]
+
+
+# ── Stages and hooks ─────────────────────────────────────────────────
+
+class TestInstrumentation:
+
+    def test_stage_records_rows_and_memory(self):
+        instrumentation = Instrumentation(trace_memory=True)
+        with instrumentation.run():
+            with instrumentation.stage("build", rows_in=3) as span:
+                data = [0] * 200_000
+                span.rows_out = len(data)
+        [stage] = _spans(instrumentation, "stage")
+        assert (stage.name, stage.rows_in, stage.rows_out) == ("build", 3, 200_000)
+        assert stage.seconds > 0 and stage.rows_per_second > 0
+        assert stage.traced_peak_mb >= 1
+        assert stage.peak_rss_mb > 0
+
+    def test_stages_do_not_nest(self):
+        instrumentation = Instrumentation()
+        with instrumentation.stage("outer"), pytest.raises(RuntimeError, match="inside stage"):
+            with instrumentation.stage("inner"):
+                pass
+
+    def test_operations_carry_their_stage(self, detail):
+        instrumentation = Instrumentation()
+        with instrumentation.run():
+            with instrumentation.stage("kpis"):
+                compute_kpi(DailyRevenueKPI(), DetailAggregates.from_detail(detail))
+            run_kpi(DailyRevenueKPI(), detail)
+        kpis = _spans(instrumentation, "kpi")
+        assert [(s.name, s.stage, s.rows_out) for s in kpis] == [
+            ("daily_revenue", "kpis", 2), ("daily_revenue", None, 2),
+        ]
+
+    def test_observe_outside_a_run_records_nothing(self, detail):
+        instrumentation = Instrumentation()
+        with observe("kpi", "unreported") as span:
+            pass
+        run_kpi(DailyRevenueKPI(), detail)
+        record("kpi", "unreported", 1.0)
+        assert span.seconds >= 0
+        assert instrumentation.spans == []
+
+    def test_threads_report_to_the_run(self):
+        def work(n):
+            with observe("kpi", f"k{n}"):
+                pass
+
+        instrumentation = Instrumentation()
+        with instrumentation.run(), instrumentation.stage("kpis"):
+            workers = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        kpis = _spans(instrumentation, "kpi")
+        assert sorted(s.name for s in kpis) == ["k0", "k1", "k2", "k3"]
+        assert {s.stage for s in kpis} == {"kpis"}
+
+    def test_process_pool_kpis_are_recorded(self, detail):
+        instrumentation = Instrumentation()
+        with instrumentation.run():
+            KPIScheduler([DailyRevenueKPI()], mode="process", max_workers=1).run(
+                DetailAggregates.from_detail(detail)
+            )
+        assert [(s.name, s.rows_out) for s in _spans(instrumentation, "kpi")] == [("daily_revenue", 2)]
+
+    def test_repository_reports_rows(self, tmp_path):
+        instrumentation = Instrumentation()
+        with instrumentation.run(), SqlAlchemyRepository(f"sqlite:///{tmp_path / 'm.db'}") as repo:
+            repo.execute_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+            repo.bulk_load([("t", pd.DataFrame({"id": [1, 2, 3], "v": list("abc")}))])
+            repo.load_dataframe("t", pd.DataFrame({"id": [3, 4], "v": ["c", "d"]}))
+            repo.fetch_dataframe("SELECT * FROM t")
+        db = {s.name: s.rows_out for s in _spans(instrumentation, "db")}
+        assert db == {"execute_sql": None, "bulk_load": 3, "load_dataframe": 2, "fetch_dataframe": 4}
+
+    def test_profile_dump_per_stage(self, tmp_path):
+        instrumentation = Instrumentation(profile_dir=tmp_path / "profiles")
+        with instrumentation.run():
+            with instrumentation.stage("load"):
+                sum(range(1000))
+        assert (tmp_path / "profiles" / "load.prof").stat().st_size > 0
+
+
+# ── Reports ──────────────────────────────────────────────────────────
+
+class TestReports:
+
+    def test_json_report(self, tmp_path):
+        instrumentation = Instrumentation()
+        with instrumentation.run(report=tmp_path / "run.json"):
+            with instrumentation.stage("ingest") as span:
+                span.rows_out = 10
+        report = json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))
+        assert report["status"] == "ok"
+        assert [(s["name"], s["rows_out"]) for s in report["spans"]] == [("ingest", 10)]
+
+    def test_failed_run_is_still_reported(self, tmp_path):
+        instrumentation = Instrumentation()
+        with pytest.raises(ValueError):
+            with instrumentation.run(report=tmp_path / "run.json", metrics=tmp_path / "run.prom"):
+                with instrumentation.stage("ingest"):
+                    raise ValueError("bad input")
+        report = json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))
+        assert report["status"] == "failed" and "bad input" in report["error"]
+        assert [s["name"] for s in report["spans"]] == ["ingest"]
+        assert "restaurant_etl_run_success 0.0" in (tmp_path / "run.prom").read_text(encoding="utf-8")
+
+    def test_prometheus_text(self, tmp_path):
+        instrumentation = Instrumentation()
+        with instrumentation.run(metrics=tmp_path / "run.prom"):
+            with instrumentation.stage("database") as span:
+                span.cached = True
+                for rows in (4, 6):
+                    with observe("db", "bulk_load") as db_span:
+                        db_span.rows_out = rows
+                with observe("kpi", 'odd "name"'):
+                    pass
+        text = (tmp_path / "run.prom").read_text(encoding="utf-8")
+        assert "# TYPE restaurant_etl_stage_seconds gauge" in text
+        assert 'restaurant_etl_stage_cached{stage="database"} 1.0' in text
+        assert 'restaurant_etl_operation_calls{kind="db",name="bulk_load"} 2.0' in text
+        assert 'restaurant_etl_operation_rows{kind="db",name="bulk_load"} 10.0' in text
+        assert 'restaurant_etl_db_rows_per_second{name="bulk_load"}' in text
+        assert 'name="odd \\"name\\""' in text
+        for line in text.splitlines():
+            assert line.startswith("#") or float(line.rsplit(" ", 1)[1]) >= 0
+
+    def test_constant_labels(self, tmp_path):
+        instrumentation = Instrumentation(labels={"stages": "kpi,export"})
+        with instrumentation.run(report=tmp_path / "run.json", metrics=tmp_path / "run.prom"):
+            with instrumentation.stage("kpis"):
+                pass
+        text = (tmp_path / "run.prom").read_text(encoding="utf-8")
+        assert 'restaurant_etl_run_success{stages="kpi,export"} 1.0' in text
+        assert 'restaurant_etl_stage_seconds{stages="kpi,export",stage="kpis"}' in text
+        assert json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))["labels"] == {"stages": "kpi,export"}
@@ -14,6 +14,8 @@ from src.services.kpi_calculator import (
     WeekdayVsWeekendKPI,
     TopMenuItemsKPI,
     RevenueByCategoryKPI,
+    KPIEngine,
+    default_kpis,
     run_kpi,
 )
 
@@ -150,6 +152,16 @@ class TestTopMenuItemsKPI:
         revenues = result["total_revenue"].tolist()
         assert revenues == sorted(revenues, reverse=True)
 
+    def test_top_k_keeps_best_sellers(self, sample_detail):
+        full = TopMenuItemsKPI().calculate(sample_detail)
+        result = TopMenuItemsKPI(top_k=2).calculate(sample_detail)
+        pd.testing.assert_frame_equal(result, full.head(2))
+
+    def test_top_k_per_slice(self, sample_detail):
+        detail = sample_detail.assign(location=np.where(sample_detail["order_id"] % 2, "A", "B"))
+        result = TopMenuItemsKPI(dimensions=("location",), top_k=1).calculate(detail)
+        assert result.groupby(["slice", "location"], dropna=False).size().max() == 1
+
     def test_missing_column_raises(self):
         df = pd.DataFrame({"order_id": [1], "quantity": [1], "line_total": [10]})
         with pytest.raises(ValueError):
@@ -171,6 +183,122 @@ class TestRevenueByCategoryKPI:
             RevenueByCategoryKPI().calculate(df)
 
 
+# ── KPIEngine ───────────────────────────────────────────────────────
+
+@pytest.fixture
+def random_detail():
+    """Larger detail frame with one timestamp per order."""
+    rng = np.random.default_rng(7)
+    order_ids = rng.integers(1, 400, 3000)
+    starts = pd.Timestamp("2022-12-20") + pd.to_timedelta(
+        rng.integers(0, 40 * 86400, 400), unit="s"
+    )
+    df = pd.DataFrame({
+        "order_id": order_ids,
+        "order_timestamp": starts[order_ids - 1],
+        "quantity": rng.integers(1, 4, 3000),
+        "item_price": rng.integers(10, 200, 3000) * 1.0,
+        "item_name": rng.choice(["Burger", "Fries", "Latte", "Cookie"], 3000),
+        "category_name": rng.choice(["Fastfood", "Coffee", "Desserts"], 3000),
+    })
+    df["line_total"] = df["quantity"] * df["item_price"]
+    return df
+
+
+class TestKPIEngine:
+
+    def test_runs_every_default_kpi(self, sample_detail):
+        result = KPIEngine(default_kpis(sample_detail.columns)).run(sample_detail)
+        assert len(result) == 10
+        assert result["daily_revenue"]["total_revenue"].sum() == 520.0
+
+    def test_matches_standalone_calculators(self, random_detail):
+        kpis = default_kpis(random_detail.columns)
+        result = KPIEngine(kpis).run(random_detail)
+        for kpi in kpis:
+            pd.testing.assert_frame_equal(result[kpi.name], kpi.calculate(random_detail))
+
+    def test_matches_line_item_groupby(self, random_detail):
+        result = KPIEngine().run(random_detail)
+        dates = random_detail["order_timestamp"].dt.date
+        expected_orders = random_detail.groupby(dates)["order_id"].nunique()
+        expected_revenue = random_detail.groupby(dates)["line_total"].sum()
+        assert result["orders_per_day"]["orders_count"].tolist() == expected_orders.tolist()
+        assert result["daily_revenue"]["total_revenue"].tolist() == pytest.approx(
+            expected_revenue.tolist()
+        )
+
+    def test_menu_kpis_skipped_without_columns(self, sample_detail):
+        kpis = default_kpis(sample_detail.drop(columns=["item_name", "category_name"]).columns)
+        assert {k.name for k in kpis}.isdisjoint({"top_menu_items", "revenue_by_category"})
+
+    def test_calculate_only_kpi_receives_detail(self, sample_detail):
+        class RowCountKPI:
+            name = "row_count"
+
+            def calculate(self, df):
+                return pd.DataFrame({"rows": [len(df)]})
+
+        result = KPIEngine([RowCountKPI()]).run(sample_detail)
+        assert result["row_count"]["rows"].iloc[0] == 6
+
+
+# ── Dimension slices ─────────────────────────────────────────────────
+
+def _key_sorted(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.fixture
+def sliced_detail(random_detail):
+    locations = np.array(["Downtown", "Airport", None], dtype=object)
+    return random_detail.assign(location=locations[random_detail["order_id"] % 3])
+
+
+class TestDimensions:
+
+    def test_slices_match_filtered_runs(self, sliced_detail):
+        kpis = default_kpis(sliced_detail.columns, dimensions=("location",))
+        result = KPIEngine(kpis).run(sliced_detail)
+        for location in ["Downtown", "Airport"]:
+            subset = sliced_detail.loc[sliced_detail["location"] == location]
+            expected = KPIEngine(default_kpis(subset.columns)).run(subset)
+            for name, frame in result.items():
+                part = frame.loc[(frame["slice"] == "location") & (frame["location"] == location)]
+                pd.testing.assert_frame_equal(
+                    _key_sorted(part.drop(columns=["slice", "location"])),
+                    _key_sorted(expected[name]),
+                    check_dtype=False, obj=name,
+                )
+
+    def test_overall_rollup_matches_unsliced(self, sliced_detail):
+        unsliced = KPIEngine(default_kpis(sliced_detail.columns)).run(sliced_detail)
+        sliced = KPIEngine(default_kpis(sliced_detail.columns, dimensions=("location",))).run(sliced_detail)
+        for name, frame in sliced.items():
+            overall = frame.loc[frame["slice"] == "all"].drop(columns=["slice", "location"])
+            pd.testing.assert_frame_equal(
+                _key_sorted(overall), _key_sorted(unsliced[name]),
+                check_dtype=False, obj=name,
+            )
+
+    def test_missing_dimension_value_is_its_own_slice(self, sliced_detail):
+        result = DailyRevenueKPI(dimensions=("location",)).calculate(sliced_detail)
+        slices = result.loc[result["slice"] == "location", "total_revenue"].sum()
+        overall = result.loc[result["slice"] == "all", "total_revenue"].sum()
+        assert slices == pytest.approx(overall)
+        assert result.loc[result["slice"] == "location", "location"].isna().any()
+
+    def test_multiple_dimensions_get_separate_sets(self, sliced_detail):
+        detail = sliced_detail.assign(staff_id=sliced_detail["order_id"] % 4)
+        result = AverageOrderValueKPI(dimensions=("location", "staff_id")).calculate(detail)
+        assert list(result.columns) == ["slice", "location", "staff_id", "average_order_value"]
+        assert result["slice"].value_counts().to_dict() == {"location": 3, "staff_id": 4, "all": 1}
+
+    def test_missing_dimension_column_raises(self, sample_detail):
+        with pytest.raises(ValueError, match="location"):
+            PeakHoursKPI(dimensions=("location",)).calculate(sample_detail)
+
+
 # ── run_kpi helper ───────────────────────────────────────────────────
 
 class TestRunKPI:
@@ -0,0 +1,109 @@
+"""Tests for src.services.kpi_pushdown module."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.schema import TABLE_SCHEMAS
+from src.services.data_loader import SqlAlchemyRepository
+from src.services.kpi_calculator import KPIEngine, default_kpis
+from src.services.kpi_pushdown import SqlAggregates
+
+SCHEMA = Path("sql/schema/create_tables_sqlite.sql")
+SUMMARY = Path("sql/summary/summary_tables_sqlite.sql")
+
+
+@pytest.fixture
+def tables():
+    rng = np.random.default_rng(11)
+    n_orders, n_items = 300, 900
+    categories = pd.DataFrame({"category_id": [1, 2, 3], "category_name": ["Mains", "Drinks", "Desserts"]})
+    menu_items = pd.DataFrame({
+        "menu_item_id": range(1, 13),
+        "category_id": [1, 2, 3] * 4,
+        "item_name": [f"Item {i}" for i in range(1, 13)],
+        "unit_price": rng.integers(3, 30, 12).astype(float),
+    })
+    orders = pd.DataFrame({
+        "order_id": range(1, n_orders + 1),
+        "order_timestamp": pd.Timestamp("2023-01-01")
+        + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, n_orders), unit="min"),
+    })
+    order_items = pd.DataFrame({
+        "order_item_id": range(1, n_items + 1),
+        "order_id": rng.integers(1, n_orders + 1, n_items),
+        "menu_item_id": rng.integers(1, 13, n_items),
+        "quantity": rng.integers(1, 4, n_items),
+        "item_price": rng.integers(300, 3000, n_items) / 100,
+    })
+    return {
+        "categories": categories, "menu_items": menu_items,
+        "orders": orders, "order_items": order_items,
+    }
+
+
+@pytest.fixture
+def repo(tmp_path, tables):
+    repository = SqlAlchemyRepository(f"sqlite:///{tmp_path / 'kpi.db'}")
+    repository.execute_sql(SCHEMA.read_text(encoding="utf-8"))
+    repository.execute_sql(SUMMARY.read_text(encoding="utf-8"))
+    repository.bulk_load(tables.items())
+    yield repository
+    repository.close()
+
+
+def _detail(tables):
+    detail = (
+        tables["order_items"]
+        .merge(tables["orders"], on="order_id", how="left")
+        .merge(tables["menu_items"][["menu_item_id", "item_name", "category_id"]], on="menu_item_id")
+        .merge(tables["categories"], on="category_id")
+    )
+    detail["line_total"] = detail["quantity"] * detail["item_price"]
+    return detail
+
+
+def _key_sorted(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _typed(tables):
+    """``tables`` with the dtypes the pipeline reads them with."""
+    return {
+        name: df.astype({c: t for c, t in TABLE_SCHEMAS[name].dtypes.items() if c in df.columns})
+        for name, df in tables.items()
+    }
+
+
+class TestSqlAggregates:
+
+    def test_parity_with_pandas_backend(self, repo, tables):
+        detail = _detail(_typed(tables))
+        engine = KPIEngine(default_kpis(detail.columns))
+        expected = engine.run(detail)
+        actual = engine.run_aggregates(SqlAggregates(repo).load())
+        assert actual.keys() == expected.keys()
+        for name in expected:
+            pd.testing.assert_frame_equal(
+                _key_sorted(actual[name]), _key_sorted(expected[name]), obj=name,
+            )
+
+    def test_reflects_incremental_changes(self, repo, tables):
+        extra = pd.DataFrame({
+            "order_item_id": [10_000], "order_id": [1], "menu_item_id": [1],
+            "quantity": [2], "item_price": [5.0],
+        })
+        repo.load_dataframe("order_items", extra)
+        tables["order_items"] = pd.concat([tables["order_items"], extra], ignore_index=True)
+        engine = KPIEngine(default_kpis(["item_name", "category_name"]))
+        expected = engine.run(_detail(tables))["daily_revenue"]
+        actual = engine.run_aggregates(SqlAggregates(repo).load())["daily_revenue"]
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_hourly_bucket_dtype(self, repo):
+        aggregates = SqlAggregates(repo).load()
+        assert pd.api.types.is_datetime64_any_dtype(aggregates.hourly["hour_bucket"])
+        assert set(aggregates.menu.columns) == {
+            "item_name", "category_name", "total_quantity", "total_revenue",
+        }
@@ -0,0 +1,66 @@
+"""Tests for src.services.kpi_scheduler module."""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.kpi_calculator import DetailAggregates, KPIEngine, default_kpis
+from src.services.kpi_scheduler import KPIScheduler
+
+
+@dataclass
+class LocationCountKPI:
+    """A ``calculate``-only KPI, which needs the detail rows."""
+    name: str = "orders_by_location"
+
+    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.groupby("location", as_index=False)["order_id"].nunique()
+
+
+@pytest.fixture
+def detail():
+    rng = np.random.default_rng(3)
+    order_ids = rng.integers(1, 200, 1500)
+    starts = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 30 * 86400, 200), unit="s")
+    df = pd.DataFrame({
+        "order_id": order_ids,
+        "order_timestamp": starts[order_ids - 1],
+        "location": np.array(["Downtown", "Uptown"])[order_ids % 2],
+        "quantity": rng.integers(1, 4, 1500),
+        "item_price": rng.integers(10, 200, 1500) * 1.0,
+        "item_name": rng.choice(["Burger", "Fries", "Latte"], 1500),
+        "category_name": rng.choice(["Mains", "Coffee"], 1500),
+    })
+    df["line_total"] = df["quantity"] * df["item_price"]
+    return df
+
+
+class TestKPIScheduler:
+
+    @pytest.mark.parametrize("mode", ["serial", "thread", "process"])
+    def test_matches_engine(self, detail, mode):
+        kpis = default_kpis(detail.columns) + [LocationCountKPI()]
+        expected = KPIEngine(kpis).run(detail)
+        result = KPIScheduler(kpis, mode=mode, max_workers=2).run(
+            DetailAggregates.from_detail(detail), detail
+        )
+        assert list(result) == list(expected)
+        for name in expected:
+            pd.testing.assert_frame_equal(result[name], expected[name])
+
+    def test_records_timings_in_order(self, detail):
+        kpis = default_kpis(detail.columns)
+        scheduler = KPIScheduler(kpis, mode="thread")
+        scheduler.run(DetailAggregates.from_detail(detail))
+        assert list(scheduler.timings) == [k.name for k in kpis]
+        assert all(seconds >= 0 for seconds in scheduler.timings.values())
+
+    def test_detail_required_for_row_kpis(self, detail):
+        scheduler = KPIScheduler([LocationCountKPI()], mode="thread")
+        with pytest.raises(ValueError, match="needs the detail frame"):
+            scheduler.run(DetailAggregates.from_detail(detail))
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError, match="mode must be one of"):
+            KPIScheduler([], mode="gpu")
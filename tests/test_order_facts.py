@@ -0,0 +1,76 @@
+"""Tests for src.services.order_facts module."""
+import pandas as pd
+import pytest
+
+from src.services.kpi_calculator import DetailAggregates
+from src.services.order_facts import build_order_facts, merge_order_facts
+
+
+@pytest.fixture
+def detail():
+    return pd.DataFrame({
+        "order_id": [1, 1, 2, 3, 3, 3],
+        "order_timestamp": pd.to_datetime([
+            "2023-01-02 10:05", "2023-01-02 10:05", "2023-01-02 10:40",
+            "2023-01-07 18:30", "2023-01-07 18:30", "2023-01-07 18:30",
+        ]),
+        "location": ["Downtown", "Downtown", "Airport", "Downtown", "Downtown", "Downtown"],
+        "staff_id": [7, 7, 8, 7, 7, 7],
+        "quantity": pd.array([2, 1, 1, 3, 1, 2], dtype="int16"),
+        "line_total": [20.0, 4.0, 10.0, 18.0, 5.0, 8.0],
+    })
+
+
+# ── Building ─────────────────────────────────────────────────────────
+
+class TestBuildOrderFacts:
+
+    def test_one_row_per_order(self, detail):
+        facts = build_order_facts(detail)
+        assert facts.to_dict("list") == {
+            "order_id": [1, 2, 3],
+            "order_timestamp": list(pd.to_datetime(
+                ["2023-01-02 10:05", "2023-01-02 10:40", "2023-01-07 18:30"]
+            )),
+            "location": ["Downtown", "Airport", "Downtown"],
+            "item_count": [3, 1, 6],
+            "order_total": [24.0, 10.0, 31.0],
+        }
+        assert facts["item_count"].dtype == "int64"
+
+    def test_carries_requested_dimensions(self, detail):
+        facts = build_order_facts(detail, dimensions=("staff_id", "payment_method"))
+        assert list(facts.columns) == [
+            "order_id", "order_timestamp", "location", "staff_id", "item_count", "order_total",
+        ]
+
+    def test_without_quantity(self, detail):
+        facts = build_order_facts(detail.drop(columns="quantity"))
+        assert "item_count" not in facts.columns
+        assert facts["order_total"].sum() == detail["line_total"].sum()
+
+
+# ── Merging ──────────────────────────────────────────────────────────
+
+class TestMergeOrderFacts:
+
+    def test_orders_split_across_chunks(self, detail):
+        parts = [build_order_facts(detail.iloc[:4]), build_order_facts(detail.iloc[4:])]
+        merged = merge_order_facts(parts)
+        pd.testing.assert_frame_equal(merged, build_order_facts(detail))
+
+
+# ── Aggregates from facts ────────────────────────────────────────────
+
+class TestFromOrders:
+
+    def test_matches_detail_aggregates(self, detail):
+        from_facts = DetailAggregates.from_orders(build_order_facts(detail), ["location"])
+        from_detail = DetailAggregates.from_detail(detail, ["location"])
+        pd.testing.assert_frame_equal(from_facts.hourly, from_detail.hourly)
+        assert from_facts.hourly["orders_count"].sum() == 3
+
+    def test_prebuilt_facts_are_used(self, detail):
+        facts = build_order_facts(detail).assign(order_total=1.0)
+        aggregates = DetailAggregates.from_detail(detail, orders=facts)
+        assert aggregates.hourly["total_revenue"].sum() == 3.0
@@ -0,0 +1,97 @@
+"""Tests for src.services.order_value module."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.order_value import (
+    OrderValueDistributionKPI, OrderValueSketches, default_order_value_kpis,
+)
+
+
+@pytest.fixture(scope="module")
+def facts():
+    """Order facts for 20,000 orders over a quarter in three stores."""
+    rng = np.random.default_rng(17)
+    n = 20_000
+    return pd.DataFrame({
+        "order_id": np.arange(1, n + 1),
+        "order_timestamp": pd.Timestamp("2023-01-01")
+        + pd.to_timedelta(rng.integers(0, 90 * 86_400, n), unit="s"),
+        "location": rng.choice(["Downtown", "Airport", "Mall"], n),
+        "order_total": np.round(rng.lognormal(5, 0.6, n), 2),
+    })
+
+
+def _rank(values, estimate):
+    return np.searchsorted(np.sort(values), estimate) / len(values)
+
+
+# ── Sketches vs numpy.percentile ─────────────────────────────────────
+
+class TestOrderValueSketches:
+
+    def test_whole_history_percentiles(self, facts):
+        digest = OrderValueSketches.from_orders(facts).window()
+        for q in (0.5, 0.9, 0.99):
+            assert abs(_rank(facts["order_total"], digest.quantile(q)[0]) - q) < 0.005
+
+    def test_window_and_location(self, facts):
+        sketches = OrderValueSketches.from_orders(facts)
+        day = facts["order_timestamp"].dt.normalize()
+        subset = facts.loc[
+            (day >= pd.Timestamp("2023-02-01")) & (day <= pd.Timestamp("2023-02-28"))
+            & (facts["location"] == "Mall"), "order_total"
+        ]
+        digest = sketches.window(date(2023, 2, 1), date(2023, 2, 28), "Mall")
+        assert digest.weight == len(subset)
+        for q in (0.5, 0.9, 0.99):
+            assert abs(_rank(subset, digest.quantile(q)[0]) - q) < 0.01
+
+    def test_daily_by_location_is_exact(self, facts):
+        result = OrderValueDistributionKPI(by_location=True).from_sketches(
+            OrderValueSketches.from_orders(facts)
+        )
+        expected = (
+            facts.assign(order_date=facts["order_timestamp"].dt.date)
+            .groupby(["location", "order_date"])["order_total"]
+            .quantile([0.5, 0.9, 0.99])
+            .unstack()
+            .round(2)
+        )
+        np.testing.assert_allclose(
+            result[["p50", "p90", "p99"]].to_numpy(), expected.to_numpy(), atol=0.01
+        )
+
+    def test_merge_matches_single_build(self, facts):
+        merged = OrderValueSketches.merge([
+            OrderValueSketches.from_orders(facts.iloc[:8_000]),
+            OrderValueSketches.from_orders(facts.iloc[8_000:]),
+        ])
+        whole = OrderValueSketches.from_orders(facts)
+        pd.testing.assert_frame_equal(merged.rollup("month"), whole.rollup("month"))
+
+    def test_empty_rollup(self):
+        result = OrderValueSketches().rollup("day")
+        assert list(result.columns) == ["order_date", "orders_count", "p50", "p90", "p99"]
+
+
+# ── Order-value KPIs ─────────────────────────────────────────────────
+
+class TestOrderValueDistributionKPI:
+
+    def test_calculate_from_detail(self):
+        detail = pd.DataFrame({
+            "order_id": [1, 1, 2, 3],
+            "order_timestamp": pd.to_datetime(["2023-01-02 10:00"] * 2 + ["2023-01-02 12:00"] * 2),
+            "line_total": [10.0, 5.0, 30.0, 45.0],
+        })
+        result = OrderValueDistributionKPI(period="total", quantiles=(0.5,)).calculate(detail)
+        assert result.to_dict("records") == [{"orders_count": 3, "p50": 30.0}]
+
+    def test_default_kpis(self, facts):
+        sketches = OrderValueSketches.from_orders(facts)
+        results = {k.name: k.from_sketches(sketches) for k in default_order_value_kpis()}
+        assert len(results["order_value_by_location"]) == 3
+        assert results["order_value_daily"]["orders_count"].sum() == len(facts)
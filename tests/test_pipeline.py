@@ -0,0 +1,188 @@
+"""Tests for src.pipeline module."""
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.config.options import STAGES
+from src.pipeline import RunOptions, _Run, run_pipeline
+from src.services.data_loader import SqlAlchemyRepository
+from src.services.sample_data_generator import generate
+from src.services.staging import read_order_detail, read_order_facts
+
+SQL = Path(__file__).resolve().parents[1] / "sql"
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A working directory with the sql scripts, a database and raw data;
+    returns the full tables, of which only the first 300 orders are raw."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'restaurant.db'}")
+    (tmp_path / "sql").symlink_to(SQL)
+    raw = tmp_path / "data" / "raw"
+    generate(raw, num_customers=50, num_orders=500)
+    full = {name: pd.read_csv(raw / f"{name}.csv") for name in ("orders", "order_items", "payments")}
+    for name, df in full.items():
+        df.loc[df["order_id"] <= 300].to_csv(raw / f"{name}.csv", index=False)
+    return full
+
+
+def _run(**options):
+    run_pipeline(RunOptions(**options))
+
+
+def _restore(full, last_order=None):
+    for name, df in full.items():
+        if last_order is not None:
+            df = df.loc[df["order_id"] <= last_order]
+        df.to_csv(Path("data/raw") / f"{name}.csv", index=False)
+
+
+def _database_counts():
+    with SqlAlchemyRepository(f"sqlite:///{Path('restaurant.db').resolve()}") as repo:
+        return {
+            table: int(repo.fetch_dataframe(f"SELECT COUNT(*) AS n FROM {table}")["n"].iloc[0])
+            for table in ("orders", "order_items", "payments", "order_facts")
+        }
+
+
+def _full_counts(full):
+    return {
+        "orders": len(full["orders"]),
+        "order_items": len(full["order_items"]),
+        "payments": len(full["payments"]),
+        "order_facts": full["order_items"]["order_id"].nunique(),
+    }
+
+
+# ── Options ──────────────────────────────────────────────────────────
+
+class TestRunOptions:
+
+    def test_defaults_run_every_stage(self):
+        assert RunOptions().stages == STAGES
+
+    def test_stages_run_in_pipeline_order(self):
+        assert RunOptions(stages=("export", "load", "export")).stages == ("load", "export")
+
+    def test_unknown_stage(self):
+        with pytest.raises(ValueError, match="Unknown stage"):
+            RunOptions(stages=("load", "transform"))
+
+    def test_since_needs_pandas_backend(self):
+        with pytest.raises(ValueError, match="since"):
+            RunOptions(kpi_backend="sql", since=date(2023, 1, 1))
+
+
+# ── Incremental retries ──────────────────────────────────────────────
+
+class TestIncrementalRetry:
+
+    @pytest.mark.parametrize("chunk_size", [None, 400])
+    def test_retried_delta_is_staged_once(self, workspace, monkeypatch, chunk_size):
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+        _restore(workspace)
+
+        def fail(self):
+            raise RuntimeError("database unavailable")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(_Run, "_load_database", fail)
+            with pytest.raises(RuntimeError, match="database unavailable"):
+                _run(incremental=True, chunk_size=chunk_size, stages=("load", "db"))
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+
+        items = workspace["order_items"]
+        detail = read_order_detail(Path("data/staging/order_detail"), columns=["order_item_id"])
+        facts = read_order_facts(Path("data/staging/order_facts"), columns=["order_id"])
+        assert len(detail) == len(items)
+        assert detail["order_item_id"].is_unique
+        assert len(facts) == items["order_id"].nunique()
+
+    @pytest.mark.parametrize("chunk_size", [None, 400])
+    def test_late_items_of_ingested_orders_are_reported(self, workspace, capsys, chunk_size):
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+        items = workspace["order_items"]
+        late = items.loc[items["order_id"] == 1]
+        first_id = items["order_item_id"].max() + 1
+        late = late.assign(order_item_id=range(first_id, first_id + len(late)))
+        workspace["order_items"] = pd.concat([items, late])
+        _restore(workspace)
+        capsys.readouterr()
+
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+        out = capsys.readouterr().out
+        assert f"{len(late):,} order_items rows for already-ingested orders skipped" in out
+        staged = read_order_detail(Path("data/staging/order_detail"), columns=["order_item_id"])
+        assert not staged["order_item_id"].isin(late["order_item_id"]).any()
+
+        # The mark moved past them, so they are reported once.
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+        assert "already-ingested" not in capsys.readouterr().out
+
+
+# ── Database stage ───────────────────────────────────────────────────
+
+class TestDatabaseStage:
+
+    @pytest.mark.parametrize("chunk_size", [None, 400])
+    def test_loads_staged_delta_without_ingesting(self, workspace, monkeypatch, chunk_size):
+        _run(incremental=True, chunk_size=chunk_size, stages=("load", "db"))
+        _restore(workspace)
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+
+        def ingest(self):
+            raise AssertionError("the db stage re-read the raw tables")
+
+        monkeypatch.setattr(_Run, "_ingest", ingest)
+        _run(incremental=True, chunk_size=chunk_size, stages=("db",))
+
+        assert _database_counts() == _full_counts(workspace)
+
+    @pytest.mark.parametrize("chunk_size", [None, 400])
+    @pytest.mark.parametrize("next_stages", [("load", "db"), ("load",)])
+    def test_missed_database_load_is_made_up(self, workspace, monkeypatch, chunk_size, next_stages):
+        _run(incremental=True, chunk_size=chunk_size, stages=("load", "db"))
+        _restore(workspace, last_order=400)
+        _run(incremental=True, chunk_size=chunk_size, stages=("load",))
+
+        def fail(self, tables):
+            raise RuntimeError("database unavailable")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(SqlAlchemyRepository, "bulk_load", fail)
+            with pytest.raises(RuntimeError, match="database unavailable"):
+                _run(incremental=True, chunk_size=chunk_size, stages=("db",))
+
+        # The next day's load runs before the database is back.
+        _restore(workspace)
+        _run(incremental=True, chunk_size=chunk_size, stages=next_stages)
+        if "db" not in next_stages:
+            _run(incremental=True, chunk_size=chunk_size, stages=("db",))
+        assert _database_counts() == _full_counts(workspace)
+
+    def test_requires_a_load(self, workspace):
+        with pytest.raises(RuntimeError, match="run the load stage first"):
+            _run(stages=("db",))
+
+
+# ── Validation ───────────────────────────────────────────────────────
+
+class TestValidation:
+
+    def test_duplicate_order_id_is_quarantined_not_loaded(self, workspace):
+        raw = Path("data/raw/orders.csv")
+        orders = pd.read_csv(raw)
+        duplicate = orders.iloc[[0]].assign(location="Elsewhere")
+        pd.concat([orders, duplicate]).to_csv(raw, index=False)
+        _run(stages=("load", "db"))
+
+        quarantined = pd.read_csv("data/quarantine/orders.csv")
+        assert quarantined["quarantine_reason"].tolist() == ["duplicate order_id"]
+        assert quarantined["location"].tolist() == ["Elsewhere"]
+        with SqlAlchemyRepository(f"sqlite:///{Path('restaurant.db').resolve()}") as repo:
+            loaded = repo.fetch_dataframe("SELECT order_id, location FROM orders")
+        assert len(loaded) == len(orders)
+        assert "Elsewhere" not in set(loaded["location"])
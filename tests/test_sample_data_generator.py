@@ -0,0 +1,93 @@
+"""Tests for src.services.sample_data_generator module."""
+import pandas as pd
+import pytest
+
+from src.services.sample_data_generator import LOCATIONS, MENU, generate
+
+TABLES = ("categories", "menu_items", "customers", "staff", "orders", "order_items", "payments")
+
+
+def _read(directory):
+    return {name: pd.read_csv(directory / f"{name}.csv") for name in TABLES}
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    raw = tmp_path_factory.mktemp("raw")
+    generate(raw, num_customers=100, num_orders=2_000)
+    return _read(raw)
+
+
+# ── Default dataset ──────────────────────────────────────────────────
+
+class TestGenerate:
+
+    def test_row_counts(self, tables):
+        assert len(tables["categories"]) == len(MENU)
+        assert len(tables["menu_items"]) == sum(len(items) for items in MENU.values())
+        assert len(tables["customers"]) == 100
+        assert len(tables["orders"]) == len(tables["payments"]) == 2_000
+
+    def test_referential_integrity(self, tables):
+        orders, items = tables["orders"], tables["order_items"]
+        assert orders["customer_id"].isin(tables["customers"]["customer_id"]).all()
+        assert orders["staff_id"].isin(tables["staff"]["staff_id"]).all()
+        assert items["order_id"].isin(orders["order_id"]).all()
+        assert items["menu_item_id"].isin(tables["menu_items"]["menu_item_id"]).all()
+        assert tables["menu_items"]["category_id"].isin(tables["categories"]["category_id"]).all()
+        assert items["order_item_id"].is_unique
+
+    def test_payment_matches_items(self, tables):
+        items = tables["order_items"]
+        totals = (items["quantity"] * items["item_price"]).groupby(items["order_id"]).sum()
+        payments = tables["payments"].set_index("order_id")["payment_amount"]
+        pd.testing.assert_series_equal(
+            payments.loc[totals.index].astype(float), totals.astype(float), check_names=False
+        )
+
+    def test_baskets_hold_distinct_items(self, tables):
+        per_order = tables["order_items"].groupby("order_id")["menu_item_id"]
+        assert per_order.size().between(1, 5).all()
+        assert (per_order.nunique() == per_order.size()).all()
+
+    def test_opening_hours(self, tables):
+        timestamps = pd.to_datetime(tables["orders"]["order_timestamp"])
+        assert timestamps.dt.hour.between(6, 22).all()
+        assert (tables["payments"]["payment_timestamp"] == tables["orders"]["order_timestamp"]).all()
+
+    def test_same_seed_same_output(self, tmp_path):
+        first, second = tmp_path / "a", tmp_path / "b"
+        generate(first, num_customers=50, num_orders=300, seed=7)
+        generate(second, num_customers=50, num_orders=300, seed=7)
+        for name in TABLES:
+            assert (first / f"{name}.csv").read_bytes() == (second / f"{name}.csv").read_bytes()
+
+    def test_chunks_append(self, tmp_path):
+        generate(tmp_path, num_customers=30, num_orders=250, chunk_size=40)
+        tables = _read(tmp_path)
+        assert list(tables["customers"]["customer_id"]) == list(range(1, 31))
+        assert list(tables["orders"]["order_id"]) == list(range(1, 251))
+        assert list(tables["order_items"]["order_item_id"]) == list(range(1, len(tables["order_items"]) + 1))
+
+
+# ── Options ──────────────────────────────────────────────────────────
+
+class TestGenerateOptions:
+
+    def test_locations_days_and_items(self, tmp_path):
+        generate(tmp_path, num_customers=20, num_orders=500, num_locations=8, num_days=30, num_items=60)
+        tables = _read(tmp_path)
+        assert set(tables["orders"]["location"]) <= set(LOCATIONS) | {"Store 6", "Store 7", "Store 8"}
+        days = pd.to_datetime(tables["orders"]["order_timestamp"]).dt.normalize()
+        assert (days.max() - days.min()).days < 30
+        menu = tables["menu_items"]
+        assert len(menu) == 60 and menu["item_name"].is_unique
+
+    def test_seasonality_peaks_in_december(self, tmp_path):
+        generate(tmp_path, num_customers=20, num_orders=4_000, seasonality=0.9)
+        months = pd.to_datetime(_read(tmp_path)["orders"]["order_timestamp"]).dt.month
+        assert (months == 12).sum() > 2 * (months == 6).sum()
+
+    def test_seasonality_bounds(self, tmp_path):
+        with pytest.raises(ValueError, match="seasonality"):
+            generate(tmp_path, seasonality=1.5)
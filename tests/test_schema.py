@@ -0,0 +1,109 @@
+"""Tests for src.models.schema module."""
+import pandas as pd
+import pytest
+
+from src.models.schema import memory_report, read_table
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    pd.DataFrame({
+        "order_id": [1, 2, 3],
+        "customer_id": [10, None, 12],
+        "staff_id": [1, 1, 2],
+        "order_timestamp": ["2023-01-02 10:00:00", "2023-01-02 11:15:00", "2023-01-03 09:30:00"],
+        "order_status": ["completed", "completed", "cancelled"],
+        "location": ["Downtown", "Uptown", "Downtown"],
+    }).to_csv(tmp_path / "orders.csv", index=False)
+    pd.DataFrame({
+        "order_item_id": [1, 2, 3, 4],
+        "order_id": [1, 1, 2, 3],
+        "menu_item_id": [5, 6, 5, 7],
+        "quantity": [1, 2, 1, 3],
+        "item_price": [100, 30, 100, 60],
+    }).to_csv(tmp_path / "order_items.csv", index=False)
+    return tmp_path
+
+
+class TestReadTable:
+
+    def test_compact_dtypes(self, raw_dir):
+        orders = read_table(raw_dir / "orders.csv", "orders")
+        assert orders["order_id"].dtype == "int32"
+        assert orders["customer_id"].dtype == "Int32"
+        assert orders["customer_id"].isna().sum() == 1
+        assert isinstance(orders["location"].dtype, pd.CategoricalDtype)
+
+    def test_parses_timestamps(self, raw_dir):
+        orders = read_table(raw_dir / "orders.csv", "orders")
+        assert pd.api.types.is_datetime64_any_dtype(orders["order_timestamp"])
+        assert orders["order_timestamp"].iloc[1] == pd.Timestamp("2023-01-02 11:15")
+
+    def test_prices_keep_inferred_dtype(self, raw_dir):
+        items = read_table(raw_dir / "order_items.csv", "order_items")
+        assert pd.api.types.is_integer_dtype(items["item_price"])
+        assert items["quantity"].dtype == "int16"
+
+    def test_missing_columns_are_skipped(self, tmp_path):
+        pd.DataFrame({"order_id": [1], "location": ["Downtown"]}).to_csv(
+            tmp_path / "orders.csv", index=False
+        )
+        orders = read_table(tmp_path / "orders.csv", "orders")
+        assert list(orders.columns) == ["order_id", "location"]
+
+    def test_unknown_table_reads_untyped(self, raw_dir):
+        df = read_table(raw_dir / "orders.csv", "not_a_table")
+        assert df["order_id"].dtype == "int64"
+
+    def test_chunksize_passthrough(self, raw_dir):
+        chunks = list(read_table(raw_dir / "order_items.csv", "order_items", chunksize=3))
+        assert [len(c) for c in chunks] == [3, 1]
+        assert all(c["order_id"].dtype == "int32" for c in chunks)
+
+    def test_malformed_numbers_read_untyped(self, tmp_path):
+        pd.DataFrame({"order_item_id": [1, 2], "quantity": ["1", "two"]}).to_csv(
+            tmp_path / "order_items.csv", index=False
+        )
+        items = read_table(tmp_path / "order_items.csv", "order_items")
+        assert items["quantity"].tolist() == ["1", "two"]
+
+    def test_out_of_range_integers_are_not_wrapped(self, tmp_path):
+        pd.DataFrame({"order_item_id": [1, 2], "quantity": [1, 40000]}).to_csv(
+            tmp_path / "order_items.csv", index=False
+        )
+        items = read_table(tmp_path / "order_items.csv", "order_items")
+        assert items["quantity"].tolist() == [1, 40000]
+        assert items["quantity"].dtype == "int64"
+        assert items["order_item_id"].dtype == "int32"
+
+    def test_out_of_range_chunk_keeps_other_chunks_compact(self, tmp_path):
+        pd.DataFrame({"order_item_id": [1, 2, 3], "quantity": [1, 2, 40000]}).to_csv(
+            tmp_path / "order_items.csv", index=False
+        )
+        chunks = list(read_table(tmp_path / "order_items.csv", "order_items", chunksize=2))
+        assert chunks[0]["quantity"].dtype == "int16"
+        assert chunks[1]["quantity"].tolist() == [40000]
+
+    def test_integers_beyond_int64_read_untyped(self, tmp_path):
+        (tmp_path / "order_items.csv").write_text(
+            "order_item_id,quantity\n1,1\n2,99999999999999999999\n", encoding="utf-8"
+        )
+        items = read_table(tmp_path / "order_items.csv", "order_items")
+        assert str(items["quantity"].iloc[1]) == "99999999999999999999"
+
+    def test_malformed_chunk_read_untyped_from_there(self, tmp_path):
+        pd.DataFrame({"order_item_id": [1, 2, 3], "quantity": [1, 2, "x"]}).to_csv(
+            tmp_path / "order_items.csv", index=False
+        )
+        chunks = list(read_table(tmp_path / "order_items.csv", "order_items", chunksize=2))
+        assert [len(c) for c in chunks] == [2, 1]
+        assert chunks[0]["quantity"].dtype == "int16"
+        assert chunks[1]["quantity"].tolist() == ["x"]
+
+
+class TestMemoryReport:
+
+    def test_reports_present_tables(self, raw_dir):
+        report = memory_report(raw_dir)
+        assert set(report["table"]) == {"orders", "order_items"}
+        assert (report["typed_mb"] <= report["untyped_mb"]).all()
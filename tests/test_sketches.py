@@ -0,0 +1,87 @@
+"""Tests for src.services.sketches module."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.sketches import (
+    DEFAULT_COMPRESSION, HyperLogLog, TDigest, centroid_quantiles, compress_centroids,
+    grouped_quantiles, relative_error,
+)
+
+
+class TestHyperLogLog:
+
+    @pytest.mark.parametrize("n", [50, 3_000, 200_000])
+    def test_estimate_within_error_bound(self, n):
+        estimate = HyperLogLog().add(np.arange(n)).count()
+        assert abs(estimate - n) / n < 4 * relative_error()
+
+    def test_duplicates_do_not_count(self):
+        sketch = HyperLogLog().add(np.arange(1_000))
+        assert sketch.count() == HyperLogLog().add(np.tile(np.arange(1_000), 5)).count()
+
+    def test_merge_equals_union(self):
+        left = HyperLogLog().add(np.arange(0, 6_000))
+        right = HyperLogLog().add(np.arange(4_000, 10_000))
+        union = HyperLogLog().add(np.arange(10_000))
+        np.testing.assert_array_equal(left.merge(right).registers, union.registers)
+
+    def test_missing_ids_are_ignored(self):
+        sketch = HyperLogLog().add([1.0, None, 2.0, np.nan])
+        assert round(sketch.count()) == 2
+
+    def test_bytes_round_trip(self):
+        sketch = HyperLogLog(precision=10).add(np.arange(500))
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+        assert restored.precision == 10
+        assert restored.count() == sketch.count()
+
+    def test_rejects_mismatched_precision(self):
+        with pytest.raises(ValueError, match="different precision"):
+            HyperLogLog(10).merge(HyperLogLog(12))
+        with pytest.raises(ValueError, match="precision must be"):
+            HyperLogLog(precision=2)
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(8).lognormal(4, 0.8, 100_000)
+
+
+class TestTDigest:
+
+    def test_merged_chunks_track_percentiles(self, values):
+        digest = TDigest()
+        for chunk in np.array_split(values, 25):
+            digest = digest.merge(TDigest().add(chunk))
+        ranked = np.sort(values)
+        for q in (0.5, 0.9, 0.99):
+            estimate = digest.quantile(q)[0]
+            assert abs(np.searchsorted(ranked, estimate) / len(values) - q) < 0.005
+
+    def test_digest_is_bounded(self, values):
+        assert len(TDigest().add(values).centroids) <= DEFAULT_COMPRESSION
+
+    def test_small_digest_is_exact(self):
+        values = np.random.default_rng(2).integers(1, 500, 80).astype(float)
+        np.testing.assert_allclose(
+            TDigest().add(values).quantile([0.0, 0.5, 0.9, 0.99, 1.0]),
+            np.percentile(values, [0, 50, 90, 99, 100]),
+        )
+
+    def test_extremes_survive_merges(self, values):
+        digest = TDigest().add(values[:50_000]).merge(TDigest().add(values[50_000:]))
+        assert digest.quantile([0.0, 1.0]).tolist() == [values.min(), values.max()]
+        assert digest.weight == len(values)
+
+    def test_grouped_quantiles_match_each_digest(self, values):
+        groups = pd.DataFrame({"day": np.arange(len(values)) % 7, "mean": values, "weight": 1.0})
+        merged = compress_centroids(groups, ["day"])
+        keys, result = grouped_quantiles(merged, ["day"], [0.0, 0.5, 0.99, 1.0])
+        for row, day in enumerate(keys["day"]):
+            digest = merged[merged["day"] == day]
+            expected = centroid_quantiles(
+                digest["mean"].to_numpy(), digest["weight"].to_numpy(), [0.0, 0.5, 0.99, 1.0]
+            )
+            np.testing.assert_allclose(result[row], expected)
+        assert keys["weight"].sum() == len(values)
@@ -0,0 +1,35 @@
+"""Tests for src.services.sql_script module."""
+from src.services.sql_script import split_statements
+
+
+class TestSplitStatements:
+
+    def test_plain_statements(self):
+        assert split_statements("SELECT 1; SELECT 2;") == ["SELECT 1", "SELECT 2"]
+
+    def test_trigger_body_kept_whole(self):
+        script = """
+            CREATE TRIGGER t AFTER INSERT ON a
+            BEGIN
+              UPDATE b SET n = CASE WHEN NEW.x > 0 THEN 1 ELSE 0 END;
+              DELETE FROM c;
+            END;
+            SELECT 1;
+        """
+        statements = split_statements(script)
+        assert len(statements) == 2
+        assert statements[0].endswith("END")
+
+    def test_semicolons_in_strings_and_comments(self):
+        script = "-- note; not a split\nSELECT 'a;b'; /* x; y */ SELECT 2"
+        assert split_statements(script) == [
+            "-- note; not a split\nSELECT 'a;b'",
+            "/* x; y */ SELECT 2",
+        ]
+
+    def test_dollar_quoted_body(self):
+        script = "CREATE FUNCTION f() RETURNS int AS $$ BEGIN RETURN 1; END; $$ LANGUAGE plpgsql; SELECT 1"
+        assert len(split_statements(script)) == 2
+
+    def test_comment_only_chunks_dropped(self):
+        assert split_statements("SELECT 1;\n-- trailing comment\n") == ["SELECT 1"]
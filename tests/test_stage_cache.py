@@ -0,0 +1,102 @@
+"""Tests for src.services.stage_cache module."""
+import os
+
+import pandas as pd
+import pytest
+
+from src.services.stage_cache import StageCache, code_version, fingerprint, frame_digest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StageCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def raw(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text("order_id\n1\n2\n", encoding="utf-8")
+    return path
+
+
+class TestFingerprints:
+
+    def test_fingerprint_is_stable(self):
+        assert fingerprint("a", ("location",), 5) == fingerprint("a", ("location",), 5)
+        assert fingerprint("a", ("location",)) != fingerprint("a", ())
+
+    def test_key_follows_file_contents(self, cache, raw):
+        before = cache.key("ingest", files=[raw])
+        assert cache.key("ingest", files=[raw]) == before
+        raw.write_text("order_id\n1\n3\n", encoding="utf-8")
+        assert cache.key("ingest", files=[raw]) != before
+
+    def test_unchanged_stat_reuses_digest(self, cache, raw):
+        before = cache.key(files=[raw])
+        stat = raw.stat()
+        raw.write_text("order_id\n9\n9\n", encoding="utf-8")
+        os.utime(raw, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert StageCache(cache.directory).key(files=[raw]) == before
+
+    def test_code_version_follows_sources(self, tmp_path):
+        package = tmp_path / "pkg"
+        package.mkdir()
+        (package / "a.py").write_text("x = 1\n", encoding="utf-8")
+        before = code_version(package)
+        (package / "a.py").write_text("x = 2\n", encoding="utf-8")
+        assert code_version(package) != before
+
+    def test_frame_digest_follows_values_and_dtypes(self):
+        df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+        assert frame_digest(df) == frame_digest(df.copy())
+        assert frame_digest(df) != frame_digest(df.assign(a=[1, 3]))
+        assert frame_digest(df) != frame_digest(df.astype({"a": "float64"}))
+
+
+class TestStageCache:
+
+    def test_round_trip(self, cache):
+        frame = pd.DataFrame({"order_id": [3, 1], "total": [9.5, 2.0]}, index=[7, 2])
+        cache.store("detail", "k1", {"facts": frame, "menu": None}, {"rows": 2})
+        cached = cache.load("detail", "k1")
+        pd.testing.assert_frame_equal(cached.frames["facts"], frame)
+        assert cached.frames["menu"] is None
+        assert cached.meta == {"rows": 2}
+        assert cache.load("detail", "k2") is None
+
+    def test_marker_requires_outputs(self, cache, tmp_path):
+        report = tmp_path / "report.xlsx"
+        cache.store("export", "k1")
+        assert cache.load("export", "k1", requires=[report]) is None
+        report.touch()
+        assert cache.load("export", "k1", requires=[report]).frames == {}
+
+    def test_invalidate_drops_only_named_stages(self, cache):
+        cache.store("database", "k1")
+        cache.store("views", "k2")
+        cache.store("kpis", "k3", {"daily": pd.DataFrame({"a": [1]})})
+        cache.invalidate("database", "views")
+        assert cache.load("database", "k1") is None
+        assert cache.load("views", "k2") is None
+        assert cache.load("kpis", "k3") is not None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        frame = pd.DataFrame({"value": range(2_000)})
+        cache = StageCache(tmp_path / "cache")
+        cache.store("kpis", "old", {"f": frame})
+        cache.store("kpis", "used", {"f": frame})
+        manifest = cache.directory / "kpis-old" / "manifest.json"
+        os.utime(manifest, (0, 0))
+        size = sum(f.stat().st_size for f in (cache.directory / "kpis-used").iterdir())
+        cache.max_bytes = int(2.5 * size)
+        cache.store("kpis", "new", {"f": frame})
+        assert cache.load("kpis", "old") is None
+        assert cache.load("kpis", "used") is not None
+        assert cache.load("kpis", "new") is not None
+
+    def test_disabled_cache_never_hits(self, tmp_path, raw):
+        cache = StageCache(tmp_path / "cache", enabled=False)
+        assert cache.key("ingest", files=[raw]) == ""
+        cache.store("ingest", "", {"orders": pd.DataFrame({"a": [1]})})
+        assert cache.load("ingest", "") is None
+        assert not cache.directory.exists()
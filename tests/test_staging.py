@@ -0,0 +1,144 @@
+"""Tests for src.services.staging module."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.services.order_facts import build_order_facts
+from src.services.staging import (
+    iter_order_detail, read_kpis, read_order_detail, read_order_facts, read_tables, remove_part,
+    write_kpis, write_order_detail, write_order_facts, write_tables,
+)
+
+
+@pytest.fixture
+def detail():
+    return pd.DataFrame({
+        "order_item_id": [1, 2, 3, 4, 5],
+        "order_id": [1, 1, 2, 3, 4],
+        "order_timestamp": pd.to_datetime([
+            "2023-01-02 10:00", "2023-01-02 10:00", "2023-01-31 23:30",
+            "2023-02-15 12:00", "2023-03-01 09:00",
+        ]),
+        "line_total": [100.0, 30.0, 150.0, 60.0, 80.0],
+        "item_name": ["Burger", "Fries", "Burger", "Latte", "Cookie"],
+    })
+
+
+def _sorted(df):
+    return df.sort_values("order_item_id").reset_index(drop=True)
+
+
+class TestOrderDetailStaging:
+
+    def test_round_trip(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        result = read_order_detail(tmp_path / "detail")
+        pd.testing.assert_frame_equal(_sorted(result), detail, check_dtype=False)
+
+    def test_partitioned_by_year_and_month(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        months = {p.relative_to(tmp_path / "detail").as_posix()
+                  for p in (tmp_path / "detail").glob("year=*/month=*")}
+        assert months == {"year=2023/month=1", "year=2023/month=2", "year=2023/month=3"}
+
+    def test_column_projection(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        result = read_order_detail(tmp_path / "detail", columns=["order_id", "line_total"])
+        assert list(result.columns) == ["order_id", "line_total"]
+
+    def test_date_range_is_inclusive(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        result = read_order_detail(
+            tmp_path / "detail", start=date(2023, 1, 31), end=date(2023, 2, 15)
+        )
+        assert sorted(result["order_item_id"]) == [3, 4]
+
+    def test_open_ended_range(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        result = read_order_detail(tmp_path / "detail", start=date(2023, 2, 1))
+        assert sorted(result["order_item_id"]) == [4, 5]
+
+    def test_overwrite_replaces_dataset(self, tmp_path, detail):
+        write_order_detail(detail, tmp_path / "detail")
+        write_order_detail(detail.head(2), tmp_path / "detail")
+        assert len(read_order_detail(tmp_path / "detail")) == 2
+
+    def test_append_adds_rows(self, tmp_path, detail):
+        write_order_detail(detail.head(2), tmp_path / "detail")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True)
+        pd.testing.assert_frame_equal(
+            _sorted(read_order_detail(tmp_path / "detail")), detail, check_dtype=False
+        )
+
+    def test_rewritten_part_replaces_its_rows(self, tmp_path, detail):
+        write_order_detail(detail.head(2), tmp_path / "detail")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True, part="delta")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True, part="delta")
+        assert len(read_order_detail(tmp_path / "detail")) == 5
+
+    def test_read_part(self, tmp_path, detail):
+        write_order_detail(detail.head(2), tmp_path / "detail", part="part")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True, part="delta")
+        result = read_order_detail(tmp_path / "detail", ["order_item_id"], part="delta")
+        assert sorted(result["order_item_id"]) == [3, 4, 5]
+        assert read_order_detail(tmp_path / "detail", ["order_item_id"], part="other").empty
+        both = read_order_detail(tmp_path / "detail", ["order_item_id"], part=["part", "delta"])
+        assert sorted(both["order_item_id"]) == [1, 2, 3, 4, 5]
+
+    def test_iter_part_in_batches(self, tmp_path, detail):
+        write_order_detail(detail.head(2), tmp_path / "detail")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True, part="delta")
+        batches = list(iter_order_detail(tmp_path / "detail", ["order_item_id"], part="delta", batch_size=1))
+        assert len(batches) == 3
+        assert sorted(pd.concat(batches)["order_item_id"]) == [3, 4, 5]
+        assert list(iter_order_detail(tmp_path / "detail", part="other")) == []
+
+    def test_remove_part(self, tmp_path, detail):
+        write_order_detail(detail.head(2), tmp_path / "detail")
+        write_order_detail(detail.tail(3), tmp_path / "detail", append=True, part="delta")
+        assert remove_part(tmp_path / "detail", "delta") > 0
+        assert sorted(read_order_detail(tmp_path / "detail")["order_item_id"]) == [1, 2]
+        assert remove_part(tmp_path / "missing", "delta") == 0
+
+
+class TestOrderFactsStaging:
+
+    def test_round_trip_with_pruning(self, tmp_path, detail):
+        facts = build_order_facts(detail)
+        write_order_facts(facts, tmp_path / "facts")
+        result = read_order_facts(tmp_path / "facts", start=date(2023, 2, 1))
+        assert sorted(result["order_id"]) == [3, 4]
+        assert set(result.columns) == set(facts.columns)
+
+
+class TestTableStaging:
+
+    def test_round_trip_keeps_order(self, tmp_path):
+        kpis = {
+            "weekly": pd.DataFrame({"week": [1, 2], "revenue": [10.0, 20.0]}),
+            "daily": pd.DataFrame({"order_date": [date(2023, 1, 2)], "revenue": [5.0]}),
+        }
+        write_kpis(kpis, tmp_path / "kpis")
+        result = read_kpis(tmp_path / "kpis")
+        assert list(result) == ["weekly", "daily"]
+        pd.testing.assert_frame_equal(result["weekly"], kpis["weekly"])
+        assert result["daily"]["order_date"].tolist() == [date(2023, 1, 2)]
+
+    def test_rewrite_drops_stale_tables(self, tmp_path):
+        write_kpis({"a": pd.DataFrame({"x": [1]}), "b": pd.DataFrame({"x": [2]})}, tmp_path)
+        write_kpis({"b": pd.DataFrame({"x": [3]})}, tmp_path)
+        assert read_kpis(tmp_path)["b"]["x"].tolist() == [3]
+        assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+    def test_nothing_staged(self, tmp_path):
+        assert read_kpis(tmp_path / "missing") == {}
+
+    def test_ingested_tables_keep_dtypes(self, tmp_path):
+        orders = pd.DataFrame({
+            "order_id": pd.array([1, 2], dtype="int32"),
+            "customer_id": pd.array([7, None], dtype="Int32"),
+            "location": pd.Series(["North", "South"], dtype="category"),
+        })
+        write_tables({"orders": orders}, tmp_path)
+        pd.testing.assert_frame_equal(read_tables(tmp_path)["orders"], orders)
@@ -0,0 +1,104 @@
+"""Tests for src.services.streaming module."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.kpi_calculator import DetailAggregates, KPIEngine
+from src.services.streaming import OrderItemChunks, StreamingAggregator
+from src.services.validator import ValidationEngine
+
+
+@pytest.fixture
+def detail():
+    rng = np.random.default_rng(3)
+    order_ids = np.sort(rng.integers(1, 60, 300))
+    starts = pd.Timestamp("2023-01-01") + pd.to_timedelta(
+        rng.integers(0, 20 * 86400, 60), unit="s"
+    )
+    df = pd.DataFrame({
+        "order_item_id": np.arange(1, 301),
+        "order_id": order_ids,
+        "order_timestamp": starts[order_ids - 1],
+        "quantity": rng.integers(1, 4, 300),
+        "item_name": rng.choice(["Burger", "Latte", "Cookie"], 300),
+        "category_name": rng.choice(["Fastfood", "Coffee"], 300),
+    })
+    df["line_total"] = df["quantity"] * 25.0
+    return df
+
+
+# ── OrderItemChunks ──────────────────────────────────────────────────
+
+class TestOrderItemChunks:
+
+    def test_deduplicates_across_chunks(self, tmp_path):
+        path = tmp_path / "order_items.csv"
+        pd.DataFrame({
+            "order_item_id": [1, 2, 3, 1, 4, 2],
+            "order_id": [1, 1, 2, 1, 3, 1],
+        }).to_csv(path, index=False)
+        chunks = list(OrderItemChunks(path, chunk_size=2))
+        combined = pd.concat(chunks)
+        assert combined["order_item_id"].tolist() == [1, 2, 3, 4]
+
+    def test_filters_to_order_ids(self, tmp_path):
+        path = tmp_path / "order_items.csv"
+        pd.DataFrame({"order_item_id": [1, 2, 3], "order_id": [1, 2, 3]}).to_csv(path, index=False)
+        chunks = list(OrderItemChunks(path, chunk_size=2, order_ids=pd.Series([2, 3])))
+        assert pd.concat(chunks)["order_id"].tolist() == [2, 3]
+
+    def test_counts_late_rows_dropped_by_filter(self, tmp_path):
+        path = tmp_path / "order_items.csv"
+        pd.DataFrame({"order_item_id": [1, 2, 3, 4, 5], "order_id": [1, 2, 3, 1, 2]}).to_csv(path, index=False)
+        stream = OrderItemChunks(path, chunk_size=2, order_ids=pd.Series([3]), late_after=3)
+        assert pd.concat(list(stream))["order_item_id"].tolist() == [3]
+        assert (stream.late, stream.max_key) == (2, 5)
+        list(stream)
+        assert stream.late == 2
+
+    def test_is_reiterable(self, tmp_path):
+        path = tmp_path / "order_items.csv"
+        pd.DataFrame({"order_item_id": [1, 2], "order_id": [1, 1]}).to_csv(path, index=False)
+        stream = OrderItemChunks(path, chunk_size=1)
+        assert len(list(stream)) == len(list(stream)) == 2
+
+    def test_validates_chunks(self, tmp_path):
+        path = tmp_path / "order_items.csv"
+        pd.DataFrame({
+            "order_item_id": [1, 2, 3, 4],
+            "order_id": [1, 1, 9, 2],
+            "menu_item_id": [1, 1, 1, 1],
+            "quantity": [1, 0, 1, 2],
+            "item_price": [5.0, 5.0, 5.0, 5.0],
+        }).to_csv(path, index=False)
+        engine = ValidationEngine(quarantine_dir=tmp_path / "quarantine")
+        engine.reference("orders", pd.DataFrame({"order_id": [1, 2]}))
+        stream = OrderItemChunks(path, chunk_size=2, validator=engine)
+        assert pd.concat(stream)["order_item_id"].tolist() == [1, 4]
+        assert pd.concat(stream)["order_item_id"].tolist() == [1, 4]
+        assert engine.reports["order_items"].rows == 4
+        quarantined = pd.read_csv(tmp_path / "quarantine" / "order_items.csv")
+        assert quarantined["order_item_id"].tolist() == [2, 3]
+
+
+# ── StreamingAggregator ──────────────────────────────────────────────
+
+class TestStreamingAggregator:
+
+    @pytest.mark.parametrize("chunk_size", [7, 64, 1000])
+    def test_matches_in_memory_kpis(self, detail, chunk_size):
+        aggregator = StreamingAggregator()
+        for start in range(0, len(detail), chunk_size):
+            aggregator.add(detail.iloc[start:start + chunk_size])
+        assert aggregator.rows == len(detail)
+
+        engine = KPIEngine()
+        streamed = engine.run_aggregates(aggregator.result())
+        in_memory = engine.run_aggregates(DetailAggregates.from_detail(detail))
+        for name, expected in in_memory.items():
+            pd.testing.assert_frame_equal(
+                streamed[name].reset_index(drop=True), expected.reset_index(drop=True)
+            )
+
+    def test_empty_stream(self):
+        assert StreamingAggregator().result().hourly is None
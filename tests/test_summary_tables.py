@@ -0,0 +1,163 @@
+"""Tests for the trigger-maintained KPI summaries in sql/summary/."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.services.data_loader import SqlAlchemyRepository
+
+SCHEMA = Path("sql/schema/create_tables_sqlite.sql")
+SUMMARY = Path("sql/summary/summary_tables_sqlite.sql")
+VIEWS = sorted(Path("sql/views").glob("*_sqlite.sql"))
+
+# The original full-history joins each view replaced.
+REFERENCE = {
+    "kpi_daily_revenue": """
+        SELECT DATE(o.order_timestamp) AS sales_date,
+               COUNT(DISTINCT o.order_id) AS orders_count,
+               SUM(oi.quantity * oi.item_price) AS total_revenue
+        FROM orders o JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY DATE(o.order_timestamp)
+        ORDER BY sales_date""",
+    "sales_trends_hourly": """
+        SELECT DATE(o.order_timestamp) AS sales_date,
+               CAST(strftime('%H', o.order_timestamp) AS INTEGER) AS sales_hour,
+               COUNT(DISTINCT o.order_id) AS orders_count,
+               SUM(oi.quantity * oi.item_price) AS total_revenue
+        FROM orders o JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY 1, 2
+        ORDER BY sales_date, sales_hour""",
+    "kpi_top_menu_items": """
+        SELECT mi.item_name, SUM(oi.quantity) AS total_quantity,
+               SUM(oi.quantity * oi.item_price) AS total_revenue
+        FROM order_items oi JOIN menu_items mi ON oi.menu_item_id = mi.menu_item_id
+        GROUP BY mi.item_name
+        ORDER BY item_name""",
+    "kpi_revenue_by_category": """
+        SELECT c.category_name, SUM(oi.quantity * oi.item_price) AS total_revenue
+        FROM order_items oi
+        JOIN menu_items mi ON oi.menu_item_id = mi.menu_item_id
+        JOIN categories c ON mi.category_id = c.category_id
+        GROUP BY c.category_name
+        ORDER BY category_name""",
+}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = SqlAlchemyRepository(f"sqlite:///{tmp_path / 'summary.db'}")
+    repository.execute_sql(SCHEMA.read_text(encoding="utf-8"))
+    repository.execute_sql("""
+        INSERT INTO categories VALUES (1, 'Mains'), (2, 'Drinks');
+        INSERT INTO menu_items (menu_item_id, category_id, item_name, unit_price)
+        VALUES (1, 1, 'Burger', 10), (2, 1, 'Pasta', 12), (3, 2, 'Latte', 4);
+        INSERT INTO orders (order_id, order_timestamp) VALUES
+          (1, '2023-01-02 10:15:00'), (2, '2023-01-02 10:45:00'), (3, '2023-01-07 18:00:00')
+    """)
+    repository.execute_sql(SUMMARY.read_text(encoding="utf-8"))
+    for view in VIEWS:
+        repository.execute_sql(view.read_text(encoding="utf-8"))
+    repository.execute_sql("""
+        INSERT INTO order_items VALUES
+          (1, 1, 1, 2, 10), (2, 1, 3, 1, 4), (3, 2, 2, 1, 12), (4, 3, 1, 3, 10)
+    """)
+    yield repository
+    repository.close()
+
+
+def assert_views_match(repo):
+    for view, query in REFERENCE.items():
+        order = query.rsplit("ORDER BY", 1)[1]
+        expected = repo.fetch_dataframe(query)
+        actual = repo.fetch_dataframe(f"SELECT * FROM {view} ORDER BY {order}")
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+# ── Trigger maintenance ──────────────────────────────────────────────
+
+class TestSummaryTriggers:
+
+    def test_inserts(self, repo):
+        assert_views_match(repo)
+        daily = repo.fetch_dataframe("SELECT * FROM kpi_daily_revenue ORDER BY sales_date")
+        assert daily["orders_count"].tolist() == [2, 1]
+        assert daily["total_revenue"].tolist() == [36.0, 30.0]
+
+    def test_item_update_and_move(self, repo):
+        repo.execute_sql("""
+            UPDATE order_items SET quantity = 5 WHERE order_item_id = 1;
+            UPDATE order_items SET order_id = 3 WHERE order_item_id = 3
+        """)
+        assert_views_match(repo)
+
+    def test_item_delete_drops_empty_order(self, repo):
+        repo.execute_sql("DELETE FROM order_items WHERE order_item_id = 4")
+        assert_views_match(repo)
+        hourly = repo.fetch_dataframe("SELECT * FROM sales_trends_hourly")
+        assert hourly["sales_date"].tolist() == ["2023-01-02"]
+
+    def test_order_timestamp_moves_bucket(self, repo):
+        repo.execute_sql("UPDATE orders SET order_timestamp = '2023-01-03 09:00:00' WHERE order_id = 2")
+        assert_views_match(repo)
+
+    def test_same_bucket_rewrite_is_noop(self, repo):
+        before = repo.fetch_dataframe("SELECT * FROM summary_hourly")
+        repo.execute_sql("UPDATE orders SET order_timestamp = '2023-01-02 10:15:00.000000' WHERE order_id = 1")
+        pd.testing.assert_frame_equal(repo.fetch_dataframe("SELECT * FROM summary_hourly"), before)
+
+    def test_order_delete(self, repo):
+        repo.execute_sql("""
+            DELETE FROM orders WHERE order_id = 1;
+            DELETE FROM order_items WHERE order_id = 1
+        """)
+        assert_views_match(repo)
+
+    def test_items_before_their_order(self, repo):
+        repo.execute_sql("""
+            INSERT INTO order_items VALUES (5, 4, 3, 2, 4);
+            INSERT INTO orders (order_id, order_timestamp) VALUES (4, '2023-01-02 10:05:00')
+        """)
+        assert_views_match(repo)
+
+    def test_reapplying_script_keeps_totals(self, repo):
+        before = repo.fetch_dataframe("SELECT * FROM summary_daily")
+        repo.execute_sql(SUMMARY.read_text(encoding="utf-8"))
+        pd.testing.assert_frame_equal(repo.fetch_dataframe("SELECT * FROM summary_daily"), before)
+
+
+# ── Bulk load ────────────────────────────────────────────────────────
+
+class TestBulkLoadRebuild:
+
+    def test_fast_load_rebuilds_summaries(self, tmp_path):
+        with SqlAlchemyRepository(f"sqlite:///{tmp_path / 'bulk.db'}") as repo:
+            repo.execute_sql(SCHEMA.read_text(encoding="utf-8"))
+            repo.execute_sql(SUMMARY.read_text(encoding="utf-8"))
+            for view in VIEWS:
+                repo.execute_sql(view.read_text(encoding="utf-8"))
+            repo.bulk_load([
+                ("categories", pd.DataFrame({"category_id": [1], "category_name": ["Mains"]})),
+                ("menu_items", pd.DataFrame({
+                    "menu_item_id": [1, 2], "category_id": [1, 1],
+                    "item_name": ["Burger", "Pasta"], "unit_price": [10.0, 12.0],
+                })),
+                ("orders", pd.DataFrame({
+                    "order_id": [1, 2],
+                    "order_timestamp": pd.to_datetime(["2023-01-02 10:00", "2023-01-02 11:00"]),
+                })),
+                ("order_items", pd.DataFrame({
+                    "order_item_id": [1, 2, 3], "order_id": [1, 1, 2],
+                    "menu_item_id": [1, 2, 1], "quantity": [1, 2, 1], "item_price": [10.0, 12.0, 10.0],
+                })),
+            ])
+            assert_views_match(repo)
+            triggers = repo.fetch_dataframe(
+                "SELECT COUNT(*) AS cnt FROM sqlite_master WHERE type = 'trigger'"
+            )
+            assert triggers["cnt"].iloc[0] == 12
+
+            repo.bulk_load([("order_items", pd.DataFrame({
+                "order_item_id": [4], "order_id": [2], "menu_item_id": [2],
+                "quantity": [3], "item_price": [12.0],
+            }))])
+            assert_views_match(repo)
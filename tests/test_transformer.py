@@ -45,6 +45,72 @@ class TestTimestampNormalizer:
         assert len(result) == 0
 
 
+    def test_detects_day_first_format(self):
+        df = pd.DataFrame({"order_timestamp": ["13/01/2023 10:05", "02/03/2023 18:30"]})
+        normalizer = TimestampNormalizer(["order_timestamp"])
+        result = normalizer.transform(df)
+        assert result["order_timestamp"].tolist() == [
+            pd.Timestamp("2023-01-13 10:05"), pd.Timestamp("2023-03-02 18:30"),
+        ]
+        assert normalizer.reports["order_timestamp"].format == "%d/%m/%Y %H:%M"
+
+    def test_failures_are_counted_not_dropped(self):
+        df = pd.DataFrame({"order_timestamp": [
+            "2023-01-01 10:00:00", "2023-01-01T11:30:00.5", "not-a-date", "", None, "not-a-date",
+        ]})
+        normalizer = TimestampNormalizer(["order_timestamp"])
+        result = normalizer.transform(df)
+        assert len(result) == 6
+        assert result["order_timestamp"].iloc[1] == pd.Timestamp("2023-01-01 11:30:00.5")
+        report = normalizer.reports["order_timestamp"]
+        assert (report.parsed, report.inferred, report.failed) == (1, 1, 2)
+        assert report.examples == ["not-a-date"]
+        assert "2 unparseable" in str(report)
+
+    def test_repeated_strings_are_parsed_once(self):
+        values = ["2023-01-01 10:00:00", "2023-01-02 11:00:00", None, "bad"] * 50
+        normalizer = TimestampNormalizer(["order_timestamp"])
+        plain = normalizer.transform(pd.DataFrame({"order_timestamp": values}))
+        assert normalizer.reports["order_timestamp"].cached
+        assert normalizer.reports["order_timestamp"].failed == 50
+        categorical = normalizer.transform(
+            pd.DataFrame({"order_timestamp": pd.Categorical(values)})
+        )
+        pd.testing.assert_series_equal(categorical["order_timestamp"], plain["order_timestamp"])
+        assert plain["order_timestamp"].iloc[1] == pd.Timestamp("2023-01-02 11:00")
+
+    def test_other_columns_are_not_copied(self):
+        df = pd.DataFrame({"order_timestamp": ["2023-01-01 10:00:00"] * 3, "total": [1.0, 2.0, 3.0]})
+        result = TimestampNormalizer(["order_timestamp"]).transform(df)
+        assert np.shares_memory(result["total"].to_numpy(), df["total"].to_numpy())
+        assert df["order_timestamp"].dtype != result["order_timestamp"].dtype
+
+    def test_parsed_column_passes_through(self):
+        df = pd.DataFrame({"order_timestamp": pd.to_datetime(["2023-01-01 10:00", None])})
+        normalizer = TimestampNormalizer(["order_timestamp"])
+        result = normalizer.transform(df)
+        pd.testing.assert_series_equal(result["order_timestamp"], df["order_timestamp"])
+        assert normalizer.reports["order_timestamp"].parsed == 1
+
+    def test_local_times_to_utc_per_location(self):
+        df = pd.DataFrame({
+            "order_timestamp": [
+                "2023-07-01 12:00:00", "2023-07-01 12:00:00", "2023-07-01 12:00:00", "2023-11-05 01:30:00",
+            ],
+            "location": pd.Categorical(["NYC", "London", "Online", "NYC"]),
+        })
+        normalizer = TimestampNormalizer(
+            ["order_timestamp"], timezones={"NYC": "America/New_York", "London": "Europe/London"}
+        )
+        result = normalizer.transform(df)["order_timestamp"]
+        assert result.iloc[:3].tolist() == [
+            pd.Timestamp("2023-07-01 16:00"), pd.Timestamp("2023-07-01 11:00"), pd.Timestamp("2023-07-01 12:00"),
+        ]
+        # 01:30 happened twice in New York that night.
+        assert pd.isna(result.iloc[3])
+        assert normalizer.reports["order_timestamp"].ambiguous == 1
+
+
 # ── Deduplicator ─────────────────────────────────────────────────────
 
 class TestDeduplicator:
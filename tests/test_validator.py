@@ -2,7 +2,9 @@
 import pytest
 import pandas as pd
 
-from src.services.validator import OrderValidator, MenuItemValidator
+from src.services.validator import (
+    Check, MenuItemValidator, OrderValidator, TableRules, ValidationEngine,
+)
 
 
 # ── OrderValidator ───────────────────────────────────────────────────
@@ -98,3 +100,104 @@ class TestMenuItemValidator:
         df = pd.DataFrame({"menu_item_id": [1]})
         with pytest.raises(ValueError, match="Missing required columns"):
             MenuItemValidator().validate(df)
+
+
+# ── ValidationEngine ─────────────────────────────────────────────────
+
+@pytest.fixture
+def tables():
+    return {
+        "categories": pd.DataFrame({"category_id": [1, 2], "category_name": ["Coffee", "Coffee"]}),
+        "menu_items": pd.DataFrame({
+            "menu_item_id": [10, 11, 12],
+            "category_id": [1, 2, 1],
+            "item_name": ["Latte", "Mocha", "Tea"],
+            "unit_price": [3.5, 4.0, -1.0],
+        }),
+        "orders": pd.DataFrame({
+            "order_id": [100, 101, 102],
+            "order_timestamp": ["2023-01-01 10:00:00", "2023-01-01 11:00:00", "soon"],
+            "order_status": ["completed", None, "completed"],
+        }),
+        "order_items": pd.DataFrame({
+            "order_item_id": [1, 2, 3, 4, 5],
+            "order_id": [100, 101, 102, 100, 100],
+            "menu_item_id": [10, 10, 10, 11, "x"],
+            "quantity": [1, 2, 1, 1, 1],
+            "item_price": [3.5, 3.5, 3.5, 4.0, 3.5],
+        }),
+    }
+
+
+class TestValidationEngine:
+
+    def test_quarantines_failing_rows_with_reasons(self, tables, tmp_path):
+        engine = ValidationEngine(quarantine_dir=tmp_path)
+        result = engine.validate_all(tables)
+        assert result["categories"]["category_id"].tolist() == [1]
+        assert result["menu_items"]["menu_item_id"].tolist() == [10]
+        reasons = pd.read_csv(tmp_path / "menu_items.csv").set_index("menu_item_id")["quarantine_reason"]
+        assert reasons[11] == "category_id not in categories"
+        assert reasons[12] == "violates unit_price >= 0"
+        assert pd.read_csv(tmp_path / "categories.csv")["quarantine_reason"].tolist() == [
+            "duplicate category_name"
+        ]
+
+    def test_children_of_quarantined_rows_are_quarantined(self, tables):
+        engine = ValidationEngine()
+        result = engine.validate_all(tables)
+        assert result["orders"]["order_id"].tolist() == [100, 101]
+        assert result["order_items"]["order_item_id"].tolist() == [1, 2]
+        assert engine.reports["order_items"].reasons == {
+            "menu_item_id is not a number": 1,
+            "order_id not in orders": 1,
+            "menu_item_id not in menu_items": 1,
+        }
+
+    def test_duplicate_keys_keep_the_first_row(self, tmp_path):
+        orders = pd.DataFrame({
+            "order_id": [1, 2, 1, 1],
+            "order_timestamp": ["2023-01-01 10:00:00"] * 4,
+            "location": ["North", "South", "East", "West"],
+        })
+        engine = ValidationEngine(quarantine_dir=tmp_path)
+        result = engine.validate("orders", orders)
+        assert result["location"].tolist() == ["North", "South"]
+        assert engine.reports["orders"].reasons == {"duplicate order_id": 2}
+        assert pd.read_csv(tmp_path / "orders.csv")["location"].tolist() == ["East", "West"]
+
+    def test_coerces_to_schema_dtypes(self, tables):
+        result = ValidationEngine().validate_all(tables)
+        items, orders = result["order_items"], result["orders"]
+        assert items["menu_item_id"].dtype == "int32"
+        assert items["quantity"].dtype == "int16"
+        assert pd.api.types.is_datetime64_any_dtype(orders["order_timestamp"])
+
+    def test_nulls_take_column_defaults(self, tables):
+        result = ValidationEngine().validate_all(tables)
+        assert result["orders"]["order_status"].tolist() == ["completed", "completed"]
+
+    def test_unreferenced_parent_is_not_checked(self):
+        items = pd.DataFrame({
+            "order_item_id": [1], "order_id": [7], "menu_item_id": [3], "quantity": [1], "item_price": [2.0],
+        })
+        assert len(ValidationEngine().validate("order_items", items)) == 1
+
+    def test_missing_required_column_raises(self):
+        with pytest.raises(ValueError, match="Missing required columns in orders"):
+            ValidationEngine().validate("orders", pd.DataFrame({"order_id": [1]}))
+
+    def test_clean_run_removes_stale_quarantine(self, tables, tmp_path):
+        engine = ValidationEngine(quarantine_dir=tmp_path)
+        engine.validate_all(tables)
+        engine.validate("menu_items", tables["menu_items"].iloc[:1])
+        assert not (tmp_path / "menu_items.csv").exists()
+
+    def test_chunks_append_to_the_report(self, tmp_path):
+        rules = {"t": TableRules("id", checks=(Check("v", ">", 0),))}
+        engine = ValidationEngine(rules=rules, quarantine_dir=tmp_path)
+        engine.validate("t", pd.DataFrame({"id": [1, 2], "v": [1, 0]}))
+        engine.validate("t", pd.DataFrame({"id": [3], "v": [-1]}), append=True)
+        assert engine.reports["t"].rows == 3
+        assert engine.reports["t"].quarantined == 2
+        assert pd.read_csv(tmp_path / "t.csv")["id"].tolist() == [2, 3]